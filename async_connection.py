@@ -0,0 +1,323 @@
+import asyncio
+import gzip
+import logging
+import ssl
+import urllib.parse
+import xmlrpc.client
+
+import metrics
+from connection import OdooClientBase, is_access_denied, jsonrpc_body, jsonrpc_result, search_kwargs
+
+
+class AsyncXMLRPCTransport:
+    """
+    Cliente HTTP/1.1 mínimo sobre asyncio para peticiones XML-RPC o JSON-RPC,
+    con un pool de conexiones persistentes. El número de conexiones abiertas
+    limita también el número de peticiones simultáneas.
+
+    Solo cubre lo que usa Odoo: peticiones POST con Content-Length, respuestas
+    con Content-Length, chunked o hasta el cierre de la conexión, y respuestas
+    gzip. No sigue redirecciones, no usa proxies ni comprime los cuerpos de
+    petición (compress_requests no se aplica).
+
+    Args:
+        url (str): URL base del servidor (http o https).
+        max_connections (int): Número máximo de peticiones en curso.
+        connect_timeout (float): Segundos de espera al abrir una conexión.
+        read_timeout (float): Segundos de espera de la respuesta completa.
+        protocol (str): "xmlrpc" (/xmlrpc/2) o "jsonrpc" (/jsonrpc).
+    """
+
+    user_agent = f"Python-asyncio-xmlrpc/{xmlrpc.client.__version__}"
+
+    def __init__(self, url: str, max_connections: int = 20, connect_timeout: float = 10.0,
+                 read_timeout: float = 120.0, protocol: str = "xmlrpc"):
+        parsed = urllib.parse.urlsplit(url)
+        self.use_https = parsed.scheme == "https"
+        self.host = parsed.hostname
+        self.port = parsed.port or (443 if self.use_https else 80)
+        self.base_path = parsed.path.rstrip("/")
+        self.max_connections = max(1, max_connections)
+        self.connect_timeout = connect_timeout
+        self.read_timeout = read_timeout
+        self.protocol = protocol
+        self.connections_opened = 0
+        self._idle = []
+        self._slots = None
+        self._ids = 0
+
+    async def _open(self):
+        context = ssl.create_default_context() if self.use_https else None
+        reader, writer = await asyncio.wait_for(
+            asyncio.open_connection(self.host, self.port, ssl=context), self.connect_timeout)
+        self.connections_opened += 1
+        return reader, writer
+
+    async def request(self, service: str, method: str, params: tuple, tracker=None):
+        """
+        Envía una llamada a un servicio de Odoo ("common" u "object") y
+        devuelve su resultado.
+
+        Args:
+            service (str): Servicio de Odoo ("common" u "object").
+            method (str): Método del servicio (authenticate, execute_kw...).
+            params (tuple): Argumentos del método.
+            tracker (optional): Tracker de metrics al que se añaden los bytes
+                enviados y recibidos.
+
+        Raises:
+            xmlrpc.client.Fault: Si Odoo devuelve un error.
+            xmlrpc.client.ProtocolError: Si la respuesta HTTP no es 200.
+        """
+        if self._slots is None:
+            self._slots = asyncio.Semaphore(self.max_connections)
+
+        if self.protocol == "jsonrpc":
+            self._ids += 1
+            body = jsonrpc_body(service, method, params, self._ids)
+            path, content_type = self.base_path + "/jsonrpc", "application/json"
+        else:
+            body = xmlrpc.client.dumps(params, method).encode("utf-8", "xmlcharrefreplace")
+            path, content_type = f"{self.base_path}/xmlrpc/2/{service}", "text/xml"
+        head = (f"POST {path} HTTP/1.1\r\n"
+                f"Host: {self.host}:{self.port}\r\n"
+                f"User-Agent: {self.user_agent}\r\n"
+                f"Content-Type: {content_type}\r\n"
+                "Accept-Encoding: gzip\r\n"
+                f"Content-Length: {len(body)}\r\n\r\n").encode("latin-1")
+
+        async with self._slots:
+            # Se reintenta una vez si una conexión reutilizada ya estaba cerrada
+            for attempt in (0, 1):
+                reused = bool(self._idle)
+                reader, writer = self._idle.pop() if reused else await self._open()
+                try:
+                    writer.write(head + body)
+                    await writer.drain()
+                    status, headers, payload = await asyncio.wait_for(self._read_response(reader),
+                                                                      self.read_timeout)
+                except (ConnectionError, asyncio.IncompleteReadError):
+                    writer.close()
+                    if reused and not attempt:
+                        self.close()
+                        continue
+                    raise
+                except BaseException:
+                    writer.close()
+                    raise
+                break
+
+            if headers.get("connection") == "close":
+                writer.close()
+            else:
+                self._idle.append((reader, writer))
+
+        if tracker is not None:
+            tracker.set(request_bytes=len(body), response_bytes=len(payload))
+        if status != 200:
+            raise xmlrpc.client.ProtocolError(f"{self.host}{path}", status, "", headers)
+        if headers.get("content-encoding", "") == "gzip":
+            payload = gzip.decompress(payload)
+
+        if self.protocol == "jsonrpc":
+            return jsonrpc_result(payload)
+        parser, unmarshaller = xmlrpc.client.getparser()
+        parser.feed(payload)
+        parser.close()
+        return unmarshaller.close()[0]
+
+    @staticmethod
+    async def _read_response(reader: asyncio.StreamReader):
+        # Las respuestas provisionales 1xx (100 Continue) se descartan
+        status = 100
+        while 100 <= status < 200:
+            version, status = (await reader.readuntil(b"\r\n")).split()[:2]
+            status = int(status)
+            headers = await AsyncXMLRPCTransport._read_headers(reader)
+
+        # En HTTP/1.0 la conexión se cierra salvo que el servidor pida keep-alive
+        connection = headers.get("connection", "").lower()
+        if version == b"HTTP/1.0" and "keep-alive" not in connection:
+            headers["connection"] = "close"
+        elif "close" in connection:
+            headers["connection"] = "close"
+
+        if "chunked" in headers.get("transfer-encoding", "").lower():
+            chunks = []
+            while True:
+                size = int((await reader.readuntil(b"\r\n")).split(b";")[0], 16)
+                if not size:
+                    # Cabeceras finales (trailers) opcionales hasta la línea vacía
+                    await AsyncXMLRPCTransport._read_headers(reader)
+                    break
+                chunks.append(await reader.readexactly(size))
+                await reader.readexactly(2)
+            payload = b"".join(chunks)
+        elif "content-length" in headers:
+            payload = await reader.readexactly(int(headers["content-length"]))
+        else:
+            payload = await reader.read()
+            headers["connection"] = "close"
+        return status, headers, payload
+
+    @staticmethod
+    async def _read_headers(reader: asyncio.StreamReader) -> dict:
+        headers = {}
+        while True:
+            line = await reader.readuntil(b"\r\n")
+            if line == b"\r\n":
+                return headers
+            key, _, value = line.decode("latin-1").partition(":")
+            headers[key.strip().lower()] = value.strip()
+
+    def close(self):
+        """
+        Cierra todas las conexiones ociosas del pool.
+        """
+        idle, self._idle = self._idle, []
+        for reader, writer in idle:
+            writer.close()
+
+
+class AsyncOdooClient(OdooClientBase):
+    """
+    Cliente asyncio de Odoo con los mismos métodos que connection.OdooXMLRPC.
+
+    Las llamadas se envían por un pool de conexiones persistentes sin usar un
+    hilo por llamada; `async_concurrency` del config.ini limita cuántas hay en
+    curso a la vez. Usa el `protocol` del config.ini y, como OdooXMLRPC, si Odoo
+    rechaza el uid autentica de nuevo y repite la llamada una vez.
+
+    No aplica la sección [scheduler] (reintentos, límite de ritmo y circuit
+    breaker), la caché [cache] ni el uid guardado en uid_cache_file: el
+    planificador espera con time.sleep y bloquearía el bucle de eventos.
+
+    Ejemplo:
+        async with AsyncOdooClient() as odoo:
+            ids = await asyncio.gather(*(odoo.create("res.partner", {"name": n}) for n in nombres))
+    """
+
+    def __init__(self, config_path=None):
+        super().__init__(config_path)
+        self.concurrency = self.config.getint("odoo", "async_concurrency", fallback=20)
+        self.protocol = self.config.get("odoo", "protocol", fallback="xmlrpc").lower()
+        if self.protocol not in ("xmlrpc", "jsonrpc"):
+            raise ValueError(f"Protocolo de Odoo no soportado: {self.protocol}")
+        if self.config.getboolean("scheduler", "enabled", fallback=False):
+            logging.warning("AsyncOdooClient no aplica la sección [scheduler]: "
+                            "las llamadas se envían sin reintentos ni límite de ritmo")
+        self.transport = AsyncXMLRPCTransport(self.url, max_connections=self.concurrency,
+                                              connect_timeout=self.connect_timeout,
+                                              read_timeout=self.read_timeout,
+                                              protocol=self.protocol)
+        self.uid = None
+        self._auth_lock = None
+
+    async def __aenter__(self):
+        await self.authenticate()
+        return self
+
+    async def __aexit__(self, exc_type, exc_value, traceback):
+        self.close()
+        return False
+
+    async def authenticate(self, stale_uid: int = None) -> int:
+        """
+        Autentica contra el servicio common una sola vez y devuelve el uid.
+
+        Args:
+            stale_uid (int, optional): uid que Odoo ha rechazado; si sigue
+                siendo el actual se autentica de nuevo. Si varias llamadas
+                fallan a la vez, solo la primera llama a Odoo.
+        """
+        if self._auth_lock is None:
+            self._auth_lock = asyncio.Lock()
+        async with self._auth_lock:
+            if self.uid is not None and self.uid == stale_uid:
+                logging.warning(f"Odoo rechazó el uid {stale_uid}, autenticando de nuevo")
+                self.uid = None
+            if self.uid is None:
+                logging.info("Iniciando conexión con Odoo")
+                uid = await self.transport.request("common", "authenticate",
+                                                   (self.db, self.username, self.password, {}))
+                self.uid = self._check_uid(uid)
+                logging.info("Conexión establecida correctamente con Odoo")
+        return self.uid
+
+    async def _execute(self, model: str, method: str, args: list, kwargs: dict = None):
+        """
+        Ejecuta un método de un modelo de Odoo a través de execute_kw.
+        """
+        uid = self.uid if self.uid is not None else await self.authenticate()
+        params = [self.db, uid, self.password, model, method, args]
+        if kwargs:
+            params.append(kwargs)
+        with metrics.registry.track("odoo_rpc", model=model, method=method) as tracker:
+            try:
+                return await self.transport.request("object", "execute_kw", tuple(params), tracker)
+            except xmlrpc.client.Fault as e:
+                # Como en OdooXMLRPC._authenticated_call: uid obsoleto, se
+                # autentica de nuevo y se reintenta una vez si el uid cambia
+                if not is_access_denied(e.faultString):
+                    raise
+                params[1] = await self.authenticate(stale_uid=uid)
+                if params[1] == uid:
+                    raise
+                return await self.transport.request("object", "execute_kw", tuple(params), tracker)
+
+    async def create(self, model: str, values: dict) -> int:
+        """
+        Crea un nuevo registro en el modelo especificado en Odoo.
+        """
+        logging.info(f"Creando registro en {model}")
+        result = await self._execute(model, "create", [values])
+        logging.info(f"Registro creado con ID {result}")
+        return result
+
+    async def search(self, model: str, domain: list, limit: int = 20, offset: int = 0, order: str = None) -> list:
+        """
+        Realiza una búsqueda de registros en Odoo según el dominio especificado.
+        """
+        logging.info(f"Buscando en {model} con dominio {domain} y límite {limit}")
+        return await self._execute(model, "search", [domain], search_kwargs(limit, offset, order))
+
+    async def search_read(self, model: str, domain: list, fields: list, limit: int = 10, offset: int = 0,
+                          order: str = None) -> list:
+        """
+        Realiza una búsqueda de registros en Odoo y devuelve los campos especificados.
+        """
+        logging.info(f"Buscando y leyendo en {model} campos y límite {limit}")
+        return await self._execute(model, "search_read", [domain, fields], search_kwargs(limit, offset, order))
+
+    async def write(self, model: str, ids: list, values: dict) -> bool:
+        """
+        Actualiza los registros existentes en Odoo con los valores proporcionados.
+        """
+        logging.info(f"Actualizando {model} registros")
+        result = await self._execute(model, "write", [ids, values])
+        logging.info(f"Actualización exitosa: {result}")
+        return result
+
+    async def delete(self, model: str, ids: list) -> bool:
+        """
+        Elimina los registros especificados en Odoo.
+        """
+        logging.info(f"Eliminando registros en {model} con IDs {ids}")
+        result = await self._execute(model, "unlink", [ids])
+        logging.info(f"Eliminación exitosa: {result}")
+        return result
+
+    async def search_count(self, model: str, domain: list) -> int:
+        """
+        Cuenta el número de registros que coinciden con el dominio especificado.
+        """
+        logging.info(f"Contando registros en {model} con dominio {domain}")
+        result = await self._execute(model, "search_count", [domain])
+        logging.info(f"Registros encontrados: {result}")
+        return result
+
+    def close(self):
+        """
+        Cierra las conexiones abiertas con Odoo.
+        """
+        self.transport.close()
@@ -0,0 +1,1706 @@
+# -*- coding: utf-8
+"""
+Benchmarks de rendimiento para connection.py y document.py.
+
+Las pruebas de conexión se ejecutan contra un servidor XML-RPC local que imita
+los endpoints /xmlrpc/2/common y /xmlrpc/2/object de Odoo, con una latencia
+artificial por petición para simular la red.
+
+Uso:
+    python benchmark.py batch
+    python benchmark.py pool
+    python benchmark.py async
+    python benchmark.py iter
+    python benchmark.py cache
+    python benchmark.py pages
+    python benchmark.py analysis
+    python benchmark.py blank
+    python benchmark.py stats
+    python benchmark.py report
+    python benchmark.py ocr
+    python benchmark.py pipeline
+    python benchmark.py select
+    python benchmark.py optimize
+    python benchmark.py base64
+    python benchmark.py startup
+    python benchmark.py dedup
+    python benchmark.py metrics
+    python benchmark.py aggregate
+    python benchmark.py sync
+    python benchmark.py retry
+    python benchmark.py shared
+    python benchmark.py wire
+"""
+import base64
+import collections
+import gzip
+import hashlib
+import io
+import json
+import multiprocessing
+import os
+import random
+import shutil
+import socket
+import sys
+import tempfile
+import threading
+import time
+from datetime import datetime, timedelta
+from socketserver import ThreadingMixIn
+import xmlrpc.client
+from xmlrpc.server import SimpleXMLRPCServer, SimpleXMLRPCRequestHandler
+
+
+class FakeOdoo:
+    """
+    Implementación mínima en memoria de los métodos de Odoo usados por OdooXMLRPC.
+    """
+
+    def __init__(self):
+        self.records = {}
+        self.next_id = 1
+        self.lock = threading.Lock()
+        # Reloj simulado de write_date: cada create o write es una transacción y
+        # lo avanza 0,3 s, así que varias transacciones caen en el mismo segundo
+        self.clock = 0.0
+        # uid válido; cambiarlo simula un usuario recreado o una base restaurada
+        self.uid = 2
+        self.authentications = 0
+        # Llamadas recibidas por (modelo, método)
+        self.calls = collections.Counter()
+
+    def authenticate(self, db, login, password, user_agent_env):
+        with self.lock:
+            self.authentications += 1
+        return self.uid
+
+    def version(self):
+        return {"server_version": "fake"}
+
+    def execute_kw(self, db, uid, password, model, method, args, kwargs=None):
+        kwargs = kwargs or {}
+        if uid != self.uid:
+            raise PermissionError("Access Denied")
+        handler = getattr(self, f"_rpc_{method}", None)
+        if handler is None:
+            raise ValueError(f"Método {method} no soportado en {model}")
+        with self.lock:
+            self.calls[model, method] += 1
+            if method in ("create", "write"):
+                self.clock += 0.3
+            return handler(self.records.setdefault(model, {}), *args, **kwargs)
+
+    def _write_date(self):
+        # Como now() en PostgreSQL: con microsegundos, iguales en toda la transacción
+        return (datetime(2024, 1, 1, 0, 0, 0, 123456) + timedelta(seconds=self.clock)).strftime("%Y-%m-%d %H:%M:%S.%f")
+
+    # Métodos del ORM
+
+    def _rpc_create(self, table, values, context=None):
+        if isinstance(values, list):
+            return [self._rpc_create(table, vals) for vals in values]
+        record_id = self.next_id
+        self.next_id += 1
+        table[record_id] = dict(values, id=record_id, write_date=self._write_date())
+        if values.get("datas"):
+            # Como ir.attachment: SHA-1 del contenido binario
+            table[record_id]["checksum"] = hashlib.sha1(base64.b64decode(values["datas"])).hexdigest()
+        return record_id
+
+    def _rpc_write(self, table, ids, values, context=None):
+        for record_id in ids:
+            table[record_id].update(values, write_date=self._write_date())
+        return True
+
+    def _rpc_unlink(self, table, ids, context=None):
+        for record_id in ids:
+            table.pop(record_id, None)
+        return True
+
+    def _rpc_search(self, table, domain, offset=0, limit=None, order=None, context=None):
+        return [record["id"] for record in self._select(table, domain, offset, limit, order)]
+
+    def _rpc_search_read(self, table, domain=None, fields=None, offset=0, limit=None, order=None, context=None):
+        records = self._select(table, domain or [], offset, limit, order)
+        return [self._project(record, fields) for record in records]
+
+    def _rpc_read(self, table, ids, fields=None, context=None):
+        return [self._project(table[record_id], fields) for record_id in ids if record_id in table]
+
+    def _rpc_search_count(self, table, domain, context=None):
+        return len(self._select(table, domain))
+
+    def _rpc_read_group(self, table, domain, fields, groupby, offset=0, limit=None, orderby=False, lazy=True,
+                        context=None):
+        # Solo agrupación por campos simples y agregados sum/min/max/avg/count
+        groupby = [groupby] if isinstance(groupby, str) else list(groupby)
+        if lazy:
+            groupby = groupby[:1]
+        groups = {}
+        for record in self._select(table, domain):
+            groups.setdefault(tuple(record.get(field, False) for field in groupby), []).append(record)
+
+        result = []
+        for key, records in sorted(groups.items(), key=lambda item: [str(value) for value in item[0]]):
+            group = dict(zip(groupby, key))
+            group["__count" if not lazy or not groupby else f"{groupby[0]}_count"] = len(records)
+            for spec in fields:
+                name, _, function = spec.partition(":")
+                function, _, field = function.partition("(")
+                field = field.rstrip(")") or name
+                values = [record.get(field) or 0 for record in records]
+                group[name] = {"sum": sum, "min": min, "max": max, "count": len,
+                               "avg": lambda v: sum(v) / len(v)}[function or "sum"](values)
+            group["__domain"] = domain + [(field, "=", value) for field, value in zip(groupby, key)]
+            result.append(group)
+        result = result[offset or 0:]
+        return result[:limit] if limit else result
+
+    def _rpc_fields_get(self, table, allfields=None, attributes=None, context=None):
+        # Tipo según el primer valor guardado; los enteros *_id son many2one
+        samples = {}
+        for record in table.values():
+            for name, value in record.items():
+                if value is not False and value is not None:
+                    samples.setdefault(name, value)
+        types = {}
+        for name, value in samples.items():
+            if isinstance(value, bool):
+                types[name] = "boolean"
+            elif isinstance(value, int):
+                types[name] = "many2one" if name.endswith("_id") else "integer"
+            elif isinstance(value, float):
+                types[name] = "float"
+            else:
+                types[name] = "char"
+        return {name: {"string": name, "type": field_type} for name, field_type in sorted(types.items())}
+
+    @staticmethod
+    def _project(record, fields):
+        # XML-RPC devuelve las fechas y horas sin microsegundos
+        record = dict(record, write_date=record["write_date"][:19]) if "write_date" in record else record
+        if not fields:
+            return dict(record)
+        return {field: record.get(field, False) for field in ["id"] + list(fields)}
+
+    def _select(self, table, domain, offset=0, limit=None, order=None):
+        records = [record for record in table.values() if self._match(record, domain)]
+        for part in reversed([part.strip() for part in (order or "id").split(",")]):
+            field, _, direction = part.partition(" ")
+            records.sort(key=lambda record: (record.get(field) is None, record.get(field)),
+                         reverse=direction.lower() == "desc")
+        records = records[offset or 0:]
+        return records[:limit] if limit else records
+
+    def _match(self, record, domain):
+        stack = []
+        for term in reversed(domain):
+            if term == "!":
+                stack.append(not stack.pop())
+            elif term in ("&", "|"):
+                first, second = stack.pop(), stack.pop()
+                stack.append(first and second if term == "&" else first or second)
+            else:
+                stack.append(self._match_term(record, term))
+        return all(stack)
+
+    @staticmethod
+    def _match_term(record, term):
+        field, operator, value = term
+        current = record.get(field, False)
+        if field == "write_date" and current:
+            # Comparación como timestamp: "... 10:00:05.300000" no es igual a "... 10:00:05"
+            current, value = datetime.fromisoformat(current), datetime.fromisoformat(value)
+        if operator == "=":
+            return current == value
+        if operator == "!=":
+            return current != value
+        if operator == "in":
+            return current in value
+        if operator == "not in":
+            return current not in value
+        if operator == "ilike":
+            return str(value).lower() in str(current).lower()
+        if current is False or current is None:
+            return False
+        return {">": current > value, ">=": current >= value,
+                "<": current < value, "<=": current <= value}[operator]
+
+
+class FakeOdooRequestHandler(SimpleXMLRPCRequestHandler):
+    rpc_paths = ("/xmlrpc/2/common", "/xmlrpc/2/object")
+    protocol_version = "HTTP/1.1"
+
+    def setup(self):
+        super().setup()
+        with self.server.counters.get_lock():
+            self.server.counters[0] += 1
+
+    def do_POST(self):
+        with self.server.counters.get_lock():
+            self.server.counters[1] += 1
+        fault = self.server.pick_fault()
+        if fault in ("unavailable", "throttled", "reset", "conflict"):
+            # Fallos antes de procesar la petición
+            self.rfile.read(int(self.headers.get("content-length", 0)))
+            if fault == "reset":
+                self.close_connection = True
+                self.connection.shutdown(socket.SHUT_RDWR)
+            elif fault == "conflict":
+                self._send_body(200, xmlrpc.client.dumps(xmlrpc.client.Fault(
+                    1, "could not serialize access due to concurrent update"), methodresponse=True).encode())
+            else:
+                self._send_body(503 if fault == "unavailable" else 429, b"")
+            return
+        if self.server.latency:
+            time.sleep(self.server.latency)
+        if fault != "timeout":
+            self._handle_post()
+            return
+
+        # La petición se procesa pero la respuesta llega después del timeout del cliente
+        wfile, self.wfile = self.wfile, io.BytesIO()
+        self._handle_post()
+        time.sleep(self.server.fault_delay)
+        try:
+            wfile.write(self.wfile.getvalue())
+        except OSError:
+            self.close_connection = True
+        self.wfile = wfile
+
+    def _handle_post(self):
+        if self.path == "/jsonrpc":
+            self._handle_jsonrpc()
+        else:
+            super().do_POST()
+
+    def _handle_jsonrpc(self):
+        # Endpoint /jsonrpc de Odoo, con gzip en la petición y la respuesta como en XML-RPC
+        body = self.rfile.read(int(self.headers.get("content-length", 0)))
+        if self.headers.get("content-encoding", "") == "gzip":
+            body = gzip.decompress(body)
+        request = json.loads(body)
+        params = request["params"]
+        try:
+            if params["service"] == "common":
+                result = getattr(self.server.odoo, params["method"])(*params["args"])
+            else:
+                result = self.server.odoo.execute_kw(*params["args"])
+            response = {"jsonrpc": "2.0", "id": request.get("id"), "result": result}
+        except Exception as e:
+            response = {"jsonrpc": "2.0", "id": request.get("id"),
+                        "error": {"code": 200, "message": "Odoo Server Error",
+                                  "data": {"name": f"{type(e).__module__}.{type(e).__name__}", "message": str(e)}}}
+        data = json.dumps(response).encode("utf-8")
+        encoding = None
+        if len(data) > self.encode_threshold and "gzip" in self.headers.get("accept-encoding", ""):
+            data, encoding = gzip.compress(data), "gzip"
+        self._send_body(200, data, "application/json", encoding)
+
+    def _send_body(self, status: int, body: bytes, content_type: str = "text/xml", content_encoding: str = None):
+        self.send_response(status)
+        self.send_header("Content-Type", content_type)
+        if content_encoding:
+            self.send_header("Content-Encoding", content_encoding)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+class FakeOdooServer(ThreadingMixIn, SimpleXMLRPCServer):
+    """
+    Servidor XML-RPC local que imita a Odoo, ejecutado en un hilo en segundo plano.
+
+    Args:
+        latency (float): Segundos de espera añadidos a cada petición HTTP.
+        multicall (bool): Si el servidor acepta system.multicall.
+        process (bool): Si el servidor se ejecuta en un proceso aparte, para que
+            no compita por el GIL con clientes muy concurrentes. En ese caso los
+            registros de `odoo` no son visibles desde el proceso principal.
+        faults (dict, optional): Probabilidad de cada fallo inyectado por petición:
+            "unavailable" (HTTP 503), "throttled" (HTTP 429), "reset" (conexión
+            cortada) y "conflict" (Fault de concurrencia) antes de procesarla, y
+            "timeout" (se procesa pero se responde tras `fault_delay` segundos).
+        fault_delay (float): Retraso de la respuesta en los fallos "timeout".
+        rate_limit (float): Peticiones por segundo a partir de las cuales se
+            responde HTTP 429 (0 = sin límite).
+        seed (int): Semilla de la inyección de fallos.
+    """
+
+    daemon_threads = True
+    request_queue_size = 128
+
+    def __init__(self, latency: float = 0.0, multicall: bool = True, process: bool = False, faults: dict = None,
+                 fault_delay: float = 1.0, rate_limit: float = 0.0, seed: int = 0):
+        super().__init__(("127.0.0.1", 0), requestHandler=FakeOdooRequestHandler,
+                         allow_none=True, logRequests=False)
+        self.latency = latency
+        self.faults = faults or {}
+        self.fault_delay = fault_delay
+        self.rate_limit = rate_limit
+        self.random = random.Random(seed)
+        self._recent = collections.deque()
+        self._fault_lock = threading.Lock()
+        self.counters = multiprocessing.Array("l", 2)
+        self.odoo = FakeOdoo()
+        self.register_instance(self.odoo)
+        if multicall:
+            self.register_multicall_functions()
+        if process:
+            self._runner = multiprocessing.get_context("fork").Process(target=self.serve_forever, daemon=True)
+        else:
+            self._runner = threading.Thread(target=self.serve_forever, daemon=True)
+
+    @property
+    def connections(self) -> int:
+        return self.counters[0]
+
+    @property
+    def requests(self) -> int:
+        return self.counters[1]
+
+    @property
+    def url(self) -> str:
+        return f"http://127.0.0.1:{self.server_address[1]}"
+
+    def __enter__(self):
+        self._runner.start()
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        if isinstance(self._runner, threading.Thread):
+            self.shutdown()
+        else:
+            self._runner.terminate()
+            self._runner.join()
+        self.server_close()
+
+    def reset_counters(self):
+        self.counters[0] = self.counters[1] = 0
+
+    def pick_fault(self):
+        """
+        Fallo a inyectar en la petición actual, o None.
+        """
+        with self._fault_lock:
+            if self.rate_limit:
+                now = time.monotonic()
+                while self._recent and self._recent[0] < now - 1.0:
+                    self._recent.popleft()
+                if len(self._recent) >= self.rate_limit:
+                    return "throttled"
+                self._recent.append(now)
+            value = self.random.random()
+            for fault, probability in self.faults.items():
+                if value < probability:
+                    return fault
+                value -= probability
+        return None
+
+    def config_file(self, directory: str, **options) -> str:
+        """
+        Escribe un config.ini que apunta a este servidor y devuelve su ruta.
+        """
+        path = os.path.join(directory, "config.ini")
+        lines = ["[odoo]", f"url = {self.url}", "db = bench", "username = admin", "password = admin",
+                 f"log_file = {os.path.join(directory, 'odoo_xmlrpc.log')}"]
+        lines += [f"{key} = {value}" for key, value in options.items()]
+        with open(path, "w", encoding="utf-8") as file:
+            file.write("\n".join(lines) + "\n")
+        return path
+
+
+def make_sample_pdf(path: str, pages: int = 100, blank_every: int = 7) -> str:
+    """
+    Genera un PDF sintético con páginas de texto y dibujos, y una página en
+    blanco cada `blank_every` páginas.
+    """
+    import fitz
+
+    doc = fitz.open()
+    for page_num in range(pages):
+        page = doc.new_page(width=595, height=842)
+        if blank_every and page_num % blank_every == blank_every - 1:
+            continue
+        text = "\n".join(f"Línea {line} de la página {page_num + 1}: texto de relleno del documento"
+                         for line in range(40))
+        page.insert_textbox(fitz.Rect(50, 50, 545, 700), text, fontsize=9)
+        page.draw_rect(fitz.Rect(50, 720, 545, 800), color=(0, 0, 0), fill=(0.8, 0.8, 0.8))
+    doc.save(path)
+    doc.close()
+    return path
+
+
+def make_mixed_pdf(path: str, pages: int = 40, scanned_every: int = 4, dpi: int = 150) -> str:
+    """
+    Genera un PDF con páginas digitales (con capa de texto) y, cada
+    `scanned_every` páginas, una página escaneada: la misma página
+    rasterizada a `dpi` en escala de grises, sin texto.
+    """
+    import fitz
+
+    source = fitz.open(make_sample_pdf(path + ".src.pdf", pages, blank_every=0))
+    doc = fitz.open()
+    for page_num in range(pages):
+        if page_num % scanned_every == scanned_every - 1:
+            pix = source.load_page(page_num).get_pixmap(dpi=dpi, colorspace=fitz.csGRAY)
+            page = doc.new_page(width=595, height=842)
+            page.insert_image(page.rect, pixmap=pix)
+        else:
+            doc.insert_pdf(source, from_page=page_num, to_page=page_num)
+    source.close()
+    os.remove(path + ".src.pdf")
+    doc.save(path, garbage=3, deflate=True)
+    doc.close()
+    return path
+
+
+def make_labeled_corpus(path: str, seed: int = 7) -> tuple:
+    """
+    Genera un PDF con páginas de distinta dificultad para el detector de
+    páginas en blanco: vacías, con texto, con poco texto, con manchas dispersas
+    cerca del umbral del 2.7%, con fondos de color claro y con recuadros
+    claros de color.
+
+    Las etiquetas salen de cómo se construye cada página, con los criterios de
+    is_blank_stats (un píxel es blanco si todos sus canales llegan a 240): las
+    manchas están alineadas con los píxeles a 72 dpi y no se solapan, así que
+    cubren exactamente el porcentaje indicado.
+
+    Returns:
+        tuple: (ruta del PDF, lista con True para cada página en blanco)
+    """
+    import random
+    import fitz
+
+    rng = random.Random(seed)
+    doc = fitz.open()
+    labels = []
+    for kind in range(12):
+        # Páginas vacías y con texto completo
+        doc.new_page(width=595, height=842)
+        labels.append(True)
+        page = doc.new_page(width=595, height=842)
+        # insert_textbox no escribe nada si el texto no cabe en el recuadro
+        assert page.insert_textbox(fitz.Rect(50, 50, 545, 800), "Texto de prueba " * 200, fontsize=10) >= 0
+        labels.append(False)
+        # Una sola línea de texto
+        page = doc.new_page(width=595, height=842)
+        page.insert_text((60, 80 + kind * 50), "Página intencionalmente en blanco", fontsize=8)
+        labels.append(True)
+    cell = 14
+    cells = [(x, y) for x in range(0, 595 - cell, cell) for y in range(0, 842 - cell, cell)]
+    for coverage in (0.5, 1.0, 1.5, 2.0, 2.4, 2.6, 2.8, 3.0, 3.5, 5.0, 10.0):
+        # Manchas oscuras dispersas, una por celda, que cubren `coverage` % de la página
+        for repeat in range(3):
+            page = doc.new_page(width=595, height=842)
+            target = 595 * 842 * coverage / 100
+            covered = 0
+            for x, y in rng.sample(cells, len(cells)):
+                if covered >= target:
+                    break
+                w, h = rng.randint(2, 12), rng.randint(2, 12)
+                x, y = x + rng.randint(0, cell - w), y + rng.randint(0, cell - h)
+                page.draw_rect(fitz.Rect(x, y, x + w, y + h), color=None, fill=(0.1, 0.1, 0.1))
+                covered += w * h
+            labels.append(covered / (595 * 842) * 100 < 2.7)
+    for color in ((0.98, 0.98, 0.78), (0.9, 0.9, 0.9), (0.97, 0.97, 0.97), (1.0, 0.92, 0.92), (0.99, 0.99, 0.95)):
+        # Fondos de color claro que el análisis RGB y el de grises pueden ver distinto
+        page = doc.new_page(width=595, height=842)
+        page.draw_rect(page.rect, color=None, fill=color)
+        labels.append(min(color) * 255 >= 240)
+    for color in ((0.99, 0.96, 0.8), (0.85, 0.95, 1.0), (1.0, 0.97, 0.9)):
+        # Recuadros claros que ocupan un tercio de la página, como un formulario
+        # sombreado: con contenido aunque su luminancia supere el umbral
+        page = doc.new_page(width=595, height=842)
+        page.draw_rect(fitz.Rect(60, 100, 535, 380), color=None, fill=color)
+        labels.append(min(color) * 255 >= 240)
+    doc.save(path)
+    doc.close()
+    return path, labels
+
+
+def document_config(directory: str, **options) -> str:
+    """
+    Escribe un config.ini para DocumentConverter en `directory` y devuelve su ruta.
+    """
+    path = os.path.join(directory, "document.ini")
+    lines = ["[document]", f"log_file = {os.path.join(directory, 'document_converter.log')}"]
+    lines += [f"{key} = {value}" for key, value in options.items()]
+    lines += ["[paths]", f"reports_dir = {os.path.join(directory, 'reports')}"]
+    with open(path, "w", encoding="utf-8") as file:
+        file.write("\n".join(lines) + "\n")
+    return path
+
+
+def _quiet_logging():
+    import logging
+    logging.getLogger().setLevel(logging.WARNING)
+
+
+def _report(title: str, rows: list):
+    print(f"\n{title}")
+    for label, value in rows:
+        print(f"  {label:<40} {value}")
+
+
+def bench_batch(calls: int = 2000, latency: float = 0.002, flush_size: int = 200):
+    """
+    Compara llamadas create individuales con el mismo número de llamadas en
+    lotes, contra un servidor con system.multicall y contra uno sin él, como
+    Odoo de serie, donde OdooBatch envía las llamadas una a una. Como
+    referencia se incluye create_many, que no depende de multicall.
+    """
+    import connection
+
+    for multicall in (True, False):
+        with FakeOdooServer(latency=latency, multicall=multicall) as server, tempfile.TemporaryDirectory() as tmp:
+            odoo = connection.OdooXMLRPC(server.config_file(tmp))
+            _quiet_logging()
+
+            server.reset_counters()
+            start = time.perf_counter()
+            for i in range(calls):
+                odoo.create("res.partner", {"name": f"Cliente {i}"})
+            single_time = time.perf_counter() - start
+            single_requests = server.requests
+
+            server.reset_counters()
+            start = time.perf_counter()
+            with odoo.batch(flush_size) as batch:
+                results = [batch.create("res.partner", {"name": f"Cliente {i}"}) for i in range(calls)]
+            batch_time = time.perf_counter() - start
+            batch_requests = server.requests
+            assert all(isinstance(call.result, int) for call in results)
+
+            server.reset_counters()
+            start = time.perf_counter()
+            odoo.create_many("res.partner", [{"name": f"Cliente {i}"} for i in range(calls)])
+            many_time = time.perf_counter() - start
+
+            _report(f"create x{calls}, servidor {'con' if multicall else 'sin'} system.multicall "
+                    f"(latencia simulada {latency * 1000:.1f} ms)", [
+                ("llamadas individuales", f"{calls / single_time:,.0f} llamadas/s ({single_requests} peticiones)"),
+                (f"lotes de {flush_size}", f"{calls / batch_time:,.0f} llamadas/s ({batch_requests} peticiones), "
+                                           f"x{single_time / batch_time:.1f}"),
+                ("create_many", f"{calls / many_time:,.0f} registros/s ({server.requests} peticiones), "
+                                f"x{single_time / many_time:.1f}"),
+            ])
+
+
+def bench_pool(calls: int = 2000, threads: int = 8, latency: float = 0.001):
+    """
+    Mide conexiones TCP abiertas por llamada con el transporte por defecto de
+    xmlrpc.client y con PooledTransport, en un hilo y en varios hilos.
+    """
+    import xmlrpc.client
+    from concurrent.futures import ThreadPoolExecutor
+    import connection
+
+    def run(call, workers):
+        start = time.perf_counter()
+        with ThreadPoolExecutor(workers) as executor:
+            list(executor.map(lambda i: call(), range(calls)))
+        return time.perf_counter() - start
+
+    with FakeOdooServer(latency=latency) as server, tempfile.TemporaryDirectory() as tmp:
+        odoo = connection.OdooXMLRPC(server.config_file(tmp, pool_size=threads))
+        _quiet_logging()
+        rows = []
+
+        def search():
+            return odoo.search("res.partner", [])
+
+        def search_new_proxy():
+            # Sin un transporte seguro entre hilos, cada llamada necesita su propio proxy
+            proxy = xmlrpc.client.ServerProxy(f"{server.url}/xmlrpc/2/object")
+            return proxy.execute_kw("bench", 2, "admin", "res.partner", "search", [[]])
+
+        legacy = xmlrpc.client.ServerProxy(f"{server.url}/xmlrpc/2/object")
+        scenarios = [
+            ("ServerProxy por defecto, 1 hilo",
+             lambda: legacy.execute_kw("bench", 2, "admin", "res.partner", "search", [[]]), 1),
+            (f"ServerProxy por llamada, {threads} hilos", search_new_proxy, threads),
+            ("PooledTransport, 1 hilo", search, 1),
+            (f"PooledTransport, {threads} hilos", search, threads),
+        ]
+        for label, call, workers in scenarios:
+            odoo.transport.close()
+            server.reset_counters()
+            elapsed = run(call, workers)
+            rows.append((label, f"{server.connections / calls:.3f} conexiones/llamada, "
+                                f"{calls / elapsed:,.0f} llamadas/s"))
+
+        _report(f"search x{calls} (latencia simulada {latency * 1000:.1f} ms)", rows)
+
+
+def bench_async(calls: int = 1000, latency: float = 0.005, concurrency: int = 50):
+    """
+    Compara llamadas secuenciales de OdooXMLRPC con AsyncOdooClient y varias
+    llamadas en curso a la vez, por XML-RPC y JSON-RPC, y comprueba que las
+    llamadas con el uid invalidado se reautentican una sola vez.
+    """
+    import asyncio
+    import async_connection
+    import connection
+
+    with FakeOdooServer(latency=latency, process=True) as server, tempfile.TemporaryDirectory() as tmp:
+        config_path = server.config_file(tmp, async_concurrency=concurrency)
+        odoo = connection.OdooXMLRPC(config_path)
+        _quiet_logging()
+
+        start = time.perf_counter()
+        for i in range(calls):
+            odoo.search_count("res.partner", [])
+        sync_time = time.perf_counter() - start
+
+        async def run(config_path):
+            async with async_connection.AsyncOdooClient(config_path) as client:
+                _quiet_logging()
+                start = time.perf_counter()
+                await asyncio.gather(*(client.search_count("res.partner", []) for i in range(calls)))
+                return time.perf_counter() - start, client.transport.connections_opened
+
+        rows = [("OdooXMLRPC secuencial", f"{calls / sync_time:,.0f} llamadas/s")]
+        for label, protocol in (("XML-RPC", "xmlrpc"), ("JSON-RPC", "jsonrpc")):
+            async_time, connections = asyncio.run(run(server.config_file(tmp, async_concurrency=concurrency,
+                                                                         protocol=protocol)))
+            rows.append((f"AsyncOdooClient {label}, {concurrency} en curso",
+                         f"{calls / async_time:,.0f} llamadas/s ({connections} conexiones)"))
+        _report(f"search_count x{calls} (latencia simulada {latency * 1000:.1f} ms)", rows)
+
+    # Con el uid invalidado, las llamadas en curso se reautentican una sola vez
+    with FakeOdooServer() as server, tempfile.TemporaryDirectory() as tmp:
+        async def invalidated():
+            async with async_connection.AsyncOdooClient(server.config_file(tmp)) as client:
+                _quiet_logging()
+                server.odoo.uid += 1
+                await asyncio.gather(*(client.search_count("res.partner", []) for i in range(50)))
+                return client.uid
+
+        assert asyncio.run(invalidated()) == server.odoo.uid
+        assert server.odoo.authentications == 2
+
+
+def bench_iter(records: int = 20000, page_size: int = 1000):
+    """
+    Compara la memoria máxima de un search_read completo con la de
+    iter_search_read recorriendo los mismos registros.
+    """
+    import tracemalloc
+    import connection
+
+    with FakeOdooServer(process=True) as server, tempfile.TemporaryDirectory() as tmp:
+        odoo = connection.OdooXMLRPC(server.config_file(tmp))
+        _quiet_logging()
+        odoo.create_many("res.partner", [{"name": f"Cliente {i}", "ref": f"C{i:06d}"} for i in range(records)])
+        rows = []
+        scenarios = [
+            ("search_read sin límite", lambda: len(odoo.search_read("res.partner", [], ["name", "ref"], limit=None))),
+            (f"iter_search_read, páginas de {page_size}",
+             lambda: sum(1 for r in odoo.iter_search_read("res.partner", [], ["name", "ref"], page_size))),
+            ("iter_search_read con prefetch",
+             lambda: sum(1 for r in odoo.iter_search_read("res.partner", [], ["name", "ref"], page_size,
+                                                          prefetch=True))),
+        ]
+        for label, run in scenarios:
+            tracemalloc.start()
+            start = time.perf_counter()
+            count = run()
+            elapsed = time.perf_counter() - start
+            peak = tracemalloc.get_traced_memory()[1]
+            tracemalloc.stop()
+            rows.append((label, f"{count} registros, {elapsed:.2f} s, pico {peak / 1024 / 1024:.1f} MB"))
+        _report(f"Exportación de {records} registros", rows)
+
+
+def bench_cache(rows: int = 1000, countries: int = 20, latency: float = 0.002):
+    """
+    Simula una carga que resuelve el país de cada registro con search antes de
+    crearlo, con y sin la caché de búsquedas.
+    """
+    import connection
+
+    with FakeOdooServer(latency=latency) as server, tempfile.TemporaryDirectory() as tmp:
+        results = []
+        for enabled in (False, True):
+            config_path = server.config_file(tmp)
+            with open(config_path, "a", encoding="utf-8") as file:
+                file.write(f"[cache]\nenabled = {str(enabled).lower()}\nmodels = res.country\n")
+            odoo = connection.OdooXMLRPC(config_path)
+            _quiet_logging()
+            odoo.create_many("res.country", [{"code": f"C{i}"} for i in range(countries)])
+
+            server.reset_counters()
+            start = time.perf_counter()
+            for i in range(rows):
+                country_id = odoo.search("res.country", [("code", "=", f"C{i % countries}")], limit=1)[0]
+                odoo.fields_get("res.partner", ["type"])
+                odoo.create("res.partner", {"name": f"Cliente {i}", "country_id": country_id})
+            elapsed = time.perf_counter() - start
+            label = "con caché" if enabled else "sin caché"
+            results.append((label, f"{rows / elapsed:,.0f} registros/s, {server.requests} peticiones"))
+            if enabled:
+                results.append(("contadores", odoo.cache_stats()))
+                # Un recorrido completo no debe quedarse en la caché
+                exported = sum(1 for _ in odoo.iter_search_read("res.partner", [], ["name"], page_size=100))
+                results.append((f"tras recorrer {exported} clientes", f"{len(odoo.cache._entries)} entradas en caché"))
+        _report(f"{rows} altas resolviendo país (latencia simulada {latency * 1000:.1f} ms)", results)
+
+
+def bench_pages(pages: int = 300, workers: int = None):
+    """
+    Compara el análisis de páginas en serie con el reparto por procesos de
+    DocumentConverter.collect_page_stats.
+    """
+    import document
+
+    workers = workers or max(2, os.cpu_count() or 1)
+    with tempfile.TemporaryDirectory() as tmp:
+        pdf_path = make_sample_pdf(os.path.join(tmp, "muestra.pdf"), pages)
+        rows = []
+        reference = None
+        for label, count in (("en serie", 1), (f"{workers} procesos", workers)):
+            converter = document.DocumentConverter(document_config(tmp, workers=count, parallel_min_pages=1))
+            _quiet_logging()
+            start = time.perf_counter()
+            stats = converter.collect_page_stats(pdf_path)
+            elapsed = time.perf_counter() - start
+            reference = reference or stats
+            rows.append((label, f"{pages / elapsed:,.0f} páginas/s, mismo resultado: {stats == reference}"))
+        rows.append(("CPUs disponibles", os.cpu_count()))
+        _report(f"Análisis de {pages} páginas", rows)
+
+
+def bench_analysis(pages: int = 200):
+    """
+    Cuenta las rasterizaciones y el tiempo del flujo habitual (reporte,
+    estadísticas y eliminación de páginas en blanco) con y sin reutilizar el
+    análisis de páginas.
+    """
+    import fitz
+    import document
+
+    renders = [0]
+    get_pixmap = fitz.Page.get_pixmap
+
+    def counting_get_pixmap(page, *args, **kwargs):
+        renders[0] += 1
+        return get_pixmap(page, *args, **kwargs)
+
+    fitz.Page.get_pixmap = counting_get_pixmap
+    try:
+        with tempfile.TemporaryDirectory() as tmp:
+            pdf_path = make_sample_pdf(os.path.join(tmp, "muestra.pdf"), pages)
+            rows = []
+            for label, cache_size in (("sin reutilizar el análisis", 0), ("analizando una vez", 32)):
+                converter = document.DocumentConverter(document_config(tmp, analysis_cache_size=cache_size))
+                _quiet_logging()
+                renders[0] = 0
+                start = time.perf_counter()
+                converter.generate_page_report(pdf_path)
+                converter.get_pdf_statistics(pdf_path)
+                converter.process_pdf(pdf_path)
+                elapsed = time.perf_counter() - start
+                converter.close_csv_report()
+                rows.append((label, f"{renders[0]} rasterizaciones, {elapsed:.2f} s"))
+            _report(f"Reporte + estadísticas + process_pdf, {pages} páginas", rows)
+    finally:
+        fitz.Page.get_pixmap = get_pixmap
+
+
+def bench_blank(dpis: tuple = (72, 36, 24)):
+    """
+    Compara el detector rápido de páginas en blanco con el clasificador
+    completo: precisión frente a las etiquetas del corpus y coincidencia
+    con el clasificador completo.
+    """
+    import fitz
+    import document
+
+    with tempfile.TemporaryDirectory() as tmp:
+        pdf_path, labels = make_labeled_corpus(os.path.join(tmp, "corpus.pdf"))
+        doc = fitz.open(pdf_path)
+        pages = [doc.load_page(page_num) for page_num in range(len(doc))]
+
+        start = time.perf_counter()
+        reference = [document.is_blank_stats(document.compute_page_stats(page, precision=None)) for page in pages]
+        reference_time = time.perf_counter() - start
+        correct = sum(flag == label for flag, label in zip(reference, labels))
+        rows = [("clasificador completo (RGB, 72 dpi)",
+                 f"{len(pages) / reference_time:,.0f} páginas/s, acierta {correct / len(pages) * 100:.1f}% "
+                 f"({sum(labels)} en blanco de {len(pages)})")]
+
+        for grayscale in (False, True):
+            for dpi in dpis:
+                start = time.perf_counter()
+                flags = [document.fast_is_blank(page, dpi=dpi, grayscale=grayscale) for page in pages]
+                elapsed = time.perf_counter() - start
+                correct = sum(flag == label for flag, label in zip(flags, labels))
+                agree = sum(flag == expected for flag, expected in zip(flags, reference))
+                rows.append((f"rápido, {'grises' if grayscale else 'RGB'}, {dpi} dpi",
+                             f"{len(pages) / elapsed:,.0f} páginas/s, acierta {correct / len(pages) * 100:.1f}%, "
+                             f"coincide con el completo {agree / len(pages) * 100:.1f}%"))
+        doc.close()
+        _report(f"Detección de páginas en blanco, {len(pages)} páginas", rows)
+
+
+def bench_stats(pages: int = 300):
+    """
+    Compara las estadísticas página a página de compute_page_stats, guardadas
+    como lista de dicts, con page_range_stats_array exacto y aproximado.
+    """
+    import sys
+    import fitz
+    import document
+
+    with tempfile.TemporaryDirectory() as tmp:
+        pdf_path = make_sample_pdf(os.path.join(tmp, "muestra.pdf"), pages)
+        # Se añaden las páginas difíciles del corpus etiquetado
+        corpus = fitz.open(make_labeled_corpus(os.path.join(tmp, "corpus.pdf"))[0])
+        doc = fitz.open(pdf_path)
+        doc.insert_pdf(corpus)
+        corpus.close()
+        doc.saveIncr()
+        total_pages = len(doc)
+
+        start = time.perf_counter()
+        reference = []
+        for page_num in range(total_pages):
+            non_white_percent, content_area = document.compute_page_stats(doc.load_page(page_num), precision=None)
+            reference.append({"page_num": page_num + 1, "non_white_percent": non_white_percent,
+                              "content_area": content_area,
+                              "is_blank": document.is_blank_stats((non_white_percent, content_area))})
+        reference_time = time.perf_counter() - start
+        doc.close()
+        reference_bytes = sys.getsizeof(reference) + sum(
+            sys.getsizeof(row) + sum(sys.getsizeof(value) for value in row.values()) for row in reference)
+        labels = [row["is_blank"] for row in reference]
+        rows = [("compute_page_stats + dicts",
+                 f"{reference_time:.2f} s, {reference_bytes / 1024:.0f} KB de resultado")]
+
+        for label, options in (("array, exacto", {}),
+                               ("array, grises", {"grayscale": True}),
+                               ("array, grises, 1 de cada 2 píxeles", {"grayscale": True, "step": 2})):
+            start = time.perf_counter()
+            stats = document.page_range_stats_array(pdf_path, 0, total_pages, **options)
+            elapsed = time.perf_counter() - start
+            agree = sum(flag == expected for flag, expected in zip(stats["is_blank"].tolist(), labels))
+            rows.append((label, f"{elapsed:.2f} s ({reference_time / elapsed:.1f}x), {stats.nbytes / 1024:.0f} KB, "
+                                f"coincide {agree / total_pages * 100:.1f}%"))
+        _report(f"Estadísticas de {total_pages} páginas", rows)
+
+
+def bench_report(rows: int = 500000, threads: int = 4):
+    """
+    Compara la escritura del reporte de páginas fila a fila con csv.writer
+    (implementación anterior) con ReportSink en CSV y Parquet, escribiendo
+    desde varios hilos a la vez.
+    """
+    import csv
+    import pandas as pd
+    import document
+
+    def page_row(index):
+        return (f"/datos/doc_{index // 100}.pdf", f"doc_{index // 100}.pdf", index % 100 + 1,
+                round(index % 997 / 10, 2), round(index % 101 / 10, 2), "Content", "<2.7%/240")
+
+    def run_threads(write):
+        per_thread = rows // threads
+        workers = [threading.Thread(target=lambda offset=t * per_thread: [write(page_row(offset + index))
+                                                                          for index in range(per_thread)])
+                   for t in range(threads)]
+        for worker in workers:
+            worker.start()
+        for worker in workers:
+            worker.join()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        results = []
+
+        path = os.path.join(tmp, "anterior.csv")
+        start = time.perf_counter()
+        with open(path, "w", newline="", encoding="utf-8") as file:
+            writer = csv.writer(file)
+            writer.writerow(document.PAGE_REPORT_COLUMNS)
+            # csv.writer no es seguro entre hilos: la referencia escribe desde uno solo
+            for index in range(rows):
+                writer.writerow(page_row(index))
+        results.append(("csv.writer fila a fila (1 hilo)", path, time.perf_counter() - start))
+
+        for output_format in ("csv", "parquet"):
+            path = os.path.join(tmp, f"sink.{output_format}")
+            start = time.perf_counter()
+            with document.ReportSink(path, document.PAGE_REPORT_COLUMNS, output_format) as sink:
+                run_threads(sink.add)
+            results.append((f"ReportSink {output_format} ({threads} hilos)", path, time.perf_counter() - start))
+
+        report_rows = []
+        for label, path, elapsed in results:
+            frame = pd.read_parquet(path) if path.endswith("parquet") else pd.read_csv(path)
+            size = sum(os.path.getsize(os.path.join(path, name)) for name in os.listdir(path)) \
+                if os.path.isdir(path) else os.path.getsize(path)
+            report_rows.append((label, f"{elapsed:.2f} s, {len(frame)} filas, {size / 1024 / 1024:.1f} MB en disco"))
+        _report(f"Reporte de {rows} páginas", report_rows)
+
+
+def bench_ocr(pages: int = 40, scanned_every: int = 4):
+    """
+    Compara el OCR del documento completo con el OCR solo de las páginas
+    escaneadas sobre un PDF mixto: tiempo y tamaño del resultado.
+    """
+    import document
+
+    with tempfile.TemporaryDirectory() as tmp:
+        pdf_path = make_mixed_pdf(os.path.join(tmp, "mixto.pdf"), pages, scanned_every)
+        rows = [("PDF original", f"{os.path.getsize(pdf_path) / 1024:.0f} KB")]
+
+        converter = document.DocumentConverter(document_config(tmp))
+        _quiet_logging()
+        start = time.perf_counter()
+        text_flags = converter.collect_text_flags(pdf_path)
+        rows.append(("Detección de páginas con texto",
+                     f"{text_flags.count(False)} escaneadas de {len(text_flags)}, "
+                     f"{time.perf_counter() - start:.3f} s"))
+
+        for mode in ("full", "skip_text"):
+            converter = document.DocumentConverter(document_config(tmp, ocr_mode=mode))
+            _quiet_logging()
+            mode_path = os.path.join(tmp, f"{mode}.pdf")
+            shutil.copyfile(pdf_path, mode_path)
+            start = time.perf_counter()
+            try:
+                output = converter.apply_ocr_to_pdf(mode_path)
+            except Exception as e:
+                # ocrmypdf necesita tesseract y ghostscript instalados
+                rows.append((f"ocr_mode = {mode}", f"no se pudo ejecutar: {type(e).__name__}: {e}"))
+                continue
+            rows.append((f"ocr_mode = {mode}",
+                         f"{time.perf_counter() - start:.2f} s, {os.path.getsize(output) / 1024:.0f} KB"))
+        _report(f"OCR de un PDF de {pages} páginas con una escaneada cada {scanned_every}", rows)
+
+
+def bench_pipeline(pages: int = 200, runs: int = 3):
+    """
+    Compara la cadena de métodos de DocumentConverter, que escribe un archivo
+    por etapa, con DocumentPipeline en memoria: tiempo, archivos intermedios
+    y bytes escritos a disco.
+    """
+    import document
+
+    def chained(converter, pdf_path):
+        current_path = converter.remove_first_page(pdf_path)
+        current_path = converter.process_pdf(current_path)
+        return converter.pdf_to_base64(current_path)
+
+    def pipelined(converter, pdf_path):
+        pipeline = document.DocumentPipeline(converter).remove_first_page().check_size().remove_blanks().check_size()
+        with pipeline.run(pdf_path) as result:
+            return result.to_base64()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        rows = []
+        encoded = {}
+        for label, run in (("Métodos encadenados", chained), ("DocumentPipeline", pipelined)):
+            work_dir = os.path.join(tmp, label.split()[0])
+            os.makedirs(work_dir)
+            pdf_path = make_sample_pdf(os.path.join(work_dir, "muestra.pdf"), pages)
+            source_size = os.path.getsize(pdf_path)
+            elapsed = 0.0
+            for _ in range(runs):
+                # Converter nuevo en cada vuelta para no reutilizar análisis entre vueltas
+                converter = document.DocumentConverter(document_config(tmp))
+                _quiet_logging()
+                start = time.perf_counter()
+                encoded[label] = run(converter, pdf_path)
+                elapsed += time.perf_counter() - start
+            leftovers = [name for name in os.listdir(work_dir) if name != "muestra.pdf"]
+            written = sum(os.path.getsize(os.path.join(work_dir, name)) for name in leftovers)
+            rows.append((label, f"{elapsed / runs:.2f} s, {len(leftovers)} archivos intermedios, "
+                                f"{written / 1024:.0f} KB escritos (original {source_size / 1024:.0f} KB)"))
+        pages_out = [len(document.fitz.open("pdf", base64.b64decode(data))) for data in encoded.values()]
+        rows.append(("Páginas del resultado", " / ".join(str(count) for count in pages_out)))
+        _report(f"remove_first_page + process_pdf + Base64, {pages} páginas", rows)
+
+
+def _pypdf2_remove_first_page(pdf_path: str, output_path: str) -> str:
+    """
+    Implementación anterior de DocumentConverter.remove_first_page, como referencia.
+    """
+    import PyPDF2
+
+    with open(pdf_path, "rb") as file:
+        pdf_reader = PyPDF2.PdfReader(file)
+        pdf_writer = PyPDF2.PdfWriter()
+        for page_num in range(1, len(pdf_reader.pages)):
+            pdf_writer.add_page(pdf_reader.pages[page_num])
+        with open(output_path, "wb") as output_file:
+            pdf_writer.write(output_file)
+    return output_path
+
+
+def bench_select(sizes: tuple = (100, 500, 1000)):
+    """
+    Compara la eliminación de la primera página con PyPDF2 y con
+    select_pages (guardado completo e incremental) en PDFs con la mitad de
+    las páginas escaneadas.
+    """
+    import document
+
+    with tempfile.TemporaryDirectory() as tmp:
+        converter = document.DocumentConverter(document_config(tmp))
+        _quiet_logging()
+        for pages in sizes:
+            pdf_path = make_mixed_pdf(os.path.join(tmp, f"escaneo_{pages}.pdf"), pages, scanned_every=2, dpi=100)
+            scenarios = [
+                ("PyPDF2 (anterior)", lambda out: _pypdf2_remove_first_page(pdf_path, out)),
+                ("select_pages, garbage=1", lambda out: converter.select_pages(pdf_path, drop=[0], output_path=out)),
+                ("select_pages, garbage=3",
+                 lambda out: converter.select_pages(pdf_path, drop=[0], output_path=out, garbage=3)),
+                ("select_pages, incremental",
+                 lambda out: converter.select_pages(pdf_path, drop=[0], output_path=out, incremental=True)),
+            ]
+            rows = []
+            for index, (label, run) in enumerate(scenarios):
+                output_path = os.path.join(tmp, f"salida_{index}.pdf")
+                start = time.perf_counter()
+                run(output_path)
+                elapsed = time.perf_counter() - start
+                rows.append((label, f"{elapsed:.2f} s, {os.path.getsize(output_path) / 1024 / 1024:.1f} MB"))
+                os.remove(output_path)
+            _report(f"Quitar la primera página de {pages} páginas "
+                    f"({os.path.getsize(pdf_path) / 1024 / 1024:.1f} MB)", rows)
+            os.remove(pdf_path)
+
+
+def bench_optimize(pages: int = 30, dpi: int = 300):
+    """
+    Mide cada nivel de optimización de tamaño sobre un escaneo a `dpi` y
+    ejecuta process_pdf con un límite de la mitad del tamaño original, que
+    antes hacía fallar el documento.
+    """
+    import document
+
+    with tempfile.TemporaryDirectory() as tmp:
+        pdf_path = make_mixed_pdf(os.path.join(tmp, "escaneo.pdf"), pages, scanned_every=1, dpi=dpi)
+        original_size = os.path.getsize(pdf_path)
+        rows = [("Original", f"{original_size / 1024 / 1024:.2f} MB, "
+                             f"{original_size * 4 / 3 / 1024 / 1024:.2f} MB en Base64")]
+        for level, settings in enumerate(document.SIZE_OPTIMIZATION_LEVELS):
+            start = time.perf_counter()
+            data = document.rewrite_pdf(pdf_path, settings["dpi"], settings["quality"])
+            elapsed = time.perf_counter() - start
+            label = f"Nivel {level} ({settings['dpi'] or 'sin reducir'} dpi)"
+            rows.append((label, f"{elapsed:.2f} s, {len(data) / 1024 / 1024:.2f} MB "
+                                f"({len(data) / original_size * 100:.0f}%)"))
+
+        max_mb = round(original_size / 2 / 1024 / 1024, 2)
+        for mode in ("off", "oversize"):
+            converter = document.DocumentConverter(document_config(tmp, max_pdf_size_mb=max_mb,
+                                                                   size_optimization=mode))
+            _quiet_logging()
+            start = time.perf_counter()
+            try:
+                output = converter.process_pdf(pdf_path, remove_blanks=False)
+                result = f"{os.path.getsize(output) / 1024 / 1024:.2f} MB"
+            except ValueError:
+                result = "excede el tamaño máximo"
+            rows.append((f"process_pdf, size_optimization = {mode}",
+                         f"{time.perf_counter() - start:.2f} s, {result}"))
+        _report(f"Escaneo de {pages} páginas a {dpi} dpi, límite {max_mb} MB", rows)
+
+
+def bench_base64(size_mb: int = 30):
+    """
+    Compara la memoria máxima al subir un archivo como adjunto con
+    pdf_to_base64 + create y con create_from_file, y al codificarlo a disco.
+    """
+    import tracemalloc
+    import connection
+    import document
+
+    with FakeOdooServer(process=True) as server, tempfile.TemporaryDirectory() as tmp:
+        odoo = connection.OdooXMLRPC(server.config_file(tmp))
+        converter = document.DocumentConverter(document_config(tmp))
+        _quiet_logging()
+        file_path = os.path.join(tmp, "grande.pdf")
+        with open(file_path, "wb") as file:
+            file.write(os.urandom(size_mb * 1024 * 1024))
+
+        scenarios = [
+            ("pdf_to_base64 + create",
+             lambda: odoo.create("ir.attachment", {"name": "grande.pdf",
+                                                    "datas": converter.pdf_to_base64(file_path)})),
+            ("create_from_file",
+             lambda: odoo.create_from_file("ir.attachment", {"name": "grande.pdf"}, "datas", file_path)),
+            ("pdf_to_base64 a disco",
+             lambda: open(os.path.join(tmp, "a.b64"), "w").write(converter.pdf_to_base64(file_path))),
+            ("pdf_to_base64_file",
+             lambda: converter.pdf_to_base64_file(file_path, os.path.join(tmp, "b.b64"))),
+        ]
+        rows = []
+        for label, run in scenarios:
+            tracemalloc.start()
+            start = time.perf_counter()
+            run()
+            elapsed = time.perf_counter() - start
+            peak = tracemalloc.get_traced_memory()[1]
+            tracemalloc.stop()
+            rows.append((label, f"{elapsed:.2f} s, pico {peak / 1024 / 1024:.1f} MB"))
+        _report(f"Archivo de {size_mb} MB", rows)
+
+
+def bench_dedup(documents: int = 12, pages: int = 40):
+    """
+    Ejecuta dos veces la carga masiva del mismo directorio con la caché de
+    documentos activa: la segunda vez no se procesa ni se sube ningún documento.
+    """
+    import ingest
+
+    with FakeOdooServer(process=True) as server, tempfile.TemporaryDirectory() as tmp:
+        source_dir = os.path.join(tmp, "entrada")
+        os.makedirs(source_dir)
+        for i in range(documents):
+            make_sample_pdf(os.path.join(source_dir, f"doc_{i:03d}.pdf"), pages=pages, blank_every=5 + i % 3)
+
+        config_path = server.config_file(tmp)
+        with open(config_path, "a", encoding="utf-8") as file:
+            file.write("\n".join([
+                "[document]", f"log_file = {os.path.join(tmp, 'document_converter.log')}",
+                f"cache_dir = {os.path.join(tmp, 'cache')}",
+                "[paths]", f"reports_dir = {os.path.join(tmp, 'reports')}",
+                "[ingest]", "res_model = res.partner", "res_id = 1", "apply_ocr = false",
+                f"work_dir = {tmp}",
+            ]) + "\n")
+
+        rows = []
+        for run in (1, 2):
+            ingestor = ingest.BatchIngestor(config_path)
+            # Checkpoint nuevo en cada ejecución para que se vuelvan a enviar todos
+            ingestor.checkpoint_file = os.path.join(tmp, f"checkpoint_{run}.jsonl")
+            _quiet_logging()
+            server.reset_counters()
+            start = time.perf_counter()
+            report = ingestor.run(source_dir)
+            elapsed = time.perf_counter() - start
+            rows.append((f"Ejecución {run}",
+                         f"{elapsed:.2f} s, {report['uploaded']} subidos, {report['duplicates']} duplicados, "
+                         f"{report['cached']} desde caché, {server.requests} peticiones"))
+        _report(f"{documents} documentos de {pages} páginas enviados dos veces", rows)
+
+
+def _timed_process(code: str, runs: int = 5) -> float:
+    """
+    Ejecuta `code` en un intérprete nuevo `runs` veces y devuelve la mediana
+    del tiempo total en segundos.
+    """
+    import statistics
+    import subprocess
+
+    times = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        subprocess.run([sys.executable, "-c", code], check=True, cwd=os.path.dirname(os.path.abspath(__file__)),
+                       stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+        times.append(time.perf_counter() - start)
+    return statistics.median(times)
+
+
+def bench_startup(latency: float = 0.05):
+    """
+    Mide el arranque de un proceso corto: importar document.py, codificar un
+    PDF en Base64 y hacer una llamada a Odoo con y sin uid guardado.
+    """
+    with FakeOdooServer(latency=latency, process=True) as server, tempfile.TemporaryDirectory() as tmp:
+        pdf_path = make_sample_pdf(os.path.join(tmp, "muestra.pdf"), 5)
+        doc_config = document_config(tmp)
+        rows = [
+            ("python vacío", _timed_process("pass")),
+            ("import de las dependencias pesadas", _timed_process("import fitz, numpy, pandas, ocrmypdf")),
+            ("import document", _timed_process("import document")),
+            ("import document + pdf_to_base64",
+             _timed_process(f"import document; document.DocumentConverter({doc_config!r}).pdf_to_base64({pdf_path!r})")),
+        ]
+
+        odoo_config = server.config_file(tmp)
+        cached_config = os.path.join(tmp, "uid.ini")
+        with open(odoo_config, encoding="utf-8") as source, open(cached_config, "w", encoding="utf-8") as target:
+            target.write(source.read() + f"uid_cache_file = {os.path.join(tmp, 'uid.json')}\n")
+        call = "import connection; connection.OdooXMLRPC({!r}).search_count('res.partner', [])"
+        for label, config_path in (("sin uid guardado", odoo_config), ("con uid guardado", cached_config)):
+            server.reset_counters()
+            elapsed = _timed_process(call.format(config_path))
+            rows.append((f"OdooXMLRPC + search_count, {label}",
+                         f"{elapsed:.3f} s, {server.requests / 5:.0f} peticiones por ejecución"))
+        _report(f"Arranque de procesos cortos (latencia de Odoo {latency * 1000:.0f} ms)",
+                [(label, value if isinstance(value, str) else f"{value:.3f} s") for label, value in rows])
+
+
+def bench_metrics(calls: int = 2000, latency: float = 0.0):
+    """
+    Mide el coste de la instrumentación de metrics.py en llamadas a Odoo: con
+    el registro desactivado, activado y con un hook de trazado, y muestra un
+    extracto de la exportación en formato Prometheus y JSON.
+    """
+    import connection
+    import metrics
+
+    with FakeOdooServer(latency=latency) as server, tempfile.TemporaryDirectory() as tmp:
+        odoo = connection.OdooXMLRPC(server.config_file(tmp))
+        _quiet_logging()
+        odoo.create_many("res.partner", [{"name": f"Cliente {i}"} for i in range(100)])
+
+        traced = []
+        rows = []
+        for label in ("desactivado", "activado", "activado + hook"):
+            metrics.registry.reset()
+            if label == "desactivado":
+                metrics.registry.disable()
+            else:
+                metrics.registry.enable()
+            if label.endswith("hook"):
+                metrics.registry.add_hook(post=lambda event, labels, seconds, error, values: traced.append(seconds))
+            start = time.perf_counter()
+            for i in range(calls):
+                odoo.search_count("res.partner", [("id", ">", i % 100)])
+            elapsed = time.perf_counter() - start
+            rows.append((f"search_count x{calls}, {label}", f"{elapsed / calls * 1e6:,.1f} µs/llamada"))
+
+        # Coste de track() aislado, sin red
+        for enabled in (False, True):
+            metrics.registry.enabled = enabled
+            metrics.registry.post_hooks.clear()
+            start = time.perf_counter()
+            for _ in range(100000):
+                with metrics.registry.track("odoo_rpc", model="res.partner", method="search") as tracker:
+                    tracker.set(request_bytes=100)
+            elapsed = time.perf_counter() - start
+            rows.append((f"track() aislado, {'activado' if enabled else 'desactivado'}",
+                         f"{elapsed / 100000 * 1e6:.2f} µs/llamada"))
+        rows.append(("eventos recibidos por el hook", len(traced)))
+        _report("Sobrecoste de la instrumentación", rows)
+
+        metrics.registry.reset()
+        odoo.search_count("res.partner", [])
+        odoo.search_read("res.partner", [], ["name"], limit=50)
+        print("\nExtracto Prometheus:")
+        print("\n".join(line for line in metrics.registry.to_prometheus().splitlines()
+                        if "_bucket" not in line))
+        print("JSON:")
+        print(metrics.registry.to_json())
+        metrics.registry.disable()
+
+
+def bench_aggregate(records: int = 20000, teams: int = 20, latency: float = 0.002):
+    """
+    Compara tres formas de obtener el número de pedidos y el importe total por
+    equipo y estado: un search_count por combinación más un search_read
+    completo sumado en Python, read_group_frame y aggregate_many. Después
+    cuenta dominios por rangos, que se envían en lotes, con y sin multicall.
+    """
+    import connection
+    import pandas as pd
+
+    states = ["draft", "sent", "sale", "done", "cancel"]
+    with FakeOdooServer(latency=latency) as server, tempfile.TemporaryDirectory() as tmp:
+        odoo = connection.OdooXMLRPC(server.config_file(tmp))
+        _quiet_logging()
+        odoo.create_many("sale.order", [{"team_id": i % teams + 1, "state": states[i // teams % len(states)],
+                                         "amount_total": float(i % 1000)} for i in range(records)])
+        buckets = {(team, state): [("team_id", "=", team), ("state", "=", state)]
+                   for team in range(1, teams + 1) for state in states}
+
+        def measure(func):
+            server.reset_counters()
+            received = odoo.transport.bytes_received
+            start = time.perf_counter()
+            result = func()
+            return result, time.perf_counter() - start, server.requests, odoo.transport.bytes_received - received
+
+        def client_side():
+            counts = {key: odoo.search_count("sale.order", domain) for key, domain in buckets.items()}
+            rows = pd.DataFrame(odoo.iter_search_read("sale.order", [], ["team_id", "state", "amount_total"]))
+            totals = rows.groupby(["team_id", "state"])["amount_total"].sum()
+            return counts, totals
+
+        rows = []
+        (counts, totals), elapsed, requests, received = measure(client_side)
+        rows.append(("search_count por grupo + search_read", elapsed, requests, received))
+
+        frame, elapsed, requests, received = measure(lambda: odoo.read_group_frame(
+            "sale.order", [], ["amount_total:sum"], ["team_id", "state"]))
+        rows.append(("read_group_frame", elapsed, requests, received))
+        assert len(frame) == len(buckets)
+        assert frame["amount_total"].sum() == totals.sum()
+
+        aggregated, elapsed, requests, received = measure(lambda: odoo.aggregate_many(
+            "sale.order", buckets, ["amount_total:sum"]))
+        rows.append((f"aggregate_many ({len(buckets)} dominios)", elapsed, requests, received))
+        assert aggregated["count"].to_dict() == counts
+
+        grouped_counts, elapsed, requests, received = measure(lambda: odoo.count_many("sale.order", buckets))
+        rows.append((f"count_many ({len(buckets)} dominios)", elapsed, requests, received))
+        assert grouped_counts == counts
+
+        # Dominios por rangos de importe: no salen de un read_group y se envían
+        # en lotes, con y sin system.multicall (que Odoo no registra de serie)
+        ranges = {low: [("amount_total", ">=", float(low)), ("amount_total", "<", float(low + 50))]
+                  for low in range(0, 1000, 50)}
+        for use_multicall in (True, False):
+            odoo.use_multicall = use_multicall
+            _, elapsed, requests, received = measure(lambda: odoo.count_many("sale.order", ranges))
+            rows.append((f"count_many ({len(ranges)} rangos, {'con' if use_multicall else 'sin'} multicall)",
+                         elapsed, requests, received))
+
+        _report(f"{records} pedidos, {len(buckets)} grupos equipo/estado (latencia simulada {latency * 1000:.1f} ms)",
+                [(label, f"{elapsed:.3f} s, {requests} peticiones, {received / 1024:,.1f} KB recibidos")
+                 for label, elapsed, requests, received in rows])
+
+
+def bench_sync(records: int = 20000, changed: int = 50, deleted: int = 10, created: int = 20):
+    """
+    Compara una exportación completa con search_read con la sincronización
+    incremental de sync.py tras modificar, borrar y crear unos pocos registros.
+    """
+    import connection
+    import sync
+
+    fields = ["name", "email", "country_id", "active"]
+    with FakeOdooServer() as server, tempfile.TemporaryDirectory() as tmp:
+        config_path = server.config_file(tmp)
+        with open(config_path, "a", encoding="utf-8") as file:
+            # El servidor local no tiene transacciones concurrentes: sin margen de solape
+            file.write(f"[sync]\ndatabase = {os.path.join(tmp, 'mirror.sqlite')}\npage_size = 1000\n"
+                       "overlap_seconds = 0\n")
+        odoo = connection.OdooXMLRPC(config_path)
+        _quiet_logging()
+        odoo.create_many("res.partner", [{"name": f"Cliente {i}", "email": f"cliente{i}@example.com",
+                                          "country_id": i % 50 + 1, "active": True} for i in range(records)])
+
+        def measure(func):
+            server.reset_counters()
+            received = odoo.transport.bytes_received
+            start = time.perf_counter()
+            result = func()
+            return result, (f"{time.perf_counter() - start:.3f} s, {server.requests} peticiones, "
+                            f"{(odoo.transport.bytes_received - received) / 1024:,.0f} KB recibidos")
+
+        rows = []
+        _, cost = measure(lambda: list(odoo.iter_search_read("res.partner", [], fields, page_size=1000)))
+        rows.append(("exportación completa", cost))
+
+        with sync.SQLiteMirror(os.path.join(tmp, "mirror.sqlite")) as mirror:
+            engine = sync.IncrementalSync(odoo, mirror)
+            result, cost = measure(lambda: engine.sync("res.partner", fields, check_deletions=False))
+            rows.append((f"carga inicial ({result['fetched']} registros)", cost))
+
+            odoo.write_many("res.partner", {record_id: {"email": f"nuevo{record_id}@example.com"}
+                                            for record_id in range(1, records, records // changed)})
+            odoo.delete("res.partner", list(range(records // 2, records // 2 + deleted)))
+            odoo.create_many("res.partner", [{"name": f"Nuevo {i}", "active": True} for i in range(created)])
+
+            result, cost = measure(lambda: engine.sync("res.partner", check_deletions=False))
+            rows.append((f"incremental ({result['fetched']} cambios)", cost))
+            result, cost = measure(lambda: engine.check_deletions("res.partner"))
+            rows.append((f"búsqueda de borrados ({result} borrados)", cost))
+            result, cost = measure(lambda: engine.sync("res.partner", check_deletions=False))
+            rows.append((f"incremental sin cambios ({result['fetched']} registros)", cost))
+
+            # Una sola escritura masiva: más de page_size registros con el mismo write_date
+            bulk = odoo.search("res.partner", [], limit=2500)
+            odoo.write("res.partner", bulk, {"active": False})
+            result, cost = measure(lambda: engine.sync("res.partner", check_deletions=False))
+            rows.append((f"escritura masiva ({result['fetched']} cambios)", cost))
+            assert result["fetched"] >= len(bulk)
+            inactive = mirror.db.execute(f"SELECT COUNT(*) FROM {mirror.table_name('res.partner')} "
+                                         "WHERE active = 0").fetchone()[0]
+            assert inactive == len(bulk)
+
+            assert mirror.count("res.partner") == odoo.search_count("res.partner", [])
+        _report(f"Réplica de res.partner ({records} registros, {changed} modificados, {deleted} borrados, "
+                f"{created} nuevos)", rows)
+
+
+def bench_retry(calls: int = 500, threads: int = 4):
+    """
+    Prueba el planificador de scheduler.py contra el servidor local con
+    fallos inyectados: reintentos seguros frente a fallos transitorios,
+    circuit breaker con el servidor caído y límite de ritmo frente a un
+    servidor que responde HTTP 429.
+    """
+    import logging
+    import connection
+
+    def client(server, tmp, scheduler_options: dict = None, read_timeout: float = 120.0):
+        config_path = server.config_file(tmp, read_timeout=read_timeout)
+        if scheduler_options is not None:
+            with open(config_path, "a", encoding="utf-8") as file:
+                file.write("[scheduler]\nenabled = true\n")
+                file.write("".join(f"{key} = {value}\n" for key, value in scheduler_options.items()))
+        odoo = connection.OdooXMLRPC(config_path)
+        logging.getLogger().setLevel(logging.CRITICAL)
+        odoo.authenticate()
+        return odoo
+
+    def run_calls(odoo, func, count):
+        ok = failed = 0
+        for i in range(count):
+            try:
+                func(i)
+                ok += 1
+            except Exception:
+                failed += 1
+        return ok, failed
+
+    # 1. Fallos transitorios: reintentos según idempotencia
+    faults = {"unavailable": 0.03, "reset": 0.03, "conflict": 0.02, "timeout": 0.01}
+    rows = []
+    retry = {"max_retries": 5, "backoff_base": 0.01}
+    for label, options in (("sin planificador", None),
+                           ("reintentando también create", dict(retry, idempotent_methods="create")),
+                           ("reintentos según idempotencia", retry)):
+        with FakeOdooServer(faults=faults, fault_delay=0.3, seed=1) as server, \
+                tempfile.TemporaryDirectory() as tmp:
+            odoo = client(server, tmp, options, read_timeout=0.1)
+            created = []
+            start = time.perf_counter()
+            _, create_failed = run_calls(odoo, lambda i: created.append(odoo.create("res.partner", {"name": f"C{i}"})),
+                                         calls)
+            _, read_failed = run_calls(odoo, lambda i: odoo.search_count("res.partner", []), calls)
+            elapsed = time.perf_counter() - start
+            on_server = len(server.odoo.records.get("res.partner", {}))
+            names = [record["name"] for record in server.odoo.records.get("res.partner", {}).values()]
+            duplicates = len(names) - len(set(names))
+            retries = odoo.scheduler.retries if odoo.scheduler else 0
+            rows.append((label, f"{elapsed:.2f} s, fallan {create_failed} create y {read_failed} lecturas, "
+                                f"{retries} reintentos, {on_server - len(created)} registros sin ID devuelto, "
+                                f"{duplicates} duplicados"))
+    _report(f"{calls} create + {calls} search_count con fallos inyectados {faults}", rows)
+
+    # 2. Servidor caído: circuit breaker
+    rows = []
+    for label, options in (("reintentos sin circuit breaker", {"max_retries": 3, "backoff_base": 0.005}),
+                           ("con circuit breaker (5 errores)", {"max_retries": 3, "backoff_base": 0.005,
+                                                                "breaker_failures": 5,
+                                                                "breaker_reset_seconds": 60})):
+        with FakeOdooServer(seed=1) as server, tempfile.TemporaryDirectory() as tmp:
+            odoo = client(server, tmp, options)
+            server.faults = {"unavailable": 1.0}
+            server.reset_counters()
+            start = time.perf_counter()
+            _, failed = run_calls(odoo, lambda i: odoo.search_count("res.partner", []), calls // 5)
+            elapsed = time.perf_counter() - start
+            rows.append((label, f"{elapsed:.3f} s, {failed} fallidas, {server.requests} peticiones al servidor, "
+                                f"{odoo.scheduler.stats()['rejected']} rechazadas al momento"))
+    _report(f"{calls // 5} llamadas con Odoo devolviendo HTTP 503", rows)
+
+    # 3. Servidor que limita a 200 peticiones/s: token bucket
+    rows = []
+    for label, options in (("reintentos sin límite de ritmo", {"max_retries": 8, "backoff_base": 0.05}),
+                           ("token bucket a 190/s", {"max_retries": 8, "backoff_base": 0.05,
+                                                     "rate_limit": 190, "burst": 10})):
+        with FakeOdooServer(rate_limit=200, seed=1) as server, tempfile.TemporaryDirectory() as tmp:
+            odoo = client(server, tmp, options)
+            time.sleep(1.0)
+            server.reset_counters()
+            results = []
+            start = time.perf_counter()
+            workers = [threading.Thread(target=lambda: results.append(
+                run_calls(odoo, lambda i: odoo.search_count("res.partner", []), calls // threads)))
+                for _ in range(threads)]
+            for worker in workers:
+                worker.start()
+            for worker in workers:
+                worker.join()
+            elapsed = time.perf_counter() - start
+            failed = sum(result[1] for result in results)
+            rows.append((label, f"{elapsed:.2f} s, {failed} fallidas, "
+                                f"{server.requests - calls + failed} respuestas 429, "
+                                f"{odoo.scheduler.retries} reintentos"))
+    _report(f"{calls} search_count desde {threads} hilos, servidor limitado a 200 peticiones/s", rows)
+
+
+def bench_shared(calls: int = 1200, latency: float = 0.01):
+    """
+    Prueba de concurrencia del cliente compartido: 1, 4 y 16 hilos haciendo
+    create, search_count y search_read, con un OdooXMLRPC por hilo y con
+    OdooXMLRPC.shared(); después, el uid deja de ser válido a mitad de la
+    carga y los hilos deben seguir tras una sola autenticación.
+    """
+    from concurrent.futures import ThreadPoolExecutor
+    import connection
+
+    def work(odoo, i):
+        if i % 3 == 0:
+            return odoo.create("res.partner", {"name": f"Cliente {i}"})
+        if i % 3 == 1:
+            return odoo.search_count("res.partner", [("id", ">", i)])
+        return odoo.search_read("res.partner", [("id", ">", i)], ["name"], limit=10)
+
+    def run(server, threads, get_client, during=None):
+        errors = []
+        created = []
+
+        def worker(index):
+            odoo = get_client()
+            for i in range(index, calls, threads):
+                try:
+                    result = work(odoo, i)
+                    if i % 3 == 0:
+                        created.append(result)
+                except Exception as e:
+                    errors.append(e)
+
+        server.odoo.records.clear()
+        server.odoo.authentications = 0
+        start = time.perf_counter()
+        with ThreadPoolExecutor(threads) as executor:
+            futures = [executor.submit(worker, index) for index in range(threads)]
+            if during:
+                during()
+            for future in futures:
+                future.result()
+        elapsed = time.perf_counter() - start
+        assert len(created) == len(set(created))
+        return (f"{calls / elapsed:,.0f} llamadas/s, {server.odoo.authentications} autenticaciones, "
+                f"{len(errors)} errores")
+
+    rows = []
+    with FakeOdooServer(latency=latency) as server, tempfile.TemporaryDirectory() as tmp:
+        for threads in (1, 4, 16):
+            config_path = server.config_file(tmp, pool_size=threads)
+            connection.OdooXMLRPC._shared_clients.clear()
+            rows.append((f"{threads} hilos, un cliente por hilo",
+                         run(server, threads, lambda: connection.OdooXMLRPC(config_path))))
+            _quiet_logging()
+            rows.append((f"{threads} hilos, cliente compartido",
+                         run(server, threads, lambda: connection.OdooXMLRPC.shared(config_path))))
+
+        def invalidate_uid():
+            time.sleep(0.2)
+            server.odoo.uid += 1
+
+        rows.append(("16 hilos, compartido, uid invalidado",
+                     run(server, 16, lambda: connection.OdooXMLRPC.shared(config_path), invalidate_uid)))
+    _report(f"{calls} llamadas mezcladas (latencia simulada {latency * 1000:.1f} ms)", rows)
+
+
+def bench_wire(records: int = 20000, file_mb: int = 5):
+    """
+    Compara XML-RPC y JSON-RPC, con y sin compresión gzip de las peticiones:
+    coste de serializar una respuesta search_read grande, y tiempo y bytes
+    transferidos al leer `records` registros y al subir un adjunto de `file_mb` MB.
+    """
+    import connection
+
+    fields = ["name", "email", "city", "country_id", "active", "credit_limit", "write_date"]
+    payload = [{"id": i, "name": f"Contacto {i}", "email": f"contacto{i}@example.com", "city": "Madrid",
+                "country_id": [68, "España"], "active": True, "credit_limit": i * 1.5,
+                "write_date": "2024-01-01 10:00:00"} for i in range(1, records + 1)]
+
+    def best_of(func, runs: int = 3) -> float:
+        timings = []
+        for _ in range(runs):
+            start = time.perf_counter()
+            func()
+            timings.append(time.perf_counter() - start)
+        return min(timings)
+
+    rows = []
+    xml_body = xmlrpc.client.dumps((payload,), methodresponse=True, allow_none=True).encode("utf-8")
+    json_body = json.dumps({"jsonrpc": "2.0", "id": 1, "result": payload}).encode("utf-8")
+    for label, dumps, loads, body in (
+            ("XML-RPC", lambda: xmlrpc.client.dumps((payload,), methodresponse=True, allow_none=True),
+             lambda: xmlrpc.client.loads(xml_body), xml_body),
+            ("JSON-RPC", lambda: json.dumps({"jsonrpc": "2.0", "id": 1, "result": payload}),
+             lambda: json.loads(json_body), json_body)):
+        encode = best_of(dumps)
+        decode = best_of(loads)
+        rows.append((f"{label}, serializar/deserializar",
+                     f"{encode * 1000:.0f} ms / {decode * 1000:.0f} ms, {len(body) / 1e6:.2f} MB "
+                     f"({len(gzip.compress(body, 1)) / 1e6:.2f} MB con gzip)"))
+    _report(f"Respuesta search_read de {records} registros, sin red", rows)
+
+    variants = [("XML-RPC", "xmlrpc", False), ("XML-RPC + gzip", "xmlrpc", True),
+                ("JSON-RPC", "jsonrpc", False), ("JSON-RPC + gzip", "jsonrpc", True)]
+    read_rows, upload_rows = [], []
+    with FakeOdooServer() as server, tempfile.TemporaryDirectory() as tmp:
+        file_path = os.path.join(tmp, "adjunto.pdf")
+        with open(file_path, "wb") as file:
+            # Contenido poco compresible, como los streams ya comprimidos de un PDF
+            file.write(os.urandom(file_mb * 1024 * 1024 // 2) + b"%PDF texto repetido " * (file_mb * 26214))
+        with open(file_path, "rb") as file:
+            expected_checksum = hashlib.sha1(file.read()).hexdigest()
+
+        server.odoo.records.clear()
+        seed = connection.OdooXMLRPC(server.config_file(tmp))
+        _quiet_logging()
+        for start in range(0, records, 2000):
+            seed.create_many("res.partner", [{key: value for key, value in record.items() if key != "id"}
+                                             for record in payload[start:start + 2000]])
+
+        for label, protocol, compress in variants:
+            odoo = connection.OdooXMLRPC(server.config_file(tmp, protocol=protocol,
+                                                            compress_requests=str(compress).lower()))
+            _quiet_logging()
+            transport = odoo.transport
+            sent, received = transport.bytes_sent, transport.bytes_received
+            start = time.perf_counter()
+            result = odoo.search_read("res.partner", [], fields, limit=records)
+            elapsed = time.perf_counter() - start
+            assert len(result) == records
+            read_rows.append((label, f"{elapsed:.2f} s, {(transport.bytes_sent - sent) / 1e3:.1f} KB enviados, "
+                                     f"{(transport.bytes_received - received) / 1e6:.2f} MB recibidos"))
+
+            sent, received = transport.bytes_sent, transport.bytes_received
+            start = time.perf_counter()
+            attachment_id = odoo.create_from_file("ir.attachment", {"name": "adjunto.pdf"}, "datas", file_path)
+            elapsed = time.perf_counter() - start
+            assert server.odoo.records["ir.attachment"][attachment_id]["checksum"] == expected_checksum
+            upload_rows.append((label, f"{elapsed:.2f} s, {(transport.bytes_sent - sent) / 1e6:.2f} MB enviados, "
+                                       f"{(transport.bytes_received - received) / 1e3:.1f} KB recibidos"))
+
+            # Con el uid invalidado, la subida se reautentica y se repite con el uid nuevo
+            server.odoo.uid += 1
+            attachment_id = odoo.create_from_file("ir.attachment", {"name": "adjunto.pdf"}, "datas", file_path)
+            assert server.odoo.records["ir.attachment"][attachment_id]["checksum"] == expected_checksum
+
+    _report(f"search_read de {records} registros", read_rows)
+    _report(f"create_from_file de un adjunto de {file_mb} MB", upload_rows)
+
+
+BENCHMARKS = {
+    "batch": bench_batch,
+    "pool": bench_pool,
+    "async": bench_async,
+    "iter": bench_iter,
+    "cache": bench_cache,
+    "pages": bench_pages,
+    "analysis": bench_analysis,
+    "blank": bench_blank,
+    "stats": bench_stats,
+    "report": bench_report,
+    "ocr": bench_ocr,
+    "pipeline": bench_pipeline,
+    "select": bench_select,
+    "optimize": bench_optimize,
+    "base64": bench_base64,
+    "startup": bench_startup,
+    "dedup": bench_dedup,
+    "metrics": bench_metrics,
+    "aggregate": bench_aggregate,
+    "sync": bench_sync,
+    "retry": bench_retry,
+    "shared": bench_shared,
+    "wire": bench_wire,
+}
+
+
+if __name__ == "__main__":
+    names = sys.argv[1:] or list(BENCHMARKS)
+    for name in names:
+        BENCHMARKS[name]()
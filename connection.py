@@ -1,10 +1,464 @@
 import xmlrpc.client
+import base64
 import configparser
+import copy
+import gzip
+import http.client
+import itertools
+import json
 import logging
 import os
+import ssl
+import tempfile
+import threading
+import time
+import urllib.parse
+import uuid
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
 
+import metrics
+import scheduler
 
-class OdooXMLRPC:
+
+def search_kwargs(limit: int = None, offset: int = 0, order: str = None, context: dict = None) -> dict:
+    """
+    Construye los argumentos con nombre de search/search_read, omitiendo los
+    que no se indicaron para conservar los valores por defecto de Odoo.
+    """
+    kwargs = {}
+    if limit is not None:
+        kwargs["limit"] = limit
+    if offset:
+        kwargs["offset"] = offset
+    if order:
+        kwargs["order"] = order
+    if context:
+        kwargs["context"] = context
+    return kwargs
+
+
+def group_to_row(group: dict) -> dict:
+    """
+    Convierte un grupo de read_group en una fila plana: los valores many2one
+    ([id, nombre]) se separan en `<campo>` y `<campo>_name`, "__count" pasa a
+    `count` y se omiten las demás claves internas.
+    """
+    row = {}
+    for key, value in group.items():
+        if key == "__count":
+            row["count"] = value
+        elif key.startswith("__"):
+            continue
+        elif isinstance(value, (list, tuple)) and len(value) == 2 and isinstance(value[0], int):
+            row[key], row[f"{key}_name"] = value
+        else:
+            row[key] = value
+    return row
+
+
+# Tipos de campo cuyos grupos de read_group corresponden a un filtro "=" exacto
+GROUPABLE_FIELD_TYPES = {"many2one", "selection", "char", "integer", "boolean"}
+
+# Tipos en los que un valor str del filtro es el valor guardado; en un many2one
+# Odoo lo resuelve con name_search y no coincide con el id del grupo
+STRING_FIELD_TYPES = {"selection", "char"}
+
+
+def domain_buckets(domains: dict):
+    """
+    Comprueba si todos los dominios filtran solo por igualdad ("=" o "in") los
+    mismos campos, cada campo una vez, como los cubos de un informe por equipo
+    y estado.
+
+    Returns:
+        tuple: (campos, {etiqueta: [valores de cada campo]}), o None si algún
+        dominio tiene otra forma.
+    """
+    fields = None
+    buckets = {}
+    for label, domain in domains.items():
+        terms = {}
+        for term in domain:
+            if not isinstance(term, (list, tuple)) or len(term) != 3:
+                return None
+            field, operator, value = term
+            if field in terms or operator not in ("=", "in"):
+                return None
+            if operator == "in" and not isinstance(value, (list, tuple)):
+                return None
+            values = list(value) if operator == "in" else [value]
+            if not all(isinstance(item, (str, int)) for item in values):
+                return None
+            terms[field] = values
+        if not terms or (fields is not None and sorted(terms) != fields):
+            return None
+        fields = sorted(terms)
+        buckets[label] = [terms[field] for field in fields]
+    return (fields, buckets) if fields else None
+
+
+def _group_key(value) -> tuple:
+    # Los many2one llegan como [id, nombre]; False y 0 no deben coincidir
+    if isinstance(value, (list, tuple)):
+        value = value[0]
+    return isinstance(value, bool), value
+
+
+class LookupCache:
+    """
+    Caché LRU en memoria con caducidad (TTL) para resultados de lectura de Odoo.
+
+    Args:
+        ttl (float): Segundos que una entrada sigue siendo válida.
+        max_entries (int): Número máximo de entradas; al superarlo se descarta
+            la usada hace más tiempo.
+    """
+
+    def __init__(self, ttl: float = 300.0, max_entries: int = 1024):
+        self.ttl = ttl
+        self.max_entries = max(1, max_entries)
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def make_key(model: str, method: str, args: list, kwargs: dict = None) -> tuple:
+        return model, method, json.dumps([args, kwargs or {}], sort_keys=True, default=str)
+
+    def get(self, key: tuple) -> tuple:
+        """
+        Busca una entrada vigente.
+
+        Returns:
+            tuple: (encontrado, valor). El valor es una copia del almacenado.
+        """
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or entry[0] < time.monotonic():
+                if entry is not None:
+                    del self._entries[key]
+                self.misses += 1
+                return False, None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return True, copy.deepcopy(entry[1])
+
+    def set(self, key: tuple, value):
+        with self._lock:
+            self._entries[key] = (time.monotonic() + self.ttl, copy.deepcopy(value))
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def invalidate(self, model: str = None):
+        """
+        Descarta las entradas de un modelo, o todas si no se indica modelo.
+        """
+        with self._lock:
+            if model is None:
+                self._entries.clear()
+                return
+            for key in [key for key in self._entries if key[0] == model]:
+                del self._entries[key]
+
+    def stats(self) -> dict:
+        with self._lock:
+            total = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": round(self.hits / total * 100, 1) if total else 0.0,
+                "entries": len(self._entries),
+            }
+
+
+class _CountingResponse:
+    """
+    Envuelve una respuesta HTTP y cuenta los bytes leídos del cuerpo.
+    """
+
+    def __init__(self, response):
+        self.response = response
+        self.bytes_read = 0
+
+    def read(self, amt=None):
+        data = self.response.read(amt)
+        self.bytes_read += len(data)
+        return data
+
+    def getheader(self, name, default=None):
+        return self.response.getheader(name, default)
+
+
+class PooledTransport(xmlrpc.client.Transport):
+    """
+    Transporte XML-RPC con un pool de conexiones HTTP persistentes (keep-alive).
+
+    Cada petición toma una conexión libre del pool y la devuelve al terminar,
+    por lo que el transporte puede compartirse entre hilos. Como máximo hay
+    `pool_size` conexiones abiertas; los hilos adicionales esperan a que se
+    libere una.
+
+    Args:
+        use_https (bool): Si se usan conexiones TLS.
+        pool_size (int): Número máximo de conexiones simultáneas.
+        connect_timeout (float): Segundos de espera al abrir una conexión.
+        read_timeout (float): Segundos de espera de cada lectura de la respuesta.
+        context (ssl.SSLContext, optional): Contexto TLS para conexiones HTTPS.
+    """
+
+    verbose = False
+    content_type = "text/xml"
+
+    # Nivel de gzip de los cuerpos de petición (ver encode_threshold): el más
+    # rápido, que en XML y JSON consigue casi toda la reducción
+    gzip_level = 1
+
+    def __init__(self, use_https: bool = False, pool_size: int = 4, connect_timeout: float = 10.0,
+                 read_timeout: float = 120.0, context: ssl.SSLContext = None, **kwargs):
+        super().__init__(**kwargs)
+        self.use_https = use_https
+        self.pool_size = max(1, pool_size)
+        self.connect_timeout = connect_timeout
+        self.read_timeout = read_timeout
+        self.context = context
+        self.connections_opened = 0
+        self.bytes_sent = 0
+        self.bytes_received = 0
+        self._idle = []
+        self._lock = threading.Lock()
+        self._slots = threading.BoundedSemaphore(self.pool_size)
+        self._local = threading.local()
+
+    def _open(self, host):
+        chost, extra_headers, x509 = self.get_host_info(host)
+        if self.use_https:
+            context = self.context or ssl.create_default_context()
+            connection = http.client.HTTPSConnection(chost, timeout=self.connect_timeout, context=context)
+        else:
+            connection = http.client.HTTPConnection(chost, timeout=self.connect_timeout)
+        connection.connect()
+        connection.sock.settimeout(self.read_timeout)
+        with self._lock:
+            self.connections_opened += 1
+        return connection, extra_headers
+
+    def _acquire(self, host):
+        self._slots.acquire()
+        with self._lock:
+            for index in range(len(self._idle) - 1, -1, -1):
+                if self._idle[index][0] == host:
+                    return self._idle.pop(index)[1:] + (True,)
+        try:
+            return self._open(host) + (False,)
+        except Exception:
+            self._slots.release()
+            raise
+
+    def _release(self, host, connection, extra_headers, reusable: bool):
+        if reusable:
+            with self._lock:
+                self._idle.append((host, connection, extra_headers))
+        else:
+            connection.close()
+        self._slots.release()
+
+    def single_request(self, host, handler, request_body, verbose=False):
+        # Como Transport.send_content: con encode_threshold se comprime el cuerpo
+        compressed = self.encode_threshold is not None and len(request_body) > self.encode_threshold
+        if compressed:
+            request_body = gzip.compress(request_body, compresslevel=self.gzip_level)
+
+        def send_body(connection):
+            if compressed:
+                connection.putheader("Content-Encoding", "gzip")
+            connection.putheader("Content-Length", str(len(request_body)))
+            connection.endheaders(request_body)
+
+        return self._perform(host, handler, send_body, len(request_body))
+
+    def stream_request(self, host, handler, make_body, content_length: int, content_encoding: str = None):
+        """
+        Envía una petición XML-RPC cuyo cuerpo se genera por partes, sin
+        construirlo completo en memoria.
+
+        Args:
+            host: Host de destino, como en Transport.request.
+            handler: Ruta del endpoint XML-RPC.
+            make_body: Función sin argumentos que devuelve un iterable de bytes con
+                el cuerpo; se vuelve a llamar si hay que reintentar la petición.
+            content_length (int): Longitud total del cuerpo en bytes.
+            content_encoding (str, optional): Codificación del cuerpo ("gzip").
+
+        Returns:
+            tuple: La respuesta XML-RPC decodificada.
+        """
+        def send_body(connection):
+            if content_encoding:
+                connection.putheader("Content-Encoding", content_encoding)
+            connection.putheader("Content-Length", str(content_length))
+            connection.endheaders()
+            for part in make_body():
+                connection.send(part)
+
+        # Igual que Transport.request, se reintenta una vez si la conexión estaba cerrada
+        for attempt in (0, 1):
+            try:
+                return self._perform(host, handler, send_body, content_length)
+            except (http.client.RemoteDisconnected, ConnectionError):
+                if attempt:
+                    raise
+
+    def last_request_bytes(self) -> tuple:
+        """
+        Bytes (enviados, recibidos) del cuerpo de la última petición hecha
+        por el hilo actual. Los recibidos son los de la respuesta tal como
+        llegó, comprimida si el servidor usó gzip.
+        """
+        return getattr(self._local, "last_bytes", (0, 0))
+
+    def _perform(self, host, handler, send_body, body_size: int):
+        self._local.last_bytes = (body_size, 0)
+        connection, extra_headers, reused = self._acquire(host)
+        try:
+            headers = self._headers + extra_headers
+            connection.putrequest("POST", handler, skip_accept_encoding=self.accept_gzip_encoding)
+            if self.accept_gzip_encoding:
+                headers.append(("Accept-Encoding", "gzip"))
+            headers.append(("Content-Type", self.content_type))
+            headers.append(("User-Agent", self.user_agent))
+            self.send_headers(connection, headers)
+            send_body(connection)
+            response = connection.getresponse()
+        except Exception as e:
+            self._release(host, connection, extra_headers, False)
+            if reused and isinstance(e, (http.client.RemoteDisconnected, ConnectionError)):
+                # Conexión inactiva cerrada por el servidor: se descartan las demás
+                # conexiones ociosas y Transport.request reintenta con una nueva
+                self.close()
+            raise
+
+        counting = _CountingResponse(response)
+        try:
+            if response.status == 200:
+                return self.parse_response(counting)
+            counting.read()
+            raise xmlrpc.client.ProtocolError(host + handler, response.status, response.reason,
+                                              dict(response.getheaders()))
+        except (xmlrpc.client.Fault, xmlrpc.client.ProtocolError):
+            raise
+        except Exception:
+            response.will_close = True
+            raise
+        finally:
+            self._local.last_bytes = (body_size, counting.bytes_read)
+            with self._lock:
+                self.bytes_sent += body_size
+                self.bytes_received += counting.bytes_read
+            self._release(host, connection, extra_headers, not response.will_close and response.isclosed())
+
+    def close(self):
+        """
+        Cierra todas las conexiones ociosas del pool.
+        """
+        with self._lock:
+            idle, self._idle = self._idle, []
+        for host, connection, extra_headers in idle:
+            connection.close()
+
+
+def is_access_denied(fault_string) -> bool:
+    """
+    Si un Fault de Odoo es un Access Denied (uid o contraseña rechazados).
+    """
+    return "accessdenied" in str(fault_string).lower().replace(" ", "")
+
+
+def is_missing_multicall(fault_string) -> bool:
+    """
+    Si un Fault indica que el servidor no tiene system.multicall (Odoo
+    responde "Method not available", SimpleXMLRPCServer "is not supported").
+    """
+    text = str(fault_string).lower()
+    return "system.multicall" in text and any(phrase in text for phrase in (
+        "not available", "not supported", "not found", "does not exist", "unknown"))
+
+
+def jsonrpc_body(service: str, method: str, args, request_id: int = 1) -> bytes:
+    """
+    Cuerpo de una llamada al endpoint /jsonrpc de Odoo.
+    """
+    payload = {"jsonrpc": "2.0", "method": "call", "id": request_id,
+               "params": {"service": service, "method": method, "args": list(args)}}
+    return json.dumps(payload, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+
+
+def jsonrpc_result(data: bytes):
+    """
+    Resultado de una respuesta de /jsonrpc de Odoo.
+
+    Raises:
+        xmlrpc.client.Fault: Si Odoo devuelve un error, como en XML-RPC.
+    """
+    message = json.loads(data)
+    error = message.get("error")
+    if error:
+        details = error.get("data") or {}
+        raise xmlrpc.client.Fault(error.get("code", 0),
+                                  f"{details.get('name', '')}: {details.get('message') or error.get('message')}")
+    return message.get("result")
+
+
+class JsonRpcTransport(PooledTransport):
+    """
+    PooledTransport para el endpoint /jsonrpc de Odoo. Las respuestas se
+    decodifican como las de XML-RPC: una tupla con el resultado, y los errores
+    de Odoo se lanzan como xmlrpc.client.Fault para que el resto del cliente
+    los trate igual.
+    """
+
+    content_type = "application/json"
+
+    def parse_response(self, response):
+        data = response.read()
+        if response.getheader("Content-Encoding", "") == "gzip":
+            data = gzip.decompress(data)
+        return (jsonrpc_result(data),)
+
+
+class JsonRpcProxy:
+    """
+    Equivalente de xmlrpc.client.ServerProxy para un servicio del endpoint
+    /jsonrpc de Odoo ("common" u "object"): `proxy.execute_kw(...)` envía la
+    llamada y devuelve su resultado.
+    """
+
+    def __init__(self, url: str, service: str, transport: JsonRpcTransport):
+        parsed = urllib.parse.urlsplit(url)
+        self._host = parsed.netloc
+        self._handler = parsed.path.rstrip("/") + "/jsonrpc"
+        self._service = service
+        self._transport = transport
+        self._ids = itertools.count(1)
+
+    def __getattr__(self, method: str):
+        if method.startswith("_"):
+            raise AttributeError(method)
+
+        def call(*args):
+            body = jsonrpc_body(self._service, method, args, next(self._ids))
+            return self._transport.request(self._host, self._handler, body)[0]
+
+        return call
+
+
+class OdooClientBase:
+    """
+    Lectura del config.ini, configuración del logging y validación de la
+    autenticación, comunes a los clientes síncrono y asíncrono de Odoo.
+    """
 
     def __init__(self, config_path=None):
         config = configparser.ConfigParser()
@@ -14,14 +468,23 @@ class OdooXMLRPC:
         else:
             config.read("config.ini")
 
+        self.config = config
         self.url = config.get("odoo", "url")
         self.db = config.get("odoo", "db")
         self.username = config.get("odoo", "username")
         self.password = config.get("odoo", "password")
         self.log_file = config.get("odoo", "log_file", fallback="odoo_xmlrpc.log")
+        self.batch_size = config.getint("odoo", "batch_size", fallback=100)
+        self.use_multicall = config.getboolean("odoo", "multicall", fallback=True)
+        self.chunk_size = config.getint("odoo", "chunk_size", fallback=1000)
+        self.pool_size = config.getint("odoo", "pool_size", fallback=4)
+        self.connect_timeout = config.getfloat("odoo", "connect_timeout", fallback=10.0)
+        self.read_timeout = config.getfloat("odoo", "read_timeout", fallback=120.0)
+        self.page_size = config.getint("odoo", "page_size", fallback=500)
+        metrics.configure(config)
 
         log_dir = os.path.dirname(self.log_file)
-        if not os.path.exists(log_dir):
+        if log_dir and not os.path.exists(log_dir):
             os.makedirs(log_dir)
 
         # Configuración del logging
@@ -30,18 +493,303 @@ class OdooXMLRPC:
                             handlers=[logging.FileHandler(self.log_file),
                                       logging.StreamHandler()])
 
-        logging.info("Iniciando conexión con Odoo")
-
-        # Autenticación
-        common = xmlrpc.client.ServerProxy(f"{self.url}/xmlrpc/2/common")
-        self.uid = common.authenticate(self.db, self.username, self.password, {})
+    def _check_uid(self, uid):
+        """
+        Valida el uid devuelto por authenticate.
 
-        if not self.uid:
+        Raises:
+            Exception: Si Odoo rechazó las credenciales.
+        """
+        if not uid:
             logging.error("Error en la autenticación con Odoo")
             raise Exception("Error en la autenticación con Odoo")
+        return uid
+
+
+class OdooXMLRPC(OdooClientBase):
+    """
+    Cliente síncrono de Odoo por XML-RPC.
+
+    Una instancia se puede compartir entre hilos: las peticiones usan el pool
+    de conexiones de PooledTransport (`pool_size` del config.ini limita las
+    que hay en curso), la autenticación se hace una sola vez y, si Odoo
+    rechaza el uid, un único hilo vuelve a autenticar. `OdooXMLRPC.shared()`
+    devuelve la instancia común del proceso para un config.ini.
+    """
+
+    # Instancias compartidas por ruta del config.ini (ver shared)
+    _shared_clients = {}
+    _shared_lock = threading.Lock()
+
+    # Métodos de solo lectura cuyos resultados se pueden guardar en caché (solo
+    # en los modelos de `models` en [cache]); cualquier otro método invalida
+    # la caché del modelo al que se aplica.
+    CACHEABLE_METHODS = {"search", "search_read", "search_count", "read", "read_group", "name_search", "fields_get"}
+
+    def __init__(self, config_path=None):
+        super().__init__(config_path)
+
+        # Caché opcional de búsquedas y de esquemas (fields_get). Las búsquedas
+        # solo se guardan en los modelos de consulta estables indicados en
+        # `models` (p. ej. res.country, res.currency, uom.uom); fields_get en todos
+        self.cache = None
+        self.schema_cache = None
+        self.cache_models = {model.strip() for model in self.config.get("cache", "models", fallback="").split(",")
+                             if model.strip()}
+        if self.config.getboolean("cache", "enabled", fallback=False):
+            self.cache = LookupCache(ttl=self.config.getfloat("cache", "ttl", fallback=300.0),
+                                     max_entries=self.config.getint("cache", "max_entries", fallback=1024))
+            self.schema_cache = LookupCache(ttl=self.config.getfloat("cache", "schema_ttl", fallback=3600.0),
+                                            max_entries=self.config.getint("cache", "max_entries", fallback=1024))
+        # Tipos de campo por modelo para count_many y aggregate_many (ver _field_types)
+        self._field_type_cache = {}
+
+        # Protocolo: "xmlrpc" (/xmlrpc/2) o "jsonrpc" (/jsonrpc), con los mismos métodos.
+        # compress_requests comprime con gzip los cuerpos de petición; Odoo no los
+        # descomprime por sí mismo, requiere un proxy delante que lo haga
+        self.protocol = self.config.get("odoo", "protocol", fallback="xmlrpc").lower()
+        if self.protocol not in ("xmlrpc", "jsonrpc"):
+            raise ValueError(f"Protocolo de Odoo no soportado: {self.protocol}")
+        transport_class = JsonRpcTransport if self.protocol == "jsonrpc" else PooledTransport
+
+        # Un único pool de conexiones compartido por /common y /object
+        self.transport = transport_class(use_https=self.url.startswith("https"),
+                                         pool_size=self.pool_size,
+                                         connect_timeout=self.connect_timeout,
+                                         read_timeout=self.read_timeout)
+        if self.config.getboolean("odoo", "compress_requests", fallback=False):
+            self.transport.encode_threshold = 1400
+        if self.protocol == "jsonrpc":
+            self.common = JsonRpcProxy(self.url, "common", self.transport)
+            self.models = JsonRpcProxy(self.url, "object", self.transport)
+            # /jsonrpc no admite system.multicall: los lotes se envían llamada a llamada
+            self.use_multicall = False
+        else:
+            self.common = xmlrpc.client.ServerProxy(f"{self.url}/xmlrpc/2/common", transport=self.transport)
+            self.models = xmlrpc.client.ServerProxy(f"{self.url}/xmlrpc/2/object", transport=self.transport)
+
+        # Reintentos, límite de ritmo y circuit breaker opcionales (sección [scheduler])
+        self.scheduler = scheduler.RequestScheduler.from_config(self.config)
+
+        # La autenticación se hace en la primera llamada (ver la propiedad uid)
+        self.uid_cache_file = self.config.get("odoo", "uid_cache_file", fallback="")
+        self._uid = None
+        self._auth_lock = threading.RLock()
+
+    @classmethod
+    def shared(cls, config_path=None) -> "OdooXMLRPC":
+        """
+        Devuelve el cliente compartido del proceso para un config.ini,
+        creándolo la primera vez. Así los hilos de un pool no repiten la
+        lectura de la configuración ni la autenticación.
+        """
+        key = (cls, os.path.abspath(config_path or "config.ini"))
+        with cls._shared_lock:
+            client = cls._shared_clients.get(key)
+            if client is None:
+                client = cls._shared_clients[key] = cls(config_path)
+            return client
+
+    @property
+    def uid(self) -> int:
+        """
+        ID del usuario autenticado. Se autentica al pedirlo por primera vez.
+        """
+        if self._uid is None:
+            self.authenticate()
+        return self._uid
+
+    def _uid_cache_key(self) -> str:
+        return f"{self.url}|{self.db}|{self.username}"
+
+    def _read_cached_uid(self):
+        try:
+            with open(self.uid_cache_file, encoding="utf-8") as file:
+                return json.load(file).get(self._uid_cache_key())
+        except (OSError, ValueError):
+            return None
+
+    def _store_cached_uid(self, uid: int):
+        try:
+            try:
+                with open(self.uid_cache_file, encoding="utf-8") as file:
+                    cached = json.load(file)
+            except (OSError, ValueError):
+                cached = {}
+            cached[self._uid_cache_key()] = uid
+            temp_path = f"{self.uid_cache_file}.{os.getpid()}.tmp"
+            with open(temp_path, "w", encoding="utf-8") as file:
+                json.dump(cached, file)
+            os.replace(temp_path, self.uid_cache_file)
+        except OSError as e:
+            logging.warning(f"No se pudo guardar el uid en {self.uid_cache_file}: {e}")
+
+    def authenticate(self, force: bool = False) -> int:
+        """
+        Autentica contra /xmlrpc/2/common y devuelve el uid.
+
+        Si `uid_cache_file` está configurado, se reutiliza el uid guardado en
+        una ejecución anterior para la misma URL, base de datos y usuario, sin
+        llamar a Odoo; la contraseña se sigue enviando y validando en cada llamada.
+
+        Args:
+            force (bool): Autenticar contra Odoo aunque ya haya un uid.
+        """
+        with self._auth_lock:
+            if self._uid is not None and not force:
+                return self._uid
 
-        self.models = xmlrpc.client.ServerProxy(f"{self.url}/xmlrpc/2/object")
-        logging.info("Conexión establecida correctamente con Odoo")
+            if self.uid_cache_file and not force:
+                uid = self._read_cached_uid()
+                if uid:
+                    logging.info(f"Usando el uid {uid} guardado en {self.uid_cache_file}")
+                    self._uid = uid
+                    return uid
+
+            logging.info("Iniciando conexión con Odoo")
+            uid = self._check_uid(self._send("authenticate", self.common.authenticate,
+                                             self.db, self.username, self.password, {}))
+            logging.info("Conexión establecida correctamente con Odoo")
+            if self.uid_cache_file:
+                self._store_cached_uid(uid)
+            self._uid = uid
+            return uid
+
+    def _execute(self, model: str, method: str, args: list, kwargs: dict = None, use_cache: bool = True,
+                 retry_safe: bool = False):
+        """
+        Ejecuta un método de un modelo de Odoo a través de execute_kw.
+
+        Args:
+            model (str): El nombre del modelo.
+            method (str): El método a ejecutar (create, write, search...).
+            args (list): Argumentos posicionales del método.
+            kwargs (dict, optional): Argumentos con nombre del método.
+            use_cache (bool): Si la lectura puede usar la caché. Las lecturas
+                paginadas no la usan, para no guardar cada página en memoria.
+            retry_safe (bool): Si el planificador puede repetir la llamada ante
+                cualquier error transitorio aunque el método no sea de lectura.
+
+        Returns:
+            El resultado devuelto por Odoo.
+        """
+        if self.cache is None:
+            return self._rpc(model, method, args, kwargs, retry_safe)
+
+        if method not in self.CACHEABLE_METHODS:
+            try:
+                return self._rpc(model, method, args, kwargs, retry_safe)
+            finally:
+                self.cache.invalidate(model)
+
+        if not use_cache or (method != "fields_get" and model not in self.cache_models):
+            return self._rpc(model, method, args, kwargs)
+
+        cache = self.schema_cache if method == "fields_get" else self.cache
+        key = LookupCache.make_key(model, method, args, kwargs)
+        found, result = cache.get(key)
+        if not found:
+            result = self._rpc(model, method, args, kwargs)
+            cache.set(key, result)
+        return result
+
+    def _rpc(self, model: str, method: str, args: list, kwargs: dict = None, retry_safe: bool = False):
+        def send(uid):
+            params = [self.db, uid, self.password, model, method, args]
+            if kwargs:
+                params.append(kwargs)
+            return self._send(method, self.models.execute_kw, *params, retry_safe=retry_safe)
+
+        return self._authenticated_call(model, method, send)
+
+    def _authenticated_call(self, model: str, method: str, send, **values):
+        """
+        Ejecuta `send(uid)` registrando la métrica odoo_rpc (con `values`
+        añadidos al evento). Si Odoo responde Access Denied, autentica de nuevo
+        y repite el envío una vez con el uid nuevo, por lo que `send` debe
+        construir la petición a partir del uid recibido.
+        """
+        uid = self.uid
+        with metrics.registry.track("odoo_rpc", model=model, method=method) as tracker:
+            try:
+                result = send(uid)
+            except xmlrpc.client.Fault as e:
+                # El uid puede haber quedado obsoleto (uid guardado, usuario
+                # recreado, base de datos restaurada): se autentica de nuevo y
+                # se reintenta una vez si el uid cambia
+                if not is_access_denied(e.faultString):
+                    raise
+                new_uid = self._reauthenticate(uid)
+                if new_uid == uid:
+                    raise
+                result = send(new_uid)
+            self._track_bytes(tracker)
+            if values:
+                tracker.set(**values)
+            return result
+
+    def _reauthenticate(self, stale_uid: int) -> int:
+        """
+        Autentica de nuevo tras un Access Denied con `stale_uid`. Si varios
+        hilos fallan a la vez, solo el primero llama a Odoo y los demás usan
+        el uid que obtuvo.
+        """
+        with self._auth_lock:
+            if self._uid != stale_uid:
+                return self._uid
+            logging.warning(f"Odoo rechazó el uid {stale_uid}, autenticando de nuevo")
+            return self.authenticate(force=True)
+
+    def _send(self, methods, func, *args, retry_safe: bool = False):
+        """
+        Envía una petición a través del planificador de [scheduler], si está activo.
+        """
+        if self.scheduler is None:
+            return func(*args)
+        return self.scheduler.call(methods, func, *args, idempotent=retry_safe)
+
+    def _track_bytes(self, tracker):
+        sent, received = self.transport.last_request_bytes()
+        tracker.set(request_bytes=sent, response_bytes=received)
+
+    def cache_stats(self) -> dict:
+        """
+        Devuelve los contadores de aciertos y fallos de la caché de búsquedas
+        y de la de esquemas, o un diccionario vacío si la caché está desactivada.
+        """
+        if self.cache is None:
+            return {}
+        return {"lookup": self.cache.stats(), "schema": self.schema_cache.stats()}
+
+    def clear_cache(self, model: str = None):
+        """
+        Vacía la caché de búsquedas de un modelo, o todas las cachés si no se indica modelo.
+        """
+        if model is None:
+            self._field_type_cache.clear()
+        if self.cache is None:
+            return
+        self.cache.invalidate(model)
+        if model is None:
+            self.schema_cache.invalidate()
+
+    def batch(self, flush_size: int = None) -> "OdooBatch":
+        """
+        Crea un lote de llamadas que se envían juntas en una sola petición.
+
+        Args:
+            flush_size (int, optional): Número de llamadas acumuladas que provoca
+                un envío automático. Por defecto se usa `batch_size` del config.ini.
+
+        Returns:
+            OdooBatch: El lote, usable como gestor de contexto.
+
+        Ejemplo:
+            with odoo.batch() as lote:
+                llamadas = [lote.create("res.partner", {"name": n}) for n in nombres]
+            ids = [llamada.result for llamada in llamadas]
+        """
+        return OdooBatch(self, flush_size or self.batch_size)
 
     def create(self, model: str, values: dict) -> dict:
         """
@@ -55,11 +803,87 @@ class OdooXMLRPC:
             dict: El ID del registro creado.
         """
         logging.info(f"Creando registro en {model}")
-        result = self.models.execute_kw(self.db, self.uid, self.password, model, "create", [values])
+        result = self._execute(model, "create", [values])
         logging.info(f"Registro creado con ID {result}")
         return result
 
-    def search(self, model: str, domain: list, limit: int = 20) -> list:
+    def create_from_file(self, model: str, values: dict, field: str, file_path: str,
+                         chunk_size: int = 3 * 256 * 1024) -> int:
+        """
+        Crea un registro con el contenido de un archivo en Base64 en un campo
+        binario, codificándolo y enviándolo por partes directamente al cuerpo de
+        la petición, sin cargar el archivo ni su Base64 completos en memoria.
+
+        Args:
+            model (str): El nombre del modelo en el que se desea crear el registro.
+            values (dict): Valores del resto de campos del registro.
+            field (str): Campo que recibe el archivo en Base64 (por ejemplo "datas").
+            file_path (str): Ruta del archivo a enviar.
+            chunk_size (int, optional): Bytes del archivo leídos en cada bloque;
+                se ajusta a múltiplo de 3 para que los bloques Base64 se puedan concatenar.
+
+        Returns:
+            int: El ID del registro creado.
+        """
+        logging.info(f"Creando registro en {model} con el archivo {file_path} en el campo {field}")
+        chunk_size = max(3, chunk_size - chunk_size % 3)
+        file_size = os.path.getsize(file_path)
+        encoded_size = (file_size + 2) // 3 * 4
+
+        # El marcador se sustituye por el Base64 del archivo al enviar la petición
+        # (los caracteres Base64 no necesitan escaparse ni en XML ni en JSON)
+        marker = f"__{uuid.uuid4().hex}__"
+        parsed = urllib.parse.urlsplit(self.url)
+        if self.protocol == "jsonrpc":
+            handler = parsed.path.rstrip("/") + "/jsonrpc"
+        else:
+            handler = parsed.path.rstrip("/") + "/xmlrpc/2/object"
+
+        def send(uid):
+            # El cuerpo lleva el uid, así que se construye de nuevo si hay que
+            # reautenticar
+            params = (self.db, uid, self.password, model, "create", [dict(values, **{field: marker})])
+            if self.protocol == "jsonrpc":
+                body = jsonrpc_body("object", "execute_kw", params)
+            else:
+                body = xmlrpc.client.dumps(params, "execute_kw").encode("utf-8", "xmlcharrefreplace")
+            prefix, suffix = body.split(marker.encode("ascii"))
+
+            def iter_parts():
+                yield prefix
+                with open(file_path, "rb") as file:
+                    for chunk in iter(lambda: file.read(chunk_size), b""):
+                        yield base64.b64encode(chunk)
+                yield suffix
+
+            if self.transport.encode_threshold is None:
+                return self._send("create", self.transport.stream_request, parsed.netloc, handler,
+                                  iter_parts, len(prefix) + encoded_size + len(suffix))
+
+            # Comprimido, el tamaño del cuerpo no se conoce de antemano: se
+            # comprime a un archivo temporal (en memoria hasta 8 MB)
+            with tempfile.SpooledTemporaryFile(max_size=8 * 1024 * 1024) as spooled:
+                with gzip.GzipFile(fileobj=spooled, mode="wb", compresslevel=self.transport.gzip_level) as compressor:
+                    for part in iter_parts():
+                        compressor.write(part)
+                content_length = spooled.tell()
+
+                def make_body():
+                    spooled.seek(0)
+                    return iter(lambda: spooled.read(chunk_size), b"")
+
+                return self._send("create", self.transport.stream_request, parsed.netloc, handler,
+                                  make_body, content_length, "gzip")
+
+        response = self._authenticated_call(model, "create", send)
+        if self.cache is not None:
+            self.cache.invalidate(model)
+        result = response[0]
+        logging.info(f"Registro creado con ID {result}")
+        return result
+
+    def search(self, model: str, domain: list, limit: int = 20, offset: int = 0, order: str = None,
+               context: dict = None, use_cache: bool = True) -> list:
         """
         Realiza una búsqueda de registros en Odoo según el dominio especificado.
 
@@ -68,16 +892,23 @@ class OdooXMLRPC:
             domain (list): Una lista que representa el dominio de búsqueda.
                             Por ejemplo, [('field_name', '=', 'value')].
             limit (int, optional): El número máximo de resultados a devolver. Por defecto es 10.
+            offset (int, optional): Número de resultados a omitir.
+            order (str, optional): Orden de los resultados, por ejemplo "name asc, id desc".
+            context (dict, optional): Contexto de Odoo, p. ej. {"active_test": False}
+                para incluir los registros archivados.
+            use_cache (bool): Si se puede usar la caché de búsquedas (solo en los
+                modelos de `models` en [cache]).
 
         Returns:
             list: Una lista con los IDs de los registros que coinciden con el dominio de búsqueda.
         """
         logging.info(f"Buscando en {model} con dominio {domain} y límite {limit}")
-        result = self.models.execute_kw(self.db, self.uid, self.password, model, "search", [domain], {"limit": limit})
+        result = self._execute(model, "search", [domain], search_kwargs(limit, offset, order, context), use_cache)
         
         return result
 
-    def search_read(self, model: str, domain: list, fields: list, limit: int = 10) -> list:
+    def search_read(self, model: str, domain: list, fields: list, limit: int = 10, offset: int = 0,
+                    order: str = None, context: dict = None, use_cache: bool = True) -> list:
         """
         Realiza una búsqueda de registros en Odoo y devuelve los campos especificados.
 
@@ -87,16 +918,76 @@ class OdooXMLRPC:
                             Por ejemplo, [('field_name', '=', 'value')].
             fields (list): Lista de campos a devolver.
             limit (int, optional): El número máximo de resultados a devolver. Por defecto es 10.
+            offset (int, optional): Número de resultados a omitir.
+            order (str, optional): Orden de los resultados, por ejemplo "name asc, id desc".
+            context (dict, optional): Contexto de Odoo, como en search.
+            use_cache (bool): Si se puede usar la caché de búsquedas, como en search.
 
         Returns:
             list: Una lista de diccionarios con los registros y sus campos especificados.
         """
         logging.info(f"Buscando y leyendo en {model} campos y límite {limit}")
-        result = self.models.execute_kw(self.db, self.uid, self.password, model, "search_read", [domain, fields], {"limit": limit})
+        result = self._execute(model, "search_read", [domain, fields], search_kwargs(limit, offset, order, context),
+                               use_cache)
         
         return result
 
-    def write(self, model: str, ids: list, values: dict) -> bool:
+    def iter_search_read(self, model: str, domain: list, fields: list, page_size: int = None,
+                         order: str = None, prefetch: bool = False):
+        """
+        Recorre todos los registros que coinciden con el dominio, pidiéndolos a
+        Odoo por páginas y entregándolos uno a uno, de modo que la memoria usada
+        no depende del tamaño del modelo.
+
+        Sin `order` se pagina por ID (id > último ID leído), que no se degrada con
+        páginas altas ni omite registros si se crean otros durante el recorrido.
+        Con `order` se pagina con offset.
+
+        Args:
+            model (str): El nombre del modelo en el que se realiza la búsqueda.
+            domain (list): Una lista que representa el dominio de búsqueda.
+            fields (list): Lista de campos a devolver.
+            page_size (int, optional): Registros por llamada. Por defecto se usa
+                `page_size` del config.ini.
+            order (str, optional): Orden de los resultados; activa la paginación por offset.
+            prefetch (bool): Si se pide la página siguiente en segundo plano
+                mientras se consume la actual.
+
+        Yields:
+            dict: Cada registro con los campos especificados.
+        """
+        page_size = page_size or self.page_size
+        logging.info(f"Recorriendo {model} en páginas de {page_size}")
+
+        # Las páginas no pasan por la caché: un recorrido completo la llenaría
+        def fetch(position):
+            if order:
+                return self._execute(model, "search_read", [domain, fields],
+                                     search_kwargs(page_size, position, order), use_cache=False)
+            return self._execute(model, "search_read", [domain + [("id", ">", position)], fields],
+                                 search_kwargs(page_size, order="id asc"), use_cache=False)
+
+        def next_position(position, page):
+            return position + len(page) if order else page[-1]["id"]
+
+        executor = ThreadPoolExecutor(max_workers=1) if prefetch else None
+        try:
+            position = 0
+            page = fetch(position)
+            while page:
+                pending = None
+                if len(page) == page_size:
+                    position = next_position(position, page)
+                    pending = executor.submit(fetch, position) if executor else None
+                yield from page
+                if len(page) < page_size:
+                    break
+                page = pending.result() if pending else fetch(position)
+        finally:
+            if executor:
+                executor.shutdown(wait=True, cancel_futures=True)
+
+    def write(self, model: str, ids: list, values: dict, retry_safe: bool = False) -> bool:
         """
         Actualiza los registros existentes en Odoo con los valores proporcionados.
 
@@ -104,32 +995,126 @@ class OdooXMLRPC:
             model (str): El nombre del modelo que se desea actualizar.
             ids (list): Una lista de IDs de los registros que se van a actualizar.
             values (dict): Un diccionario con los valores que se desean actualizar.
+            retry_safe (bool): Indica que repetir la escritura no tiene efectos
+                duplicados (sin comandos x2many como (0, 0, valores)), de modo que
+                el planificador la reintenta ante cualquier error transitorio.
 
         Returns:
             bool: True si la actualización fue exitosa, False si hubo algún error.
         """
         logging.info(f"Actualizando {model}registros")
-        result = self.models.execute_kw(self.db, self.uid, self.password, model, "write", [ids, values])
+        result = self._execute(model, "write", [ids, values], retry_safe=retry_safe)
         logging.info(f"Actualización exitosa: {result}")
         return result
 
-    def delete(self, model: str, ids: list) -> bool:
+    def delete(self, model: str, ids: list, chunk_size: int = None) -> bool:
         """
         Elimina los registros especificados en Odoo.
 
         Args:
             model (str): El nombre del modelo en el que se van a eliminar los registros.
             ids (list): Una lista de IDs de los registros a eliminar.
+            chunk_size (int, optional): Máximo de IDs por llamada. Por defecto se usa
+                `chunk_size` del config.ini.
 
         Returns:
             bool: True si la eliminación fue exitosa, False si hubo algún error.
+
+        Raises:
+            BulkOperationError: Si falla un bloque; indica qué IDs ya se eliminaron.
         """
-        logging.info(f"Eliminando registros en {model} con IDs {ids}")
-        result = self.models.execute_kw(self.db, self.uid, self.password, model, "unlink", [ids])
-        logging.info(f"Eliminación exitosa: {result}")
-        return result
+        chunk_size = chunk_size or self.chunk_size
+        if len(ids) <= chunk_size:
+            logging.info(f"Eliminando registros en {model} con IDs {ids}")
+            result = self._execute(model, "unlink", [ids])
+            logging.info(f"Eliminación exitosa: {result}")
+            return result
+
+        logging.info(f"Eliminando {len(ids)} registros en {model} en bloques de {chunk_size}")
+        deleted = []
+        for index, start in enumerate(range(0, len(ids), chunk_size)):
+            chunk = ids[start:start + chunk_size]
+            try:
+                self._execute(model, "unlink", [chunk])
+            except Exception as e:
+                logging.error(f"Error eliminando el bloque {index} de {model}: {e}")
+                raise BulkOperationError("unlink", model, index, start, deleted, e) from e
+            deleted.extend(chunk)
+        logging.info(f"Eliminación exitosa: {len(deleted)} registros")
+        return True
 
-    def search_count(self, model: str, domain: list) -> int:
+    def create_many(self, model: str, values_list: list, chunk_size: int = None) -> list:
+        """
+        Crea varios registros usando la forma de create con lista de Odoo,
+        enviando un bloque de registros por llamada.
+
+        Args:
+            model (str): El nombre del modelo en el que se crean los registros.
+            values_list (list): Lista de diccionarios de valores, uno por registro.
+            chunk_size (int, optional): Máximo de registros por llamada. Por defecto se
+                usa `chunk_size` del config.ini.
+
+        Returns:
+            list: Los IDs creados, en el mismo orden que `values_list`.
+
+        Raises:
+            BulkOperationError: Si falla un bloque. `done` contiene los IDs ya creados
+                y `offset` la posición en `values_list` desde la que reanudar.
+        """
+        chunk_size = chunk_size or self.chunk_size
+        logging.info(f"Creando {len(values_list)} registros en {model} en bloques de {chunk_size}")
+        ids = []
+        for index, start in enumerate(range(0, len(values_list), chunk_size)):
+            chunk = values_list[start:start + chunk_size]
+            try:
+                ids.extend(self._execute(model, "create", [chunk]))
+            except Exception as e:
+                logging.error(f"Error creando el bloque {index} de {model}: {e}")
+                raise BulkOperationError("create", model, index, start, ids, e) from e
+        logging.info(f"Registros creados: {len(ids)}")
+        return ids
+
+    def write_many(self, model: str, updates: dict, chunk_size: int = None, retry_safe: bool = False) -> bool:
+        """
+        Actualiza varios registros con valores distintos, agrupando en una sola
+        llamada write los registros que comparten exactamente los mismos valores.
+
+        Args:
+            model (str): El nombre del modelo que se desea actualizar.
+            updates (dict): Diccionario {id: valores} con los valores de cada registro.
+            chunk_size (int, optional): Máximo de IDs por llamada. Por defecto se usa
+                `chunk_size` del config.ini.
+            retry_safe (bool): Si repetir las escrituras es seguro, como en write.
+
+        Returns:
+            bool: True si todas las actualizaciones fueron exitosas.
+
+        Raises:
+            BulkOperationError: Si falla un bloque; `done` contiene los IDs ya actualizados.
+        """
+        chunk_size = chunk_size or self.chunk_size
+        groups = {}
+        for record_id, values in updates.items():
+            key = json.dumps(values, sort_keys=True, default=str)
+            groups.setdefault(key, (values, []))[1].append(record_id)
+
+        logging.info(f"Actualizando {len(updates)} registros de {model} en {len(groups)} grupos de valores")
+        written = []
+        index = 0
+        for values, ids in groups.values():
+            for start in range(0, len(ids), chunk_size):
+                chunk = ids[start:start + chunk_size]
+                try:
+                    self._execute(model, "write", [chunk, values], retry_safe=retry_safe)
+                except Exception as e:
+                    logging.error(f"Error actualizando el bloque {index} de {model}: {e}")
+                    raise BulkOperationError("write", model, index, len(written), written, e) from e
+                written.extend(chunk)
+                index += 1
+        logging.info(f"Actualización exitosa: {len(written)} registros")
+        return True
+
+    def search_count(self, model: str, domain: list, context: dict = None, use_cache: bool = True) -> int:
         """
         Cuenta el número de registros que coinciden con el dominio especificado.
 
@@ -137,15 +1122,441 @@ class OdooXMLRPC:
             model (str): El nombre del modelo en el que se realiza la búsqueda.
             domain (list): Una lista que representa el dominio de búsqueda.
                             Por ejemplo, [('field_name', '=', 'value')].
+            context (dict, optional): Contexto de Odoo, como en search.
+            use_cache (bool): Si se puede usar la caché de búsquedas, como en search.
 
         Returns:
             int: El número de registros que coinciden con el dominio.
         """
         logging.info(f"Contando registros en {model} con dominio {domain}")
-        result = self.models.execute_kw(self.db, self.uid, self.password, model, "search_count", [domain])
+        result = self._execute(model, "search_count", [domain], search_kwargs(context=context), use_cache)
         logging.info(f"Registros encontrados: {result}")
         return result
 
+    def read_group(self, model: str, domain: list, fields: list, groupby: list, orderby: str = None,
+                   limit: int = None, offset: int = 0, lazy: bool = False, use_cache: bool = True) -> list:
+        """
+        Agrupa y agrega registros en el servidor con read_group de Odoo.
+
+        Args:
+            model (str): El nombre del modelo.
+            domain (list): Dominio de los registros a agrupar.
+            fields (list): Agregados a calcular, con la sintaxis de Odoo:
+                "campo:sum", "alias:max(campo)", "campo:count_distinct"...
+            groupby (list): Campos de agrupación ("partner_id", "date:month"...).
+                Con una lista vacía se devuelve un único grupo con los totales.
+            orderby (str, optional): Orden de los grupos.
+            limit (int, optional): Número máximo de grupos.
+            offset (int): Grupos a omitir.
+            lazy (bool): Agrupar solo por el primer campo, como en las vistas de
+                Odoo. Por defecto se agrupa por todos a la vez.
+            use_cache (bool): Si se puede usar la caché de búsquedas, como en search.
+
+        Returns:
+            list: Un dict por grupo con los valores de agrupación, los agregados
+            y el número de registros ("__count", o "<campo>_count" con lazy).
+        """
+        logging.info(f"Agrupando {model} por {groupby} con dominio {domain}")
+        kwargs = search_kwargs(limit, offset)
+        if orderby:
+            kwargs["orderby"] = orderby
+        if not lazy:
+            kwargs["lazy"] = False
+        return self._execute(model, "read_group", [domain, fields, groupby], kwargs, use_cache)
+
+    def iter_read_group(self, model: str, domain: list, fields: list, groupby: list, page_size: int = None,
+                        orderby: str = None):
+        """
+        Recorre los grupos de read_group pidiéndolos por páginas, para
+        agrupaciones con muchos grupos (p. ej. por cliente y mes).
+
+        Yields:
+            dict: Cada grupo, como en read_group.
+        """
+        page_size = page_size or self.page_size
+        offset = 0
+        while True:
+            page = self.read_group(model, domain, fields, groupby, orderby, limit=page_size, offset=offset,
+                                   use_cache=False)
+            yield from page
+            if len(page) < page_size:
+                break
+            offset += page_size
+
+    def read_group_frame(self, model: str, domain: list, fields: list, groupby: list, page_size: int = None,
+                         orderby: str = None) -> "pd.DataFrame":
+        """
+        read_group con el resultado en un DataFrame de pandas, construido por
+        páginas de `page_size` grupos.
+
+        Los valores de agrupación many2one ([id, nombre]) se separan en las
+        columnas `<campo>` (id) y `<campo>_name`, el número de registros va en la
+        columna `count` y se omiten las claves internas (__domain, __context...).
+
+        Returns:
+            pd.DataFrame: Una fila por grupo.
+        """
+        import pandas as pd
+
+        page_size = page_size or self.page_size
+        frames = []
+        rows = []
+        for group in self.iter_read_group(model, domain, fields, groupby, page_size, orderby):
+            rows.append(group_to_row(group))
+            if len(rows) >= page_size:
+                frames.append(pd.DataFrame.from_records(rows))
+                rows = []
+        if rows or not frames:
+            frames.append(pd.DataFrame.from_records(rows))
+        return pd.concat(frames, ignore_index=True) if len(frames) > 1 else frames[0]
+
+    def _bucket_groups(self, model: str, domains: dict, fields: list = None):
+        """
+        Resuelve con un único read_group varios dominios que solo filtran por
+        igualdad los mismos campos (ver domain_buckets).
+
+        Returns:
+            dict: {etiqueta: [grupos de read_group que cubre el dominio]}, o
+            None si los dominios no tienen esa forma, algún campo no es de un
+            tipo agrupable o se filtra por texto un campo que no es char ni
+            selection (p. ej. el nombre en un many2one).
+        """
+        buckets = domain_buckets(domains)
+        if buckets is None:
+            return None
+        group_fields, values = buckets
+        types = self._field_types(model)
+        for index, field in enumerate(group_fields):
+            if types.get(field) not in GROUPABLE_FIELD_TYPES:
+                return None
+            if types[field] not in STRING_FIELD_TYPES and any(isinstance(item, str) for bucket in values.values()
+                                                              for item in bucket[index]):
+                return None
+
+        domain = [(field, "in", list(dict.fromkeys(item for bucket in values.values() for item in bucket[index])))
+                  for index, field in enumerate(group_fields)]
+        groups = {}
+        for group in self.read_group(model, domain, fields or ["id:count"], group_fields):
+            groups[tuple(_group_key(group[field]) for field in group_fields)] = group
+        # Sin repetidos: un valor duplicado en un "in" contaría su grupo dos veces
+        return {label: [groups[key] for key in itertools.product(*[list(dict.fromkeys(_group_key(item)
+                                                                                      for item in items))
+                                                                    for items in bucket])
+                        if key in groups]
+                for label, bucket in values.items()}
+
+    def _field_types(self, model: str) -> dict:
+        """
+        Tipos de los campos de un modelo ({campo: tipo}), pedidos a Odoo una
+        sola vez por instancia (clear_cache los vuelve a pedir).
+        """
+        types = self._field_type_cache.get(model)
+        if types is None:
+            types = {field: attributes.get("type") for field, attributes in self.fields_get(model, ["type"]).items()}
+            self._field_type_cache[model] = types
+        return types
+
+    def count_many(self, model: str, domains) -> dict:
+        """
+        Cuenta los registros de varios dominios.
+
+        Si todos los dominios filtran solo por igualdad los mismos campos (p. ej.
+        equipo y estado), se resuelven con un único read_group. En otro caso se
+        envían los search_count en lotes con OdooBatch: una petición por cada
+        `batch_size` dominios si el servidor acepta system.multicall. Odoo no
+        lo registra de serie, y sin multicall es una petición por dominio.
+
+        Args:
+            model (str): El nombre del modelo.
+            domains: dict {etiqueta: dominio} o lista de dominios.
+
+        Returns:
+            dict: {etiqueta: número de registros}; con una lista, las etiquetas
+            son los índices de los dominios.
+        """
+        domains = domains if isinstance(domains, dict) else dict(enumerate(domains))
+        logging.info(f"Contando {len(domains)} dominios en {model}")
+        grouped = self._bucket_groups(model, domains)
+        if grouped is not None:
+            return {label: sum(group["__count"] for group in groups) for label, groups in grouped.items()}
+        with self.batch() as batch:
+            calls = {label: batch.search_count(model, domain) for label, domain in domains.items()}
+        return {label: call.result for label, call in calls.items()}
+
+    def aggregate_many(self, model: str, domains, fields: list = None) -> "pd.DataFrame":
+        """
+        Calcula el número de registros y los agregados de `fields` de varios
+        dominios.
+
+        Si cada dominio selecciona un único valor de los mismos campos (p. ej.
+        [("team_id", "=", 1), ("state", "=", "sale")]), todos salen de un único
+        read_group agrupado por esos campos. En otro caso se envía un read_group
+        sin agrupación por dominio en lotes con OdooBatch, que sin
+        system.multicall (no registrado en Odoo de serie) es una petición por
+        dominio.
+
+        Args:
+            model (str): El nombre del modelo.
+            domains: dict {etiqueta: dominio} o lista de dominios.
+            fields (list, optional): Agregados como en read_group, p. ej.
+                ["amount_total:sum"]. Sin agregados solo se cuenta.
+
+        Returns:
+            pd.DataFrame: Una fila por dominio, indexada por su etiqueta, con la
+            columna `count` y una por agregado.
+        """
+        import pandas as pd
+
+        if not fields:
+            counts = self.count_many(model, domains)
+            return pd.DataFrame({"count": pd.Series(counts, dtype="int64")})
+
+        domains = domains if isinstance(domains, dict) else dict(enumerate(domains))
+        logging.info(f"Agregando {fields} de {len(domains)} dominios en {model}")
+        buckets = domain_buckets(domains)
+        if buckets is not None and all(len(items) == 1 for bucket in buckets[1].values() for items in bucket):
+            grouped = self._bucket_groups(model, domains, fields)
+            if grouped is not None:
+                rows = []
+                for groups in grouped.values():
+                    row = group_to_row(groups[0]) if groups else {"count": 0}
+                    for field in buckets[0]:
+                        row.pop(field, None)
+                        row.pop(f"{field}_name", None)
+                    rows.append(row)
+                return pd.DataFrame.from_records(rows, index=list(grouped))
+
+        with self.batch() as batch:
+            calls = {label: batch.read_group(model, domain, fields, []) for label, domain in domains.items()}
+
+        rows = [group_to_row(call.result[0]) if call.result else {"count": 0} for call in calls.values()]
+        return pd.DataFrame.from_records(rows, index=list(calls))
+
+    def find_attachment(self, checksum: str, res_model: str = None, res_id: int = None):
+        """
+        Busca un adjunto con el mismo contenido, usando el checksum (SHA-1 del
+        contenido binario) que Odoo guarda en ir.attachment.
+
+        Solo se consideran los adjuntos del mismo registro: sin `res_model`
+        ni `res_id` se buscan los adjuntos no vinculados a ningún registro, y
+        con solo `res_model` los del modelo sin registro concreto.
+
+        Args:
+            checksum (str): SHA-1 en hexadecimal del contenido del archivo.
+            res_model (str, optional): Modelo del registro al que está adjunto.
+            res_id (int, optional): ID del registro al que está adjunto.
+
+        Returns:
+            int: El ID del adjunto existente, o False si no hay ninguno.
+        """
+        domain = [("checksum", "=", checksum),
+                  ("res_model", "=", res_model or False),
+                  ("res_id", "=", res_id or False)]
+        ids = self.search("ir.attachment", domain, limit=1)
+        return ids[0] if ids else False
+
+    def fields_get(self, model: str, attributes: list = None) -> dict:
+        """
+        Devuelve la definición de los campos de un modelo.
+
+        Args:
+            model (str): El nombre del modelo.
+            attributes (list, optional): Atributos de cada campo a devolver,
+                por ejemplo ["string", "type", "required"]. Por defecto, todos.
+
+        Returns:
+            dict: Diccionario {campo: atributos}.
+        """
+        kwargs = {"attributes": attributes} if attributes else None
+        return self._execute(model, "fields_get", [], kwargs)
+
+
+class BulkOperationError(Exception):
+    """
+    Error en una operación por bloques. Indica qué bloque falló y qué parte de
+    la operación ya se completó, para poder reanudar sin repetirla entera.
+
+    Attributes:
+        operation (str): Operación de Odoo (create, write, unlink).
+        model (str): El modelo afectado.
+        chunk_index (int): Índice del bloque que falló.
+        offset (int): Número de elementos procesados antes del bloque fallido.
+        done (list): IDs creados, actualizados o eliminados antes del fallo.
+    """
+
+    def __init__(self, operation: str, model: str, chunk_index: int, offset: int, done: list, error: Exception):
+        self.operation = operation
+        self.model = model
+        self.chunk_index = chunk_index
+        self.offset = offset
+        self.done = done
+        self.error = error
+        super().__init__(f"Error en {operation} de {model}, bloque {chunk_index} (posición {offset}): {error}")
+
+
+class BatchCall:
+    """
+    Resultado diferido de una llamada encolada en un OdooBatch.
+    """
+
+    def __init__(self, model: str, method: str, args: list, kwargs: dict = None):
+        self.model = model
+        self.method = method
+        self.args = args
+        self.kwargs = kwargs or {}
+        self.done = False
+        self.error = None
+        self._result = None
+
+    def set_result(self, result):
+        self._result = result
+        self.done = True
+
+    def set_error(self, error: Exception):
+        self.error = error
+        self.done = True
+
+    @property
+    def result(self):
+        """
+        Devuelve el resultado de la llamada o lanza el error recibido de Odoo.
+        """
+        if not self.done:
+            raise RuntimeError(f"La llamada {self.model}.{self.method} aún no se ha enviado")
+        if self.error is not None:
+            raise self.error
+        return self._result
+
+
+class OdooBatch:
+    """
+    Acumula llamadas execute_kw y las envía en una sola petición HTTP usando
+    system.multicall. Si el servidor no soporta multicall, las llamadas se
+    envían una a una por la misma conexión.
+
+    Odoo de serie no registra system.multicall: sin un servidor que lo añada
+    un lote no ahorra peticiones. Para altas, escrituras y bajas masivas
+    create_many, write_many y delete agrupan los registros en cada llamada
+    y no dependen de multicall.
+    """
+
+    def __init__(self, client: OdooXMLRPC, flush_size: int = 100):
+        self.client = client
+        self.flush_size = max(1, flush_size)
+        self.pending = []
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        if exc_type is None:
+            self.flush()
+        else:
+            self.pending = []
+        return False
+
+    def execute(self, model: str, method: str, args: list, kwargs: dict = None) -> BatchCall:
+        """
+        Encola una llamada execute_kw y devuelve su resultado diferido.
+        """
+        call = BatchCall(model, method, args, kwargs)
+        self.pending.append(call)
+        if len(self.pending) >= self.flush_size:
+            self.flush()
+        return call
+
+    def create(self, model: str, values: dict) -> BatchCall:
+        return self.execute(model, "create", [values])
+
+    def search(self, model: str, domain: list, limit: int = 20, offset: int = 0, order: str = None) -> BatchCall:
+        return self.execute(model, "search", [domain], search_kwargs(limit, offset, order))
+
+    def search_read(self, model: str, domain: list, fields: list, limit: int = 10, offset: int = 0,
+                    order: str = None) -> BatchCall:
+        return self.execute(model, "search_read", [domain, fields], search_kwargs(limit, offset, order))
+
+    def write(self, model: str, ids: list, values: dict) -> BatchCall:
+        return self.execute(model, "write", [ids, values])
+
+    def delete(self, model: str, ids: list) -> BatchCall:
+        return self.execute(model, "unlink", [ids])
+
+    def search_count(self, model: str, domain: list) -> BatchCall:
+        return self.execute(model, "search_count", [domain])
+
+    def read_group(self, model: str, domain: list, fields: list, groupby: list, lazy: bool = False) -> BatchCall:
+        return self.execute(model, "read_group", [domain, fields, groupby], None if lazy else {"lazy": False})
+
+    def flush(self) -> list:
+        """
+        Envía las llamadas pendientes y asigna a cada una su resultado o error.
+
+        Returns:
+            list: Las llamadas enviadas, en el orden en que se encolaron.
+        """
+        calls, self.pending = self.pending, []
+        if not calls:
+            return calls
+
+        client = self.client
+        logging.info(f"Enviando lote de {len(calls)} llamadas a Odoo")
+
+        if client.use_multicall:
+            def send(uid):
+                multicall = xmlrpc.client.MultiCall(client.models)
+                for call in calls:
+                    params = [client.db, uid, client.password, call.model, call.method, call.args]
+                    if call.kwargs:
+                        params.append(call.kwargs)
+                    multicall.execute_kw(*params)
+                results = client._send([call.method for call in calls], multicall).results
+                # Con el uid obsoleto fallan todas las llamadas del lote: se
+                # lanza el Access Denied para que se reautentique y se reenvíe
+                for item in results:
+                    if isinstance(item, dict) and is_access_denied(item.get("faultString")):
+                        raise xmlrpc.client.Fault(item["faultCode"], item["faultString"])
+                return results
+
+            try:
+                results = client._authenticated_call("*", "system.multicall", send, calls=len(calls))
+            except xmlrpc.client.Fault as e:
+                if not is_missing_multicall(e.faultString):
+                    # Error de la petición entera (p. ej. Access Denied tras reautenticar)
+                    for call in calls:
+                        call.set_error(e)
+                    return calls
+                logging.warning(f"El servidor no soporta system.multicall, se envían las llamadas una a una: {e}")
+                client.use_multicall = False
+            except Exception as e:
+                for call in calls:
+                    call.set_error(e)
+                raise
+            else:
+                for call, item in zip(calls, results):
+                    if isinstance(item, dict):
+                        call.set_error(xmlrpc.client.Fault(item["faultCode"], item["faultString"]))
+                    else:
+                        call.set_result(item[0])
+                return calls
+            finally:
+                if client.cache is not None:
+                    for call in calls:
+                        if call.method not in client.CACHEABLE_METHODS:
+                            client.cache.invalidate(call.model)
+
+        for index, call in enumerate(calls):
+            try:
+                call.set_result(client._execute(call.model, call.method, call.args, call.kwargs))
+            except xmlrpc.client.Fault as e:
+                call.set_error(e)
+            except Exception as e:
+                # Error de red o circuito abierto: las llamadas que quedan no se
+                # envían, pero no se dejan sin resultado ni error
+                for pending in calls[index:]:
+                    pending.set_error(e)
+                raise
+        return calls
+
 
 # Uso de la clase (ejemplo):
 # odoo = OdooXMLRPC()
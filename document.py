@@ -1,19 +1,716 @@
+from __future__ import annotations
+
 import configparser
 import logging
 import base64
-import PyPDF2
-import ocrmypdf
+import importlib
+import importlib.util
 import os
-
-# Agregar a las importaciones existentes
-import fitz  # PyMuPDF
-import numpy as np
-
-# Agregar a las importaciones existentes:
 import csv
+import hashlib
+import io
+import json
+import shutil
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor
 from datetime import datetime
-from typing import Dict, Tuple, List
-import pandas as pd
+from typing import Dict, Tuple, List, Optional
+
+import metrics
+
+
+class _LazyModule:
+    """
+    Módulo que se importa la primera vez que se accede a uno de sus
+    atributos, para que importar document.py no cargue PyMuPDF, NumPy,
+    pandas ni ocrmypdf si no se van a usar (p. ej. solo para pdf_to_base64).
+    """
+
+    def __init__(self, name: str, package: str = None):
+        self._name = name
+        self._package = package or name
+        self._module = None
+
+    def _load(self):
+        if self._module is None:
+            try:
+                self._module = importlib.import_module(self._name)
+            except ImportError as e:
+                raise ImportError(f"Esta función de document.py necesita el paquete {self._package}: "
+                                  f"pip install -r requirements.txt") from e
+        return self._module
+
+    def __getattr__(self, attr):
+        return getattr(self._load(), attr)
+
+    def __repr__(self):
+        state = "cargado" if self._module is not None else "sin cargar"
+        return f"<módulo diferido {self._name!r} ({state})>"
+
+
+fitz = _LazyModule("fitz", "PyMuPDF")
+np = _LazyModule("numpy")
+pd = _LazyModule("pandas")
+ocrmypdf = _LazyModule("ocrmypdf")
+
+try:
+    import fcntl
+except ImportError:  # Windows: sin bloqueo entre procesos
+    fcntl = None
+
+# Bytes leídos por bloque al codificar en Base64 por partes (múltiplo de 3,
+# para que los bloques codificados se puedan concatenar sin relleno intermedio)
+BASE64_CHUNK_SIZE = 3 * 256 * 1024
+
+
+# Niveles de optimize_pdf_bytes, de menor a mayor pérdida de calidad: resolución
+# máxima de las imágenes (None = no se tocan) y calidad JPEG al recomprimirlas
+SIZE_OPTIMIZATION_LEVELS = [
+    {"dpi": None, "quality": None},
+    {"dpi": 200, "quality": 85},
+    {"dpi": 150, "quality": 75},
+    {"dpi": 100, "quality": 60},
+]
+
+
+def _image_rewrite_options(dpi: int, quality: int):
+    """
+    Opciones de Document.rewrite_images: reducción bicúbica a `dpi` de las
+    imágenes que lo superan en más de un 25% (MuPDF reduce por factores
+    enteros, así que el resultado queda en `dpi` o algo por debajo) y
+    recompresión JPEG, o CCITT G4 para blanco y negro, solo si el resultado
+    ocupa menos que la imagen original.
+    """
+    mupdf = fitz.mupdf
+    threshold = dpi + dpi // 4
+    options = mupdf.PdfImageRewriterOptions()
+    for kind in ("color_lossless", "color_lossy", "gray_lossless", "gray_lossy", "bitonal"):
+        method = mupdf.FZ_RECOMPRESS_FAX if kind == "bitonal" else mupdf.FZ_RECOMPRESS_JPEG
+        setattr(options, f"{kind}_image_recompress_method", method)
+        setattr(options, f"{kind}_image_recompress_quality", str(quality))
+        setattr(options, f"{kind}_image_subsample_method", mupdf.FZ_SUBSAMPLE_BICUBIC)
+        setattr(options, f"{kind}_image_subsample_threshold", threshold)
+        setattr(options, f"{kind}_image_subsample_to", dpi)
+    options.recompress_when = mupdf.FZ_RECOMPRESS_WHEN_SMALLER
+    return options
+
+
+def rewrite_pdf(source, dpi: Optional[int] = None, quality: Optional[int] = None) -> bytes:
+    """
+    Reescribe un PDF para reducir su tamaño: elimina y deduplica objetos,
+    comprime los flujos y, si se indica `dpi`, reduce las imágenes que lo
+    superan y las recomprime (JPEG, o CCITT G4 las de blanco y negro).
+
+    Args:
+        source: Ruta del PDF o su contenido en bytes.
+        dpi: Resolución máxima de las imágenes, o None para no tocarlas.
+        quality: Calidad JPEG (0-100) de las imágenes recomprimidas.
+
+    Returns:
+        bytes: El PDF reescrito.
+    """
+    doc = fitz.open("pdf", source) if isinstance(source, (bytes, bytearray)) else fitz.open(source)
+    try:
+        if dpi:
+            doc.rewrite_images(options=_image_rewrite_options(dpi, quality or 75))
+        return doc.tobytes(garbage=4, deflate=True, deflate_images=True, deflate_fonts=True, use_objstms=1,
+                           no_new_id=True)
+    finally:
+        doc.close()
+
+
+def linearize_pdf(data: bytes) -> bytes:
+    """
+    Linealiza un PDF ("fast web view") con pikepdf, para que los visores
+    puedan mostrar la primera página antes de descargarlo completo.
+    """
+    import pikepdf
+
+    with pikepdf.open(io.BytesIO(data)) as pdf:
+        output = io.BytesIO()
+        pdf.save(output, linearize=True, object_stream_mode=pikepdf.ObjectStreamMode.generate,
+                 deterministic_id=True)
+    return output.getvalue()
+
+
+def compute_page_stats(page, color_threshold: int = 240, precision: Optional[int] = 2) -> Tuple[float, float]:
+    """
+    Calcula estadísticas de una página.
+
+    Args:
+        page: Página del PDF a analizar
+        color_threshold: Umbral para considerar un píxel como blanco
+        precision: Decimales a los que se redondean los porcentajes, o None para no redondear
+
+    Returns:
+        Tuple[float, float]: (porcentaje de píxeles no blancos, porcentaje de área con contenido)
+    """
+    pix = page.get_pixmap()
+    total_pixels = pix.h * pix.w
+
+    if pix.n < 3:
+        img_array = np.frombuffer(pix.samples, dtype=np.uint8).reshape(pix.h, pix.w)
+        non_white_pixels = img_array < color_threshold
+    else:
+        img_array = np.frombuffer(pix.samples, dtype=np.uint8).reshape(pix.h, pix.w, pix.n)
+        non_white_pixels = np.any(img_array[:, :, :3] < color_threshold, axis=2)
+
+    percent_non_white = (np.sum(non_white_pixels) / total_pixels * 100)
+
+    text_area = 0
+    for block in page.get_text("blocks"):
+        text_area += (block[2] - block[0]) * (block[3] - block[1])
+    percent_content_area = (text_area / total_pixels) * 100 if text_area else 0
+
+    if precision is None:
+        return float(percent_non_white), float(percent_content_area)
+    return round(percent_non_white, precision), round(percent_content_area, precision)
+
+
+# Estadísticas por página de page_range_stats_array (page_num empieza en 1;
+# las páginas que no se pudieron analizar tienen NaN y is_blank False). El
+# dtype se crea al usarlo por primera vez, para no importar NumPy antes.
+PAGE_STATS_FIELDS = [
+    ("page_num", "int32"),
+    ("non_white_percent", "float64"),
+    ("content_area", "float64"),
+    ("is_blank", "bool"),
+]
+_page_stats_dtype = None
+
+
+def page_stats_dtype():
+    """
+    Devuelve el dtype de NumPy de PAGE_STATS_FIELDS.
+    """
+    global _page_stats_dtype
+    if _page_stats_dtype is None:
+        _page_stats_dtype = np.dtype(PAGE_STATS_FIELDS)
+    return _page_stats_dtype
+
+
+def __getattr__(name):
+    # document.PAGE_STATS_DTYPE sigue disponible, creado al pedirlo
+    if name == "PAGE_STATS_DTYPE":
+        return page_stats_dtype()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+
+class PixelCounter:
+    """
+    Cuenta los píxeles no blancos de pixmaps reutilizando los arrays
+    intermedios entre páginas del mismo tamaño.
+
+    Args:
+        color_threshold (int): Umbral para considerar un píxel como blanco (0-255).
+        step (int): Cuenta solo uno de cada `step` píxeles en cada eje, sobre
+            una vista sin copia; 1 cuenta todos.
+    """
+
+    def __init__(self, color_threshold: int = 240, step: int = 1):
+        self.color_threshold = color_threshold
+        self.step = max(1, step)
+        self._buffers = {}
+
+    def _buffer(self, name: str, shape: tuple, dtype) -> np.ndarray:
+        buffer = self._buffers.get(name)
+        if buffer is None or buffer.shape != shape:
+            buffer = self._buffers[name] = np.empty(shape, dtype=dtype)
+        return buffer
+
+    def count(self, pix) -> Tuple[int, int]:
+        """
+        Returns:
+            Tuple[int, int]: (píxeles no blancos, píxeles contados)
+        """
+        # samples_mv expone los píxeles del pixmap sin copiarlos
+        samples = np.frombuffer(pix.samples_mv, dtype=np.uint8)
+        step = self.step
+        if pix.n < 3:
+            image = samples.reshape(pix.h, pix.w, pix.n)[::step, ::step, 0]
+        else:
+            # Un píxel es no blanco si algún canal está por debajo del umbral,
+            # es decir, si lo está el mínimo de sus canales. np.minimum canal a
+            # canal es mucho más rápido que reducir sobre el eje de 3 elementos
+            channels = samples.reshape(pix.h, pix.w, pix.n)[::step, ::step]
+            image = np.minimum(channels[:, :, 0], channels[:, :, 1],
+                               out=self._buffer("min", channels.shape[:2], np.uint8))
+            np.minimum(image, channels[:, :, 2], out=image)
+        mask = np.less(image, self.color_threshold, out=self._buffer("mask", image.shape, np.bool_))
+        return int(np.count_nonzero(mask)), mask.size
+
+
+def page_range_stats_array(pdf_path: str, start: int, end: int, color_threshold: int = 240,
+                           grayscale: bool = False, step: int = 1) -> np.ndarray:
+    """
+    Calcula las estadísticas sin redondear de las páginas [start, end) de un
+    PDF en un array estructurado con PAGE_STATS_DTYPE. Abre el documento por
+    su cuenta para poder ejecutarse en un proceso aparte.
+
+    Con los valores por defecto el resultado coincide con compute_page_stats.
+    `grayscale` rasteriza en escala de grises (compara la luminancia, no cada
+    canal) y `step` cuenta uno de cada `step` píxeles por eje; ambos son
+    aproximaciones más rápidas.
+    """
+    result = np.zeros(max(0, end - start), dtype=page_stats_dtype())
+    counter = PixelCounter(color_threshold, step)
+    colorspace = fitz.csGRAY if grayscale else fitz.csRGB
+    doc = fitz.open(pdf_path)
+    try:
+        for index, page_num in enumerate(range(start, end)):
+            row = result[index]
+            row["page_num"] = page_num + 1
+            try:
+                page = doc.load_page(page_num)
+                pix = page.get_pixmap(colorspace=colorspace)
+                non_white, counted = counter.count(pix)
+                text_area = sum((block[2] - block[0]) * (block[3] - block[1]) for block in page.get_text("blocks"))
+                non_white_percent = non_white / counted * 100
+                # Como en compute_page_stats, el área se mide sobre los píxeles del pixmap completo
+                content_area = text_area / (pix.h * pix.w) * 100 if text_area else 0
+            except Exception as e:
+                logging.error(f"Error analizando la página {page_num + 1} de {pdf_path}: {e}")
+                row["non_white_percent"] = row["content_area"] = np.nan
+                continue
+            row["non_white_percent"] = non_white_percent
+            row["content_area"] = content_area
+            row["is_blank"] = is_blank_stats((non_white_percent, content_area))
+    finally:
+        doc.close()
+    return result
+
+
+def page_range_stats(pdf_path: str, start: int, end: int,
+                     color_threshold: int = 240) -> List[Optional[Tuple[float, float]]]:
+    """
+    Calcula las estadísticas sin redondear de las páginas [start, end) de un PDF.
+    Abre el documento por su cuenta para poder ejecutarse en un proceso aparte.
+
+    Returns:
+        List[Optional[Tuple[float, float]]]: Estadísticas por página, o None para
+        las páginas que no se pudieron analizar.
+    """
+    stats = page_range_stats_array(pdf_path, start, end, color_threshold)
+    return [None if np.isnan(non_white_percent) else (float(non_white_percent), float(content_area))
+            for non_white_percent, content_area in zip(stats["non_white_percent"].tolist(),
+                                                       stats["content_area"].tolist())]
+
+
+def fast_is_blank(page, color_threshold: int = 240, dpi: int = 72, grayscale: bool = False,
+                  band_rows: int = 64) -> bool:
+    """
+    Clasificador rápido de páginas en blanco con los mismos umbrales que
+    is_blank_stats (2.7% de píxeles no blancos y 1% de área de texto).
+
+    Evita rasterizar cuando el resultado ya se conoce: una página sin contenido
+    ni anotaciones está en blanco, y una cuyos bloques de texto ocupan el 1% o
+    más tiene contenido. En otro caso rasteriza a `dpi` (en escala de grises si
+    se indica) y deja de contar píxeles al superar el 2.7%.
+
+    Args:
+        page: Página del PDF a analizar
+        color_threshold: Umbral para considerar un píxel como blanco (0-255)
+        dpi: Resolución de la rasterización
+        grayscale: Si se rasteriza en escala de grises en lugar de RGB. Es más
+            rápido, pero un fondo de color claro puede tener una luminancia por
+            encima del umbral aunque algún canal esté por debajo, y la página se
+            clasifica en blanco cuando el clasificador completo no lo haría.
+        band_rows: Filas de píxeles que se cuentan entre comprobaciones del umbral
+
+    Returns:
+        bool: True si la página está en blanco, False en caso contrario
+    """
+    if not page.read_contents().strip() and page.first_annot is None and page.first_widget is None:
+        return True
+
+    # El área de texto se mide, como en compute_page_stats, sobre los píxeles a 72 dpi
+    page_rect = page.rect.irect
+    page_pixels = page_rect.width * page_rect.height
+    text_area = 0
+    for block in page.get_text("blocks"):
+        text_area += (block[2] - block[0]) * (block[3] - block[1])
+    if page_pixels and text_area / page_pixels * 100 >= 1.0:
+        return False
+
+    pix = page.get_pixmap(dpi=dpi, colorspace=fitz.csGRAY if grayscale else fitz.csRGB, alpha=False)
+    total_pixels = pix.h * pix.w
+    if not total_pixels:
+        return True
+    limit = total_pixels * 2.7 / 100
+
+    img_array = np.frombuffer(pix.samples, dtype=np.uint8).reshape(pix.h, pix.w, pix.n)
+
+    non_white = 0
+    for row in range(0, pix.h, band_rows):
+        band = img_array[row:row + band_rows]
+        if pix.n == 1:
+            band = band[:, :, 0]
+        else:
+            # Un píxel es blanco si todos sus canales lo son, como en compute_page_stats;
+            # np.minimum entre canales es mucho más rápido que min(axis=2)
+            band = np.minimum(np.minimum(band[:, :, 0], band[:, :, 1]), band[:, :, 2])
+        non_white += np.count_nonzero(band < color_threshold)
+        if non_white >= limit:
+            return False
+    return True
+
+
+def page_range_blank_flags(pdf_path: str, start: int, end: int, color_threshold: int = 240,
+                           dpi: int = 72, grayscale: bool = False) -> List[bool]:
+    """
+    Clasifica con fast_is_blank las páginas [start, end) de un PDF. Abre el
+    documento por su cuenta para poder ejecutarse en un proceso aparte.
+    Las páginas que no se pudieron analizar se consideran con contenido.
+    """
+    flags = []
+    doc = fitz.open(pdf_path)
+    try:
+        for page_num in range(start, end):
+            try:
+                flags.append(fast_is_blank(doc.load_page(page_num), color_threshold, dpi, grayscale))
+            except Exception as e:
+                logging.error(f"Error analizando la página {page_num + 1} de {pdf_path}: {e}")
+                flags.append(False)
+    finally:
+        doc.close()
+    return flags
+
+
+def page_text_chars(page) -> int:
+    """
+    Cuenta los caracteres de la capa de texto de una página, a partir de los
+    mismos bloques de texto que usa el detector de páginas en blanco.
+    """
+    chars = 0
+    for block in page.get_text("blocks"):
+        # block[6] == 0 indica un bloque de texto (1 es una imagen)
+        if block[6] == 0:
+            chars += len("".join(block[4].split()))
+    return chars
+
+
+def page_range_text_flags(pdf_path: str, start: int, end: int, min_chars: int = 20) -> List[bool]:
+    """
+    Indica para las páginas [start, end) de un PDF si ya tienen capa de texto
+    (al menos `min_chars` caracteres). Abre el documento por su cuenta para
+    poder ejecutarse en un proceso aparte. Las páginas que no se pudieron
+    analizar se consideran escaneadas.
+    """
+    flags = []
+    doc = fitz.open(pdf_path)
+    try:
+        for page_num in range(start, end):
+            try:
+                flags.append(page_text_chars(doc.load_page(page_num)) >= min_chars)
+            except Exception as e:
+                logging.error(f"Error leyendo el texto de la página {page_num + 1} de {pdf_path}: {e}")
+                flags.append(False)
+    finally:
+        doc.close()
+    return flags
+
+
+def is_blank_stats(stats: Optional[Tuple[float, float]]) -> bool:
+    """
+    Indica si unas estadísticas de página corresponden a una página en blanco.
+    Las páginas que no se pudieron analizar se consideran con contenido.
+    """
+    if stats is None:
+        return False
+    non_white_percent, content_area = stats
+    return non_white_percent < 2.7 and content_area < 1.0
+
+
+class PageAnalysis:
+    """
+    Resultado del análisis de todas las páginas de un PDF, calculado una sola
+    vez y compartido por el reporte, las estadísticas y la eliminación de
+    páginas en blanco.
+
+    Attributes:
+        pdf_path (str): Ruta del PDF analizado.
+        sha256 (str): Hash del contenido del archivo.
+        mtime_ns (int): Fecha de modificación del archivo al analizarlo.
+        page_stats (list): Estadísticas sin redondear por página, o None si la
+            página no se pudo analizar.
+    """
+
+    def __init__(self, pdf_path: str, sha256: str, mtime_ns: int, page_stats: List[Optional[Tuple[float, float]]]):
+        self.pdf_path = pdf_path
+        self.sha256 = sha256
+        self.mtime_ns = mtime_ns
+        self.page_stats = page_stats
+
+    @property
+    def total_pages(self) -> int:
+        return len(self.page_stats)
+
+    @property
+    def blank_pages(self) -> List[int]:
+        """
+        Índices (desde 0) de las páginas en blanco.
+        """
+        return [page_num for page_num, stats in enumerate(self.page_stats) if is_blank_stats(stats)]
+
+    def is_blank(self, page_num: int) -> bool:
+        return is_blank_stats(self.page_stats[page_num])
+
+    def rounded_stats(self, page_num: int) -> Tuple[float, float]:
+        """
+        Estadísticas de una página redondeadas a dos decimales, como en el reporte.
+
+        Raises:
+            ValueError: Si la página no se pudo analizar.
+        """
+        stats = self.page_stats[page_num]
+        if stats is None:
+            raise ValueError(f"No se pudo analizar la página {page_num + 1}")
+        return round(stats[0], 2), round(stats[1], 2)
+
+
+def file_checksum(path: str, algorithm: str = "sha256", chunk_size: int = 1024 * 1024) -> str:
+    """
+    Calcula el hash de un archivo leyéndolo por bloques.
+
+    Args:
+        path: Ruta al archivo
+        algorithm: Algoritmo de hashlib (sha256, sha1...)
+
+    Returns:
+        str: El hash en hexadecimal.
+    """
+    digest = hashlib.new(algorithm)
+    with open(path, "rb") as file:
+        for chunk in iter(lambda: file.read(chunk_size), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+class DocumentCache:
+    """
+    Caché en disco, direccionada por contenido, de documentos ya procesados.
+
+    Cada entrada guarda el PDF resultante y sus estadísticas bajo una clave
+    calculada con el SHA-256 del PDF original y las opciones del proceso. Al
+    superar `max_size_mb` se eliminan las entradas usadas hace más tiempo.
+
+    Args:
+        cache_dir (str): Directorio de la caché.
+        max_size_mb (float): Tamaño máximo de la caché en MB.
+    """
+
+    def __init__(self, cache_dir: str, max_size_mb: float = 2048.0):
+        self.cache_dir = cache_dir
+        self.max_size_bytes = int(max_size_mb * 1024 * 1024)
+        os.makedirs(cache_dir, exist_ok=True)
+
+    @staticmethod
+    def make_key(pdf_path: str, options: dict) -> str:
+        """
+        Calcula la clave de un documento y unas opciones de proceso.
+        """
+        content_hash = file_checksum(pdf_path)
+        return hashlib.sha256(f"{content_hash}:{json.dumps(options, sort_keys=True)}".encode("utf-8")).hexdigest()
+
+    def _paths(self, key: str) -> Tuple[str, str]:
+        base = os.path.join(self.cache_dir, key[:2], key)
+        return base + ".pdf", base + ".json"
+
+    def get(self, key: str, dest_path: str) -> Optional[dict]:
+        """
+        Busca una entrada en la caché y, si existe, deja una copia del PDF en
+        `dest_path` (un enlace duro cuando es posible), para que un desalojo
+        posterior no afecte a quien la usa.
+
+        Returns:
+            Optional[dict]: Estadísticas guardadas con el PDF, o None si no está en la caché.
+        """
+        cached_pdf, stats_path = self._paths(key)
+        try:
+            with open(stats_path, encoding="utf-8") as file:
+                stats = json.load(file)
+            try:
+                os.link(cached_pdf, dest_path)
+            except OSError:
+                shutil.copyfile(cached_pdf, dest_path)
+            # La fecha de modificación marca el último uso para el desalojo LRU
+            os.utime(cached_pdf)
+            os.utime(stats_path)
+        except (OSError, ValueError):
+            return None
+        return stats
+
+    def put(self, key: str, pdf_path: str, stats: dict) -> str:
+        """
+        Guarda una copia del PDF procesado y sus estadísticas.
+
+        Returns:
+            str: Ruta del PDF dentro de la caché.
+        """
+        cached_pdf, stats_path = self._paths(key)
+        os.makedirs(os.path.dirname(cached_pdf), exist_ok=True)
+
+        # Se escribe en archivos temporales y se renombran para que otros
+        # procesos nunca lean una entrada a medias
+        temp_suffix = f".{os.getpid()}.tmp"
+        shutil.copyfile(pdf_path, cached_pdf + temp_suffix)
+        with open(stats_path + temp_suffix, "w", encoding="utf-8") as file:
+            json.dump(stats, file)
+        os.replace(cached_pdf + temp_suffix, cached_pdf)
+        os.replace(stats_path + temp_suffix, stats_path)
+
+        self.evict()
+        return cached_pdf
+
+    def evict(self):
+        """
+        Elimina las entradas usadas hace más tiempo hasta respetar el tamaño máximo.
+        """
+        entries = []
+        total_size = 0
+        for root, dirs, files in os.walk(self.cache_dir):
+            for name in files:
+                if name.endswith(".pdf"):
+                    path = os.path.join(root, name)
+                    try:
+                        stat = os.stat(path)
+                    except OSError:
+                        continue
+                    entries.append((stat.st_mtime, stat.st_size, path))
+                    total_size += stat.st_size
+
+        for mtime, size, path in sorted(entries):
+            if total_size <= self.max_size_bytes:
+                break
+            for entry_path in (path, path[:-len(".pdf")] + ".json"):
+                try:
+                    os.remove(entry_path)
+                except OSError:
+                    pass
+            total_size -= size
+            logging.info(f"Eliminada de la caché de documentos: {path}")
+
+
+PAGE_REPORT_COLUMNS = ["PDF Path", "PDF Name", "Page Number", "% Non-White Pixels", "% Content Area",
+                       "Status", "Threshold"]
+DOCUMENT_REPORT_COLUMNS = ["PDF Path", "PDF Name", "Total Pages", "Blank Pages", "Remaining Pages",
+                           "% Blank Pages"]
+
+
+class ReportSink:
+    """
+    Destino de un reporte por filas que acumula las filas en memoria y las
+    escribe por lotes, para poder generar reportes de millones de filas sin
+    guardarlas todas.
+
+    Es seguro entre hilos (un lock por instancia) y entre procesos: en CSV
+    cada lote se añade al archivo con un bloqueo exclusivo (fcntl), y en
+    Parquet `path` es un directorio donde cada lote es un archivo propio
+    (part-<pid>-<id>-<n>.parquet, con un id aleatorio por instancia para que
+    dos ReportSink del mismo proceso sobre el mismo directorio no se pisen)
+    que se lee entero con pandas.read_parquet(path).
+
+    Un lote se escribe al llegar a `batch_size` filas o, al añadir una fila,
+    si han pasado `flush_seconds` desde la última escritura. Si el proceso se
+    interrumpe solo se pierden las filas del lote en curso: como mucho
+    `batch_size` filas o las añadidas en los últimos `flush_seconds` segundos
+    (las filas de un reporte sin actividad esperan hasta la siguiente fila o
+    hasta close()).
+
+    Args:
+        path (str): Archivo CSV o directorio Parquet.
+        columns (list): Nombres y orden de las columnas.
+        output_format (str): "csv" o "parquet".
+        batch_size (int): Filas acumuladas antes de escribir un lote.
+        flush_seconds (float): Segundos máximos entre escrituras mientras se
+            añaden filas; 0 para escribir solo por tamaño.
+    """
+
+    def __init__(self, path: str, columns: List[str], output_format: str = "csv", batch_size: int = 1000,
+                 flush_seconds: float = 5.0):
+        if output_format not in ("csv", "parquet"):
+            raise ValueError(f"Formato de reporte no soportado: {output_format}")
+        self.path = path
+        self.columns = list(columns)
+        self.output_format = output_format
+        self.batch_size = max(1, batch_size)
+        self.flush_seconds = flush_seconds
+        self.rows_written = 0
+        self._last_flush = time.monotonic()
+        self._rows = []
+        self._parts = 0
+        self._sink_id = uuid.uuid4().hex
+        self._lock = threading.Lock()
+        if output_format == "parquet":
+            if importlib.util.find_spec("pyarrow") is None:
+                raise ImportError("El reporte en Parquet necesita el paquete pyarrow: pip install -r requirements.txt")
+            os.makedirs(path, exist_ok=True)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+        return False
+
+    def add(self, row):
+        """
+        Añade una fila: un dict con las columnas o una secuencia en su orden.
+        """
+        if isinstance(row, dict):
+            row = tuple(row[column] for column in self.columns)
+        with self._lock:
+            self._rows.append(tuple(row))
+            if len(self._rows) >= self.batch_size or (
+                    self.flush_seconds and time.monotonic() - self._last_flush >= self.flush_seconds):
+                self._flush_locked()
+
+    def flush(self):
+        """
+        Escribe las filas acumuladas.
+        """
+        with self._lock:
+            self._flush_locked()
+
+    def _flush_locked(self):
+        self._last_flush = time.monotonic()
+        if not self._rows:
+            return
+        if self.output_format == "parquet":
+            frame = pd.DataFrame.from_records(self._rows, columns=self.columns)
+            part_path = os.path.join(self.path, f"part-{os.getpid()}-{self._sink_id}-{self._parts:06d}.parquet")
+            frame.to_parquet(part_path + ".tmp", index=False)
+            os.replace(part_path + ".tmp", part_path)
+            self._parts += 1
+        else:
+            with open(self.path, "a", newline="", encoding="utf-8") as file:
+                if fcntl is not None:
+                    fcntl.flock(file, fcntl.LOCK_EX)
+                try:
+                    writer = csv.writer(file)
+                    # La cabecera solo la escribe quien encuentra el archivo vacío.
+                    # tell() en modo "a" devuelve la posición de cuando se abrió:
+                    # otro proceso puede haber escrito antes de obtener el bloqueo
+                    file.seek(0, os.SEEK_END)
+                    if file.tell() == 0:
+                        writer.writerow(self.columns)
+                    writer.writerows(self._rows)
+                    file.flush()
+                finally:
+                    if fcntl is not None:
+                        fcntl.flock(file, fcntl.LOCK_UN)
+        self.rows_written += len(self._rows)
+        self._rows = []
+
+    def close(self):
+        """
+        Escribe las filas pendientes. La instancia se puede seguir usando después.
+        """
+        self.flush()
+
 
 class DocumentConverter:
     def get_page_stats(self, page, color_threshold: int = 240) -> Tuple[float, float]:
@@ -27,69 +724,189 @@ class DocumentConverter:
         Returns:
             Tuple[float, float]: (porcentaje de píxeles no blancos, porcentaje de área con contenido)
         """
-        pix = page.get_pixmap()
-        total_pixels = pix.h * pix.w
+        return compute_page_stats(page, color_threshold)
 
-        if pix.n < 3:
-            img_array = np.frombuffer(pix.samples, dtype=np.uint8).reshape(pix.h, pix.w)
-            non_white_pixels = img_array < color_threshold
-        else:
-            img_array = np.frombuffer(pix.samples, dtype=np.uint8).reshape(pix.h, pix.w, pix.n)
-            non_white_pixels = np.any(img_array[:, :, :3] < color_threshold, axis=2)
+    def collect_page_stats(self, pdf_path: str, color_threshold: int = 240) -> List[Optional[Tuple[float, float]]]:
+        """
+        Calcula las estadísticas de todas las páginas de un PDF. Si `workers` del
+        config.ini es mayor que 1 y el documento tiene al menos `parallel_min_pages`
+        páginas, reparte rangos de páginas entre varios procesos.
+
+        Args:
+            pdf_path: Ruta al archivo PDF
+            color_threshold: Umbral para considerar un píxel como blanco
+
+        Returns:
+            List[Optional[Tuple[float, float]]]: Estadísticas por página, en orden,
+            o None para las páginas que no se pudieron analizar.
+        """
+        return self._map_page_ranges(page_range_stats, pdf_path, color_threshold)
+
+    def collect_page_stats_array(self, pdf_path: str, color_threshold: int = 240, grayscale: bool = None,
+                                 step: int = None) -> np.ndarray:
+        """
+        Calcula las estadísticas de todas las páginas de un PDF en un array
+        estructurado (PAGE_STATS_DTYPE), repartido entre procesos igual que
+        collect_page_stats.
+
+        Args:
+            pdf_path: Ruta al archivo PDF
+            color_threshold: Umbral para considerar un píxel como blanco
+            grayscale: Rasterizar en escala de grises. Por defecto `stats_grayscale` del config.ini.
+            step: Contar uno de cada `step` píxeles por eje. Por defecto `stats_step` del config.ini.
 
-        percent_non_white = (np.sum(non_white_pixels) / total_pixels * 100)
+        Returns:
+            np.ndarray: Una fila por página con page_num, non_white_percent,
+            content_area e is_blank.
+        """
+        grayscale = self.stats_grayscale if grayscale is None else grayscale
+        step = self.stats_step if step is None else step
+        return self._map_page_ranges(page_range_stats_array, pdf_path, color_threshold, grayscale, step,
+                                     combine=np.concatenate)
+
+    def page_stats_frame(self, pdf_path: str, **kwargs) -> pd.DataFrame:
+        """
+        Estadísticas de todas las páginas de un PDF como DataFrame, con las
+        columnas de collect_page_stats_array (que recibe los demás argumentos).
+        """
+        return pd.DataFrame(self.collect_page_stats_array(pdf_path, **kwargs))
 
-        text_area = 0
-        for block in page.get_text("blocks"):
-            text_area += (block[2] - block[0]) * (block[3] - block[1])
-        percent_content_area = (text_area / total_pixels) * 100 if text_area else 0
+    def collect_blank_flags(self, pdf_path: str, color_threshold: int = 240) -> List[bool]:
+        """
+        Clasifica todas las páginas de un PDF con el detector rápido fast_is_blank,
+        usando `blank_dpi` y `blank_grayscale` del config.ini. Se reparte entre
+        procesos igual que collect_page_stats.
 
-        return round(percent_non_white, 2), round(percent_content_area, 2)
+        Args:
+            pdf_path: Ruta al archivo PDF
+            color_threshold: Umbral para considerar un píxel como blanco
+
+        Returns:
+            List[bool]: True para cada página en blanco, en orden.
+        """
+        return self._map_page_ranges(page_range_blank_flags, pdf_path, color_threshold,
+                                     self.blank_dpi, self.blank_grayscale)
+
+    def collect_text_flags(self, pdf_path: str) -> List[bool]:
+        """
+        Indica qué páginas de un PDF ya tienen capa de texto, con al menos
+        `ocr_min_text_chars` caracteres según el config.ini.
+
+        Args:
+            pdf_path: Ruta al archivo PDF
+
+        Returns:
+            List[bool]: True para cada página con texto, en orden.
+        """
+        return self._map_page_ranges(page_range_text_flags, pdf_path, self.ocr_min_text_chars)
+
+    def _map_page_ranges(self, func, pdf_path: str, *args, combine=None) -> list:
+        """
+        Aplica `func(pdf_path, inicio, fin, *args)` a todas las páginas del PDF, en
+        un solo rango o repartiendo rangos entre procesos, y une los resultados en
+        orden de página: concatenando listas o con `combine(resultados)` si se indica.
+        """
+        doc = fitz.open(pdf_path)
+        total_pages = len(doc)
+        doc.close()
+
+        if self.workers <= 1 or total_pages < self.parallel_min_pages:
+            return func(pdf_path, 0, total_pages, *args)
+
+        # Varios rangos por proceso para repartir mejor páginas de coste desigual
+        step = max(1, -(-total_pages // (self.workers * 4)))
+        starts = list(range(0, total_pages, step))
+        ends = [min(start + step, total_pages) for start in starts]
+        logging.info(f"Analizando {total_pages} páginas de {pdf_path} con {self.workers} procesos")
+
+        with ProcessPoolExecutor(max_workers=self.workers) as executor:
+            results = executor.map(func, [pdf_path] * len(starts), starts, ends,
+                                   *[[arg] * len(starts) for arg in args])
+            if combine is not None:
+                return combine(list(results))
+            return [item for chunk in results for item in chunk]
+
+    def analyze_pdf(self, pdf_path: str) -> PageAnalysis:
+        """
+        Devuelve el análisis de páginas de un PDF, calculándolo solo si no está
+        ya en caché para el mismo contenido y fecha de modificación.
+
+        Args:
+            pdf_path: Ruta al archivo PDF
+
+        Returns:
+            PageAnalysis: Estadísticas de todas las páginas del documento.
+        """
+        key = self._analysis_key(pdf_path)
+        analysis = self.cached_analysis(pdf_path, key)
+        if analysis is not None:
+            return analysis
+
+        with metrics.registry.track("document_stage", stage="analyze") as tracker:
+            analysis = PageAnalysis(pdf_path, key[0], key[1], self.collect_page_stats(pdf_path))
+            tracker.set(pages=analysis.total_pages)
+        if self.analysis_cache_size > 0:
+            self._analysis_cache[key] = analysis
+            while len(self._analysis_cache) > self.analysis_cache_size:
+                self._analysis_cache.popitem(last=False)
+        return analysis
+
+    @staticmethod
+    def _analysis_key(pdf_path: str) -> Tuple[str, int]:
+        return file_checksum(pdf_path), os.stat(pdf_path).st_mtime_ns
+
+    def cached_analysis(self, pdf_path: str, key: Tuple[str, int] = None) -> Optional[PageAnalysis]:
+        """
+        Devuelve el análisis de páginas en caché de un PDF sin calcularlo, o None.
+        """
+        if not self._analysis_cache:
+            return None
+        analysis = self._analysis_cache.get(key or self._analysis_key(pdf_path))
+        if analysis is not None:
+            self._analysis_cache.move_to_end((analysis.sha256, analysis.mtime_ns))
+        return analysis
 
     def initialize_csv_report(self) -> str:
         """
-        Inicializa el archivo CSV para el reporte de páginas.
+        Inicializa el reporte de páginas y el de resúmenes por documento, en
+        el formato de `report_format` del config.ini (csv o parquet).
         Solo se llama una vez por ejecución.
-        
+
         Returns:
-            str: Ruta del archivo CSV creado
+            str: Ruta del reporte de páginas
         """
-        if self.csv_path is None:
-            timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
-            
-            # Agregar esta verificación del directorio
-            if not os.path.exists(self.reports_dir):
-                os.makedirs(self.reports_dir)
-            
-            self.csv_path = os.path.join(self.reports_dir, f"page_stats_{timestamp}.csv")
-            
-            self._csv_file = open(self.csv_path, 'w', newline='', encoding='utf-8')
-            self.csv_writer = csv.writer(self._csv_file)
-            self.csv_writer.writerow([
-                "PDF Path",
-                "PDF Name",
-                "Page Number",
-                "% Non-White Pixels",
-                "% Content Area",
-                "Status",
-                "Threshold"
-            ])
-            
-            logging.info(f"Iniciado archivo de reporte: {self.csv_path}")
-            
+        with self._report_lock:
+            if self.page_report is None:
+                timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
+
+                # Agregar esta verificación del directorio
+                if not os.path.exists(self.reports_dir):
+                    os.makedirs(self.reports_dir, exist_ok=True)
+
+                extension = ".csv" if self.report_format == "csv" else ""
+                document_path = os.path.join(self.reports_dir, f"document_stats_{timestamp}{extension}")
+                self.document_report = ReportSink(document_path, DOCUMENT_REPORT_COLUMNS, self.report_format,
+                                                  self.report_batch_size, self.report_flush_seconds)
+                page_path = os.path.join(self.reports_dir, f"page_stats_{timestamp}{extension}")
+                self.page_report = ReportSink(page_path, PAGE_REPORT_COLUMNS, self.report_format,
+                                              self.report_batch_size, self.report_flush_seconds)
+                self.csv_path = page_path
+
+                logging.info(f"Iniciado archivo de reporte: {self.csv_path}")
+
         return self.csv_path
 
     def write_page_stats_to_csv(self, stats: dict):
         """
-        Escribe las estadísticas de una página al archivo CSV.
-        
+        Añade las estadísticas de una página al reporte de páginas.
+
         Args:
             stats (dict): Diccionario con las estadísticas de la página
         """
-        if self.csv_writer is None:
+        if self.page_report is None:
             self.initialize_csv_report()
-            
-        self.csv_writer.writerow([
+
+        self.page_report.add((
             stats["pdf_path"],
             stats["pdf_name"],
             stats["page_num"],
@@ -97,17 +914,38 @@ class DocumentConverter:
             stats["content_area"],
             stats["status"],
             "<2.7%/240"
-        ])
+        ))
+
+    def write_document_summary(self, stats: dict):
+        """
+        Añade al reporte de documentos el resumen de get_pdf_statistics.
+
+        Args:
+            stats (dict): Estadísticas del documento
+        """
+        if self.document_report is None:
+            self.initialize_csv_report()
+
+        self.document_report.add((
+            stats["pdf_path"],
+            stats["pdf_name"],
+            stats["total_pages"],
+            stats["blank_pages"],
+            stats["remaining_pages"],
+            stats["blank_percentage"]
+        ))
 
     def close_csv_report(self):
         """
-        Cierra el archivo CSV si está abierto.
+        Escribe las filas pendientes de los reportes y los cierra.
         """
-        if self._csv_file is not None:
-            self._csv_file.close()
-            self._csv_file = None
-            self.csv_writer = None
-            logging.info(f"Reporte CSV cerrado: {self.csv_path}")
+        with self._report_lock:
+            if self.page_report is not None:
+                self.page_report.close()
+                self.document_report.close()
+                logging.info(f"Reporte cerrado: {self.csv_path} ({self.page_report.rows_written} páginas)")
+                self.page_report = None
+                self.document_report = None
 
     def __init__(self, config_path=None):
         config = configparser.ConfigParser()
@@ -120,20 +958,61 @@ class DocumentConverter:
         self.log_file = config.get("document", "log_file", fallback="document_converter.log")
         self.reports_dir = config.get("paths", "reports_dir", fallback="reports")
         self.max_pdf_size_mb = config.getfloat("document", "max_pdf_size_mb", fallback=120.0)
+        self.workers = config.getint("document", "workers", fallback=1) or os.cpu_count()
+        self.parallel_min_pages = config.getint("document", "parallel_min_pages", fallback=20)
+        self.analysis_cache_size = config.getint("document", "analysis_cache_size", fallback=32)
+        self.stats_grayscale = config.getboolean("document", "stats_grayscale", fallback=False)
+        self.stats_step = config.getint("document", "stats_step", fallback=1)
+        self.blank_detection = config.get("document", "blank_detection", fallback="full")
+        self.blank_dpi = config.getint("document", "blank_dpi", fallback=72)
+        self.blank_grayscale = config.getboolean("document", "blank_grayscale", fallback=False)
+
+        # Optimización de tamaño: "off", "oversize" (solo si se supera
+        # max_pdf_size_mb) o "always" (hasta optimize_target_mb)
+        self.size_optimization = config.get("document", "size_optimization", fallback="oversize")
+        self.optimize_target_mb = config.getfloat("document", "optimize_target_mb", fallback=0.0) or self.max_pdf_size_mb
+        self.optimize_min_dpi = config.getint("document", "optimize_min_dpi", fallback=100)
+        self.optimize_linearize = config.getboolean("document", "optimize_linearize", fallback=False)
+
+        # Limpieza de objetos sin uso al guardar una selección de páginas (0-4)
+        self.select_garbage = config.getint("document", "select_garbage", fallback=1)
+
+        # OCR: "full" procesa todo el documento y "skip_text" solo las páginas escaneadas
+        self.ocr_mode = config.get("document", "ocr_mode", fallback="full")
+        self.ocr_language = config.get("document", "ocr_language", fallback="spa")
+        self.ocr_deskew = config.getboolean("document", "ocr_deskew", fallback=True)
+        self.ocr_jobs = config.getint("document", "ocr_jobs", fallback=0)
+        self.ocr_optimize = config.getint("document", "ocr_optimize", fallback=1)
+        self.ocr_min_text_chars = config.getint("document", "ocr_min_text_chars", fallback=20)
 
-        # Nuevas variables para el manejo del CSV
+        # Caché en disco de documentos procesados (desactivada si no hay directorio)
+        self.document_cache = None
+        cache_dir = config.get("document", "cache_dir", fallback="")
+        if cache_dir:
+            self.document_cache = DocumentCache(cache_dir, config.getfloat("document", "cache_max_mb", fallback=2048.0))
+
+        # Análisis de páginas ya calculados, por (sha256, mtime)
+        self._analysis_cache = OrderedDict()
+
+        # Reportes de páginas y de documentos (ReportSink), creados al escribir la primera fila
+        self.report_format = config.get("document", "report_format", fallback="csv")
+        self.report_batch_size = config.getint("document", "report_batch_size", fallback=1000)
+        self.report_flush_seconds = config.getfloat("document", "report_flush_seconds", fallback=5.0)
         self.csv_path = None
-        self.csv_writer = None
-        self._csv_file = None  # para mantener referencia al archivo
+        self.page_report = None
+        self.document_report = None
+        self._report_lock = threading.Lock()
 
         log_dir = os.path.dirname(self.log_file)
-        if not os.path.exists(log_dir):
+        if log_dir and not os.path.exists(log_dir):
             os.makedirs(log_dir)
 
         reports_dir = os.path.dirname(self.reports_dir)
-        if not os.path.exists(reports_dir):
+        if reports_dir and not os.path.exists(reports_dir):
             os.makedirs(reports_dir)
 
+        metrics.configure(config)
+
         # Configuración del logging
         logging.basicConfig(level=logging.INFO,
                           format='%(asctime)s - %(levelname)s - %(message)s',
@@ -142,9 +1021,10 @@ class DocumentConverter:
 
     def __del__(self):
         """
-        Asegura que el archivo CSV se cierre al destruir la instancia.
+        Asegura que los reportes se escriban al destruir la instancia.
         """
-        self.close_csv_report()
+        if getattr(self, "page_report", None) is not None:
+            self.close_csv_report()
 
     def check_pdf_size(self, pdf_path: str) -> bool:
         """
@@ -181,32 +1061,51 @@ class DocumentConverter:
             bool: True si la página está en blanco, False en caso contrario
         """
         try:
-            # Análisis de píxeles
-            pix = page.get_pixmap()
-            total_pixels = pix.h * pix.w
-
-            if pix.n < 3:  # PDF en escala de grises
-                img_array = np.frombuffer(pix.samples, dtype=np.uint8).reshape(pix.h, pix.w)
-                non_white_pixels = img_array < color_threshold
-            else:  # PDF a color (RGB)
-                img_array = np.frombuffer(pix.samples, dtype=np.uint8).reshape(pix.h, pix.w, pix.n)
-                non_white_pixels = np.any(img_array[:, :, :3] < color_threshold, axis=2)
-
-            percent_non_white = (np.sum(non_white_pixels) / total_pixels * 100)
-
-            # Análisis de área con contenido
-            text_area = 0
-            for block in page.get_text("blocks"):
-                text_area += (block[2] - block[0]) * (block[3] - block[1])
-            percent_content_area = (text_area / total_pixels) * 100 if text_area else 0
-
-            # Una página se considera en blanco si cumple ambos criterios
-            return percent_non_white < 2.7 and percent_content_area < 1.0
+            if self.blank_detection == "fast":
+                return fast_is_blank(page, color_threshold, self.blank_dpi, self.blank_grayscale)
+            return is_blank_stats(compute_page_stats(page, color_threshold, precision=None))
 
         except Exception as e:
             logging.error(f"Error al analizar página en blanco: {e}")
             return False
 
+    def output_settings(self) -> Dict:
+        """
+        Opciones del config.ini que cambian el PDF resultante o sus
+        estadísticas, para incluirlas en la clave de DocumentCache: al
+        cambiar cualquiera de ellas no se reutilizan resultados anteriores.
+        """
+        return {
+            "max_pdf_size_mb": self.max_pdf_size_mb,
+            "blank_detection": self.blank_detection,
+            "blank_dpi": self.blank_dpi,
+            "blank_grayscale": self.blank_grayscale,
+            "size_optimization": self.size_optimization,
+            "optimize_target_mb": self.optimize_target_mb,
+            "optimize_min_dpi": self.optimize_min_dpi,
+            "optimize_linearize": self.optimize_linearize,
+            "ocr_mode": self.ocr_mode,
+            "ocr_language": self.ocr_language,
+            "ocr_deskew": self.ocr_deskew,
+            "ocr_optimize": self.ocr_optimize,
+            "ocr_min_text_chars": self.ocr_min_text_chars,
+        }
+
+    def blank_flags(self, pdf_path: str) -> List[bool]:
+        """
+        Clasifica las páginas de un PDF en blanco o con contenido. Se reutiliza
+        un análisis previo si existe; si no, en modo "fast" se usa el detector
+        rápido y en otro caso se analiza el PDF completo.
+
+        Returns:
+            List[bool]: True para cada página en blanco, en orden.
+        """
+        analysis = self.cached_analysis(pdf_path)
+        if analysis is None and self.blank_detection == "fast":
+            return self.collect_blank_flags(pdf_path)
+        analysis = analysis or self.analyze_pdf(pdf_path)
+        return [analysis.is_blank(page_num) for page_num in range(analysis.total_pages)]
+
     def remove_blank_pages(self, pdf_path: str) -> str:
         """
         Elimina las páginas en blanco de un PDF.
@@ -219,42 +1118,106 @@ class DocumentConverter:
         """
         logging.info(f"Eliminando páginas en blanco de {pdf_path}")
         try:
-            # Crear nombre para archivo temporal
-            temp_path = pdf_path.replace('.pdf', '_noblank.pdf')
-            
-            # Abrir el PDF con PyMuPDF
-            doc = fitz.open(pdf_path)
-            new_doc = fitz.open()
-            
-            # Contadores
-            total_pages = len(doc)
-            blank_pages = 0
-            
-            # Procesar cada página
-            for page_num in range(total_pages):
-                page = doc.load_page(page_num)
-                if not self.is_blank_page(page):
-                    new_doc.insert_pdf(doc, from_page=page_num, to_page=page_num)
-                else:
-                    blank_pages += 1
-            
-            # Guardar el nuevo PDF
-            new_doc.save(temp_path)
-            new_doc.close()
-            doc.close()
-            
-            # Registrar estadísticas
-            remaining_pages = total_pages - blank_pages
-            blank_percentage = (blank_pages / total_pages * 100) if total_pages > 0 else 0
-            
-            logging.info(f"PDF procesado: {blank_pages} páginas en blanco eliminadas de {total_pages} ({blank_percentage:.1f}%)")
-            
-            return temp_path
-            
+            with metrics.registry.track("document_stage", stage="remove_blanks") as tracker:
+                # Crear nombre para archivo temporal
+                temp_path = pdf_path.replace('.pdf', '_noblank.pdf')
+
+                blank_flags = self.blank_flags(pdf_path)
+
+                # Contadores
+                total_pages = len(blank_flags)
+                blank_pages = blank_flags.count(True)
+                tracker.set(pages=total_pages)
+
+                # Guardar el PDF sin las páginas en blanco
+                self.select_pages(pdf_path, drop=[page_num for page_num, is_blank in enumerate(blank_flags) if is_blank],
+                                  output_path=temp_path)
+
+                # Registrar estadísticas
+                remaining_pages = total_pages - blank_pages
+                blank_percentage = (blank_pages / total_pages * 100) if total_pages > 0 else 0
+
+                logging.info(f"PDF procesado: {blank_pages} páginas en blanco eliminadas de {total_pages} ({blank_percentage:.1f}%)")
+
+                return temp_path
+
         except Exception as e:
             logging.error(f"Error eliminando páginas en blanco: {e}")
             raise
 
+    def needs_size_optimization(self, size_bytes: int) -> bool:
+        """
+        Indica si un PDF de `size_bytes` debe pasar por la optimización de tamaño.
+        """
+        if self.size_optimization == "always":
+            return True
+        if self.size_optimization == "oversize":
+            return size_bytes > self.max_pdf_size_mb * 1024 * 1024
+        return False
+
+    def optimize_pdf_bytes(self, source, target_mb: float = None) -> Optional[bytes]:
+        """
+        Reduce el tamaño de un PDF probando los niveles de
+        SIZE_OPTIMIZATION_LEVELS, cada uno desde el original y de menor a
+        mayor pérdida, hasta quedar por debajo del tamaño objetivo. No se
+        usan los niveles que bajarían las imágenes de `optimize_min_dpi`.
+
+        Args:
+            source: Ruta del PDF o su contenido en bytes.
+            target_mb: Tamaño objetivo en MB. Por defecto `optimize_target_mb`
+                del config.ini en modo "always" y `max_pdf_size_mb` en otro caso.
+
+        Returns:
+            Optional[bytes]: El PDF más pequeño obtenido (el del primer nivel que
+            cumple el objetivo), o None si ningún nivel reduce el tamaño.
+        """
+        if target_mb is None:
+            target_mb = self.optimize_target_mb if self.size_optimization == "always" else self.max_pdf_size_mb
+        target_bytes = target_mb * 1024 * 1024
+        original_size = len(source) if isinstance(source, (bytes, bytearray)) else os.path.getsize(source)
+
+        best = None
+        for level, settings in enumerate(SIZE_OPTIMIZATION_LEVELS):
+            if settings["dpi"] and settings["dpi"] < self.optimize_min_dpi:
+                break
+            data = rewrite_pdf(source, settings["dpi"], settings["quality"])
+            if self.optimize_linearize:
+                data = linearize_pdf(data)
+            logging.info(f"Optimización de tamaño nivel {level}: "
+                         f"{original_size / (1024 * 1024):.2f}MB -> {len(data) / (1024 * 1024):.2f}MB")
+            if best is None or len(data) < len(best):
+                best = data
+            if len(best) <= target_bytes:
+                break
+
+        if best is None or len(best) >= original_size:
+            return None
+        return best
+
+    def optimize_pdf_size(self, pdf_path: str, target_mb: float = None) -> str:
+        """
+        Reduce el tamaño de un PDF con optimize_pdf_bytes y devuelve el path
+        del PDF optimizado, o `pdf_path` si no se pudo reducir.
+        """
+        logging.info(f"Optimizando el tamaño de {pdf_path}")
+        try:
+            with metrics.registry.track("document_stage", stage="optimize_size") as tracker:
+                data = self.optimize_pdf_bytes(pdf_path, target_mb)
+                tracker.set(input_bytes=os.path.getsize(pdf_path), output_bytes=len(data) if data else 0)
+                if data is None:
+                    logging.info("La optimización no reduce el tamaño, se conserva el original")
+                    return pdf_path
+
+                # Crear un archivo temporal para el PDF optimizado
+                temp_path = pdf_path.replace('.pdf', '_opt.pdf')
+                with open(temp_path, "wb") as file:
+                    file.write(data)
+                return temp_path
+
+        except Exception as e:
+            logging.error(f"Error optimizando el tamaño del PDF: {e}")
+            raise
+
     def process_pdf(self, pdf_path: str, remove_blanks: bool = True, check_size: bool = True) -> str:
         """
         Procesa un PDF aplicando múltiples operaciones según se requiera.
@@ -270,19 +1233,28 @@ class DocumentConverter:
         try:
             current_path = pdf_path
             
-            # Primero verificar el tamaño inicial si es requerido
-            if check_size and not self.check_pdf_size(current_path):
+            # Primero verificar el tamaño inicial si es requerido; si está activa
+            # la optimización de tamaño, se verifica después de optimizar
+            if check_size and self.size_optimization == "off" and not self.check_pdf_size(current_path):
                 raise ValueError(f"El archivo excede el tamaño máximo permitido de {self.max_pdf_size_mb}MB")
             
             # Eliminar páginas en blanco si es requerido
             if remove_blanks:
                 current_path = self.remove_blank_pages(current_path)
                 
-                # Verificar tamaño después de eliminar páginas en blanco
-                if check_size and not self.check_pdf_size(current_path):
+            # Recomprimir si el tamaño lo requiere
+            if self.needs_size_optimization(os.path.getsize(current_path)):
+                optimized_path = self.optimize_pdf_size(current_path)
+                if optimized_path != current_path and current_path != pdf_path:
                     os.remove(current_path)  # Limpiar archivo temporal
-                    raise ValueError(f"El archivo procesado excede el tamaño máximo permitido de {self.max_pdf_size_mb}MB")
-            
+                current_path = optimized_path
+
+            # Verificar tamaño después de eliminar páginas en blanco y optimizar
+            if check_size and not self.check_pdf_size(current_path):
+                if current_path != pdf_path:
+                    os.remove(current_path)  # Limpiar archivo temporal
+                raise ValueError(f"El archivo procesado excede el tamaño máximo permitido de {self.max_pdf_size_mb}MB")
+
             return current_path
             
         except Exception as e:
@@ -292,21 +1264,67 @@ class DocumentConverter:
                 os.remove(current_path)
             raise
 
+    def ocr_options(self, text_flags: Optional[List[bool]] = None) -> Optional[Dict]:
+        """
+        Opciones de ocrmypdf según el config.ini.
+
+        Args:
+            text_flags: Con `ocr_mode = skip_text`, si cada página ya tiene capa
+                de texto (ver collect_text_flags).
+
+        Returns:
+            Optional[Dict]: Argumentos para ocrmypdf.ocr, o None si ninguna
+            página necesita OCR.
+        """
+        options = {
+            "language": self.ocr_language,
+            "deskew": self.ocr_deskew,
+            "optimize": self.ocr_optimize,
+            "jobs": self.ocr_jobs or None,
+            "quiet": True,
+        }
+        if self.ocr_mode == "skip_text" and text_flags is not None:
+            scanned_pages = [page_num + 1 for page_num, has_text in enumerate(text_flags) if not has_text]
+            if not scanned_pages:
+                logging.info("Todas las páginas tienen texto, no se aplica OCR")
+                return None
+            logging.info(f"Aplicando OCR a {len(scanned_pages)} de {len(text_flags)} páginas")
+            # Las páginas listadas no tienen texto suficiente, así que se
+            # rasterizan aunque tengan algún resto (un sello, un número)
+            options.update(pages=",".join(str(page_num) for page_num in scanned_pages), force_ocr=True)
+        return options
+
     def apply_ocr_to_pdf(self, pdf_path: str) -> str:
         """
         Aplica OCR al PDF y devuelve el path del PDF procesado.
+
+        Con `ocr_mode = skip_text` solo se reconocen las páginas sin capa de
+        texto; las páginas digitales se copian tal cual y, si no hay ninguna
+        página escaneada, se devuelve el PDF original sin llamar a ocrmypdf.
+        `ocr_jobs` (0 = uno por CPU) y `ocr_optimize` (0-3) se pasan a ocrmypdf.
         """
         logging.info(f"Aplicando OCR a {pdf_path}")
         try:
-            # Crear un archivo temporal para el PDF con OCR
-            temp_path = pdf_path.replace('.pdf', '_ocr.pdf')
-            
-            # Aplicar OCR utilizando ocrmypdf
-            ocrmypdf.ocr(pdf_path, temp_path, language='spa', deskew=True, quiet=True)
-            
-            logging.info("OCR aplicado exitosamente")
-            return temp_path
-            
+            with metrics.registry.track("document_stage", stage="apply_ocr") as tracker:
+                # Crear un archivo temporal para el PDF con OCR
+                temp_path = pdf_path.replace('.pdf', '_ocr.pdf')
+
+                text_flags = self.collect_text_flags(pdf_path) if self.ocr_mode == "skip_text" else None
+                options = self.ocr_options(text_flags)
+                if options is None:
+                    return pdf_path
+                if "pages" in options:
+                    tracker.set(pages=options["pages"].count(",") + 1)
+                else:
+                    with fitz.open(pdf_path) as doc:
+                        tracker.set(pages=len(doc))
+
+                # Aplicar OCR utilizando ocrmypdf
+                ocrmypdf.ocr(pdf_path, temp_path, **options)
+
+                logging.info("OCR aplicado exitosamente")
+                return temp_path
+
         except Exception as e:
             logging.error(f"Error aplicando OCR: {e}")
             raise
@@ -317,34 +1335,98 @@ class DocumentConverter:
         """
         logging.info(f"Eliminando primera página de {pdf_path}")
         try:
-            # Crear un archivo temporal para el PDF sin la primera página
-            temp_path = pdf_path.replace('.pdf', '_nofirst.pdf')
-            
-            # Abrir el PDF
-            with open(pdf_path, 'rb') as file:
-                pdf_reader = PyPDF2.PdfReader(file)
-                
+            with metrics.registry.track("document_stage", stage="remove_first_page") as tracker:
+                # Crear un archivo temporal para el PDF sin la primera página
+                temp_path = pdf_path.replace('.pdf', '_nofirst.pdf')
+
                 # Verificar si tiene más de una página
-                if len(pdf_reader.pages) <= 1:
+                with fitz.open(pdf_path) as doc:
+                    total_pages = len(doc)
+                tracker.set(pages=total_pages)
+                if total_pages <= 1:
                     logging.info("El PDF tiene una sola página, no se elimina nada")
                     return pdf_path
-                
-                # Crear un nuevo PDF sin la primera página
-                pdf_writer = PyPDF2.PdfWriter()
-                for page_num in range(1, len(pdf_reader.pages)):
-                    pdf_writer.add_page(pdf_reader.pages[page_num])
-                
-                # Guardar el PDF sin la primera página
-                with open(temp_path, 'wb') as output_file:
-                    pdf_writer.write(output_file)
-            
-            logging.info("Primera página eliminada exitosamente")
-            return temp_path
-            
+
+                temp_path = self.select_pages(pdf_path, drop=[0], output_path=temp_path)
+
+                logging.info("Primera página eliminada exitosamente")
+                return temp_path
+
         except Exception as e:
             logging.error(f"Error eliminando primera página: {e}")
             raise
 
+    def select_pages(self, pdf_path: str, keep=None, drop=None, output_path: str = None,
+                     incremental: bool = False, garbage: int = None) -> str:
+        """
+        Conserva o elimina páginas de un PDF con Document.select de PyMuPDF,
+        sin copiar el documento página a página. Por ejemplo, para quitar la
+        primera página y las páginas en blanco de una vez:
+
+            blank_flags = converter.blank_flags(pdf_path)
+            drop = [0] + [n for n, is_blank in enumerate(blank_flags) if is_blank]
+            converter.select_pages(pdf_path, drop=drop)
+
+        Args:
+            pdf_path (str): Ruta al archivo PDF.
+            keep: Índices (desde 0) de las páginas a conservar, en el orden
+                resultante; admite range(). Por defecto, todas.
+            drop: Índices (desde 0) de las páginas a eliminar de `keep`.
+            output_path (str): Ruta del resultado. Por defecto `<nombre>_sel.pdf`.
+            incremental (bool): Añadir solo los cambios al final del archivo en
+                lugar de reescribirlo. Es mucho más rápido en escaneos grandes,
+                pero el archivo no se reduce: las páginas quitadas siguen dentro.
+                Requiere `output_path`: el original se copia ahí antes de
+                modificarlo, salvo que `output_path` sea el propio `pdf_path`.
+            garbage (int): Nivel de limpieza de objetos sin uso al reescribir
+                (0-4, como en PyMuPDF). Por defecto `select_garbage` del config.ini.
+
+        Returns:
+            str: Ruta al PDF resultante (`pdf_path` si no cambia ninguna página
+            y no se indicó `output_path`).
+
+        Raises:
+            ValueError: Si algún índice está fuera de rango, no queda ninguna
+                página o se pide guardado incremental sin `output_path`.
+        """
+        if incremental and not output_path:
+            # Nunca se modifica el PDF de entrada sin pedirlo expresamente
+            raise ValueError("El guardado incremental requiere output_path (puede ser el propio pdf_path)")
+        if incremental and output_path != pdf_path:
+            # El guardado incremental se hace sobre una copia del original
+            shutil.copyfile(pdf_path, output_path)
+            pdf_path = output_path
+
+        doc = fitz.open(pdf_path)
+        try:
+            total_pages = len(doc)
+            pages = list(range(total_pages)) if keep is None else list(keep)
+            dropped = set(drop or [])
+            invalid = sorted(page_num for page_num in dropped.union(pages) if not 0 <= page_num < total_pages)
+            if invalid:
+                raise ValueError(f"Páginas fuera de rango en {pdf_path}: {invalid}")
+            pages = [page_num for page_num in pages if page_num not in dropped]
+            if not pages:
+                raise ValueError(f"La selección no deja ninguna página de {pdf_path}")
+
+            if pages == list(range(total_pages)):
+                if output_path and output_path != pdf_path:
+                    shutil.copyfile(pdf_path, output_path)
+                    return output_path
+                return pdf_path
+
+            doc.select(pages)
+            if incremental:
+                doc.save(pdf_path, incremental=True, encryption=fitz.PDF_ENCRYPT_KEEP)
+                output_path = pdf_path
+            else:
+                output_path = output_path or pdf_path.replace('.pdf', '_sel.pdf')
+                doc.save(output_path, garbage=self.select_garbage if garbage is None else garbage)
+            logging.info(f"Seleccionadas {len(pages)} de {total_pages} páginas de {pdf_path} en {output_path}")
+            return output_path
+        finally:
+            doc.close()
+
     def pdf_to_base64(self, file_path: str) -> str:
         logging.info(f"Convirtiendo {file_path} a Base64")
         try:
@@ -367,6 +1449,94 @@ class DocumentConverter:
             logging.error(f"Error en la conversión desde Base64: {e}")
             raise
 
+    def pdf_to_base64_stream(self, file_path: str, writer, chunk_size: int = BASE64_CHUNK_SIZE) -> int:
+        """
+        Codifica un archivo en Base64 por bloques y lo escribe en `writer`, sin
+        cargar el archivo ni el resultado completos en memoria.
+
+        Args:
+            file_path (str): Ruta al archivo a codificar.
+            writer: Objeto con método write; si es un archivo de texto recibe str,
+                en otro caso bytes.
+            chunk_size (int): Bytes leídos por bloque (se ajusta a múltiplo de 3).
+
+        Returns:
+            int: Número de caracteres Base64 escritos.
+        """
+        logging.info(f"Convirtiendo {file_path} a Base64 por bloques")
+        chunk_size = max(3, chunk_size - chunk_size % 3)
+        as_text = isinstance(writer, io.TextIOBase)
+        written = 0
+        try:
+            with open(file_path, "rb") as file:
+                for chunk in iter(lambda: file.read(chunk_size), b""):
+                    encoded = base64.b64encode(chunk)
+                    writer.write(encoded.decode("ascii") if as_text else encoded)
+                    written += len(encoded)
+            logging.info("Conversión a Base64 exitosa")
+            return written
+        except Exception as e:
+            logging.error(f"Error en la conversión a Base64: {e}")
+            raise
+
+    def pdf_to_base64_file(self, file_path: str, output_path: str, chunk_size: int = BASE64_CHUNK_SIZE) -> str:
+        """
+        Codifica un archivo en Base64 por bloques y guarda el resultado en `output_path`.
+
+        Returns:
+            str: Ruta del archivo Base64 generado.
+        """
+        with open(output_path, "wb") as output:
+            self.pdf_to_base64_stream(file_path, output, chunk_size)
+        return output_path
+
+    def base64_stream_to_pdf(self, reader, output_path: str, chunk_size: int = 4 * 256 * 1024) -> bool:
+        """
+        Decodifica Base64 leído por bloques desde `reader` y lo escribe en
+        `output_path`, sin cargar el contenido completo en memoria. Se ignoran
+        los saltos de línea y espacios.
+
+        Args:
+            reader: Objeto con método read que devuelve str o bytes.
+            output_path (str): Ruta del archivo de salida.
+            chunk_size (int): Caracteres leídos por bloque.
+
+        Returns:
+            bool: True si la conversión fue exitosa.
+        """
+        logging.info(f"Convirtiendo Base64 por bloques a archivo en {output_path}")
+        try:
+            pending = b""
+            with open(output_path, "wb") as file:
+                while True:
+                    chunk = reader.read(chunk_size)
+                    if not chunk:
+                        break
+                    if isinstance(chunk, str):
+                        chunk = chunk.encode("ascii")
+                    pending += b"".join(chunk.split())
+                    # Solo se decodifican grupos completos de 4 caracteres
+                    usable = len(pending) - len(pending) % 4
+                    file.write(base64.b64decode(pending[:usable], validate=True))
+                    pending = pending[usable:]
+                if pending:
+                    raise ValueError("El contenido Base64 está incompleto")
+            logging.info("Conversión a archivo exitosa")
+            return True
+        except Exception as e:
+            logging.error(f"Error en la conversión desde Base64: {e}")
+            raise
+
+    def base64_file_to_pdf(self, base64_path: str, output_path: str) -> bool:
+        """
+        Decodifica un archivo Base64 por bloques y guarda el resultado en `output_path`.
+
+        Returns:
+            bool: True si la conversión fue exitosa.
+        """
+        with open(base64_path, "rb") as reader:
+            return self.base64_stream_to_pdf(reader, output_path)
+
     def xml_to_base64(self, xml_content: str) -> str:
         """
         Convierte el contenido XML a base64.
@@ -405,14 +1575,14 @@ class DocumentConverter:
             if self.csv_path is None:
                 self.initialize_csv_report()
                 
-            doc = fitz.open(input_pdf)
             pdf_name = os.path.basename(input_pdf)
 
-            for page_num in range(len(doc)):
-                page = doc.load_page(page_num)
-                non_white_percent, content_area = self.get_page_stats(page)
+            analysis = self.analyze_pdf(input_pdf)
+
+            for page_num in range(analysis.total_pages):
+                non_white_percent, content_area = analysis.rounded_stats(page_num)
                 
-                is_blank = (non_white_percent < 2.7 and content_area < 1.0)
+                is_blank = analysis.is_blank(page_num)
                 status = "Blank" if is_blank else "Content"
 
                 page_stats = {
@@ -427,7 +1597,7 @@ class DocumentConverter:
                 stats.append(page_stats)
                 self.write_page_stats_to_csv(page_stats)
 
-            doc.close()
+            self.write_document_summary(self._statistics_from_analysis(input_pdf, analysis))
             return stats
 
         except Exception as e:
@@ -449,31 +1619,291 @@ class DocumentConverter:
                 - blank_percentage: porcentaje de páginas en blanco
         """
         try:
-            doc = fitz.open(pdf_path)
-            total_pages = len(doc)
-            blank_pages = 0
+            return self._statistics_from_analysis(pdf_path, self.analyze_pdf(pdf_path))
 
-            for page_num in range(total_pages):
-                page = doc.load_page(page_num)
-                non_white_percent, content_area = self.get_page_stats(page)
-                
-                if non_white_percent < 2.7 and content_area < 1.0:
-                    blank_pages += 1
+        except Exception as e:
+            logging.error(f"Error obteniendo estadísticas del PDF {pdf_path}: {e}")
+            raise
 
-            remaining_pages = total_pages - blank_pages
-            blank_percentage = (blank_pages / total_pages * 100) if total_pages > 0 else 0
+    def document_statistics(self, pdf_path: str, blank_flags: List[bool] = None) -> Dict:
+        """
+        Estadísticas con las claves de get_pdf_statistics sin un segundo
+        análisis completo del PDF: se usan las marcas de páginas en blanco ya
+        calculadas, el análisis en caché o, si no hay ninguno, el detector
+        rápido fast_is_blank. Las páginas que no se pudieron analizar cuentan
+        como páginas con contenido.
 
-            doc.close()
+        Args:
+            pdf_path: Ruta al archivo PDF
+            blank_flags: Marcas de página en blanco ya calculadas, p. ej. las de
+                PipelineDocument.source_blank_flags
+
+        Returns:
+            Dict: Las mismas claves que get_pdf_statistics.
+        """
+        if blank_flags is None:
+            analysis = self.cached_analysis(pdf_path)
+            if analysis is not None:
+                blank_flags = [analysis.is_blank(page_num) for page_num in range(analysis.total_pages)]
+            else:
+                blank_flags = self.collect_blank_flags(pdf_path)
+        return self._statistics_from_flags(pdf_path, blank_flags)
+
+    @classmethod
+    def _statistics_from_analysis(cls, pdf_path: str, analysis: PageAnalysis) -> Dict:
+        """
+        Resume un PageAnalysis con las claves de get_pdf_statistics.
+        """
+        if None in analysis.page_stats:
+            raise ValueError(f"No se pudieron analizar todas las páginas de {pdf_path}")
+        return cls._statistics_from_flags(pdf_path, [analysis.is_blank(page_num)
+                                                     for page_num in range(analysis.total_pages)])
+
+    @staticmethod
+    def _statistics_from_flags(pdf_path: str, blank_flags: List[bool]) -> Dict:
+        total_pages = len(blank_flags)
+        blank_pages = blank_flags.count(True)
+
+        remaining_pages = total_pages - blank_pages
+        blank_percentage = (blank_pages / total_pages * 100) if total_pages > 0 else 0
+
+        return {
+            "pdf_path": pdf_path,
+            "pdf_name": os.path.basename(pdf_path),
+            "total_pages": total_pages,
+            "blank_pages": blank_pages,
+            "remaining_pages": remaining_pages,
+            "blank_percentage": round(blank_percentage, 1)
+        }
+
+
+class PipelineDocument:
+    """
+    Documento que pasa de una etapa a otra de DocumentPipeline: un
+    fitz.Document abierto y lo necesario para no volver a leer ni analizar
+    el PDF de entrada.
+
+    Attributes:
+        doc: Documento de PyMuPDF abierto.
+        source_path (str): Ruta del PDF de entrada, o None si se recibió en memoria.
+        page_map (list): Para cada página actual, su índice en el PDF de
+            entrada; None cuando una etapa cambió el contenido (OCR).
+        timings (dict): Segundos empleados en cada etapa.
+        stage_pages (dict): Páginas que recibió cada etapa.
+        source_blank_flags (list): Marcas de página en blanco del PDF de
+            entrada si la etapa remove_blanks las calculó, o None.
+    """
 
-            return {
-                "pdf_path": pdf_path,
-                "pdf_name": os.path.basename(pdf_path),
-                "total_pages": total_pages,
-                "blank_pages": blank_pages,
-                "remaining_pages": remaining_pages,
-                "blank_percentage": round(blank_percentage, 1)
-            }
+    def __init__(self, doc, source_path: str = None, data: bytes = None):
+        self.doc = doc
+        self.source_path = source_path
+        self.page_map = list(range(len(doc)))
+        self.timings = {}
+        self.stage_pages = {}
+        self.source_blank_flags = None
+        self.modified = False
+        self._data = data
 
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+        return False
+
+    @property
+    def page_count(self) -> int:
+        return len(self.doc)
+
+    def delete_pages(self, page_nums: List[int]):
+        """
+        Elimina páginas (índices desde 0) del documento.
+        """
+        if not page_nums:
+            return
+        self.doc.delete_pages(sorted(page_nums))
+        removed = set(page_nums)
+        if self.page_map is not None:
+            self.page_map = [source_page for page_num, source_page in enumerate(self.page_map)
+                             if page_num not in removed]
+        self.modified = True
+        self._data = None
+
+    def replace(self, data: bytes, same_pages: bool = False):
+        """
+        Sustituye el documento por el PDF en `data`, p. ej. el resultado del OCR.
+        Con `same_pages` se indica que las páginas no cambiaron de contenido ni de orden.
+        """
+        self.doc.close()
+        self.doc = fitz.open("pdf", data)
+        if not same_pages:
+            self.page_map = None
+        self.modified = True
+        self._data = data
+
+    def to_bytes(self) -> bytes:
+        """
+        Contenido del PDF actual. Sin cambios se devuelve el archivo de entrada
+        tal cual; si no, se serializa una vez y se reutiliza hasta el siguiente cambio.
+        """
+        if self._data is None:
+            if not self.modified and self.source_path:
+                with open(self.source_path, "rb") as file:
+                    self._data = file.read()
+            else:
+                # garbage=3 descarta los objetos de las páginas eliminadas. Sin
+                # un /ID nuevo en cada guardado, el mismo PDF de entrada da los
+                # mismos bytes y el mismo checksum (ver find_attachment)
+                self._data = self.doc.tobytes(garbage=3, no_new_id=True)
+        return self._data
+
+    def size_bytes(self) -> int:
+        if self._data is None and not self.modified and self.source_path:
+            return os.path.getsize(self.source_path)
+        return len(self.to_bytes())
+
+    def to_base64(self) -> str:
+        return base64.b64encode(self.to_bytes()).decode("utf-8")
+
+    def save(self, output_path: str) -> str:
+        """
+        Escribe el PDF actual en `output_path` y devuelve la ruta.
+        """
+        if self._data is None and not self.modified and self.source_path:
+            shutil.copyfile(self.source_path, output_path)
+        else:
+            with open(output_path, "wb") as file:
+                file.write(self.to_bytes())
+        return output_path
+
+    def close(self):
+        self.doc.close()
+        self._data = None
+
+
+class DocumentPipeline:
+    """
+    Cadena de etapas de proceso sobre un documento abierto en memoria.
+
+    Cada etapa recibe el PipelineDocument de la anterior, sin escribir
+    archivos intermedios ni volver a abrir el PDF. Solo ocrmypdf trabaja
+    sobre disco, con sus propios temporales. La eliminación de páginas en
+    blanco reutiliza el análisis del PDF de entrada (con la caché y los
+    procesos de DocumentConverter) mientras las etapas anteriores solo hayan
+    quitado páginas.
+
+    Ejemplo:
+        pipeline = DocumentPipeline(converter).remove_first_page().remove_blanks().optimize_size().check_size()
+        with pipeline.run("entrada.pdf") as result:
+            datas = result.to_base64()
+
+    Args:
+        converter (DocumentConverter): Configuración y análisis de páginas.
+    """
+
+    def __init__(self, converter: "DocumentConverter"):
+        self.converter = converter
+        self.stages = []
+
+    def add_stage(self, name: str, func) -> "DocumentPipeline":
+        """
+        Añade una etapa `func(document)` que modifica el PipelineDocument recibido.
+        """
+        self.stages.append((name, func))
+        return self
+
+    def remove_first_page(self) -> "DocumentPipeline":
+        return self.add_stage("remove_first_page", self._remove_first_page)
+
+    def remove_blanks(self) -> "DocumentPipeline":
+        return self.add_stage("remove_blanks", self._remove_blanks)
+
+    def check_size(self) -> "DocumentPipeline":
+        return self.add_stage("check_size", self._check_size)
+
+    def optimize_size(self) -> "DocumentPipeline":
+        return self.add_stage("optimize_size", self._optimize_size)
+
+    def ocr(self) -> "DocumentPipeline":
+        return self.add_stage("apply_ocr", self._ocr)
+
+    def run(self, source) -> PipelineDocument:
+        """
+        Ejecuta las etapas sobre un PDF.
+
+        Args:
+            source: Ruta del PDF o su contenido en bytes.
+
+        Returns:
+            PipelineDocument: El documento resultante, abierto. Hay que cerrarlo
+            (o usarlo con `with`) al terminar.
+        """
+        if isinstance(source, (bytes, bytearray)):
+            data = bytes(source)
+            document = PipelineDocument(fitz.open("pdf", data), data=data)
+        else:
+            document = PipelineDocument(fitz.open(source), source_path=source)
+
+        try:
+            for name, stage in self.stages:
+                start = time.perf_counter()
+                pages = document.page_count
+                with metrics.registry.track("document_stage", stage=name) as tracker:
+                    tracker.set(pages=pages)
+                    stage(document)
+                document.timings[name] = document.timings.get(name, 0.0) + time.perf_counter() - start
+                document.stage_pages[name] = document.stage_pages.get(name, 0) + pages
         except Exception as e:
-            logging.error(f"Error obteniendo estadísticas del PDF {pdf_path}: {e}")
-            raise
\ No newline at end of file
+            logging.error(f"Error procesando PDF: {e}")
+            document.close()
+            raise
+        return document
+
+    def _remove_first_page(self, document: PipelineDocument):
+        if document.page_count <= 1:
+            logging.info("El PDF tiene una sola página, no se elimina nada")
+            return
+        document.delete_pages([0])
+
+    def _remove_blanks(self, document: PipelineDocument):
+        if document.source_path and document.page_map is not None:
+            source_flags = document.source_blank_flags = self.converter.blank_flags(document.source_path)
+            blank_flags = [source_flags[source_page] for source_page in document.page_map]
+        else:
+            blank_flags = [self.converter.is_blank_page(page) for page in document.doc]
+
+        blank_pages = [page_num for page_num, is_blank in enumerate(blank_flags) if is_blank]
+        total_pages = document.page_count
+        if total_pages and len(blank_pages) == total_pages:
+            raise ValueError("Todas las páginas del PDF están en blanco")
+        document.delete_pages(blank_pages)
+
+        blank_percentage = (len(blank_pages) / total_pages * 100) if total_pages > 0 else 0
+        logging.info(f"PDF procesado: {len(blank_pages)} páginas en blanco eliminadas de {total_pages} ({blank_percentage:.1f}%)")
+
+    def _check_size(self, document: PipelineDocument):
+        max_pdf_size_mb = self.converter.max_pdf_size_mb
+        if document.size_bytes() / (1024 * 1024) > max_pdf_size_mb:
+            raise ValueError(f"El archivo excede el tamaño máximo permitido de {max_pdf_size_mb}MB")
+
+    def _optimize_size(self, document: PipelineDocument):
+        if not self.converter.needs_size_optimization(document.size_bytes()):
+            return
+        data = self.converter.optimize_pdf_bytes(document.to_bytes())
+        if data is not None:
+            # Las páginas son las mismas, solo cambia cómo están guardadas
+            document.replace(data, same_pages=True)
+
+    def _ocr(self, document: PipelineDocument):
+        text_flags = None
+        if self.converter.ocr_mode == "skip_text":
+            min_chars = self.converter.ocr_min_text_chars
+            text_flags = [page_text_chars(page) >= min_chars for page in document.doc]
+        options = self.converter.ocr_options(text_flags)
+        if options is None:
+            return
+
+        output = io.BytesIO()
+        ocrmypdf.ocr(io.BytesIO(document.to_bytes()), output, **options)
+        document.replace(output.getvalue())
+        logging.info("OCR aplicado exitosamente")
@@ -0,0 +1,371 @@
+# -*- coding: utf-8
+"""
+Carga masiva de PDFs como adjuntos de Odoo.
+
+Recorre un directorio (o un manifiesto CSV), procesa cada documento con
+DocumentConverter en un pool de procesos y sube los documentos terminados con
+OdooXMLRPC desde un pool de hilos. Entre ambas etapas hay una cola acotada, y
+cada documento subido se anota en un archivo de checkpoint para que una
+ejecución interrumpida continúe donde se quedó.
+
+Uso:
+    python ingest.py <directorio> [--manifest archivo.csv] [--config config.ini]
+"""
+import argparse
+import configparser
+import csv
+import json
+import logging
+import os
+import queue
+import shutil
+import tempfile
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+
+import connection
+import document
+import metrics
+
+# DocumentConverter de cada proceso del pool, creado por _init_worker
+_converter = None
+
+
+def _init_worker(config_path):
+    global _converter
+    _converter = document.DocumentConverter(config_path)
+    # El paralelismo ya lo da el pool de documentos
+    _converter.workers = 1
+
+
+def process_document(pdf_path: str, work_dir: str, options: dict) -> dict:
+    """
+    Ejecuta las etapas de documento sobre un PDF con DocumentPipeline, en
+    memoria, y escribe solo el resultado en un directorio de trabajo propio.
+    Si el DocumentConverter tiene caché de documentos y el mismo contenido ya
+    se procesó con las mismas opciones, se reutiliza el resultado.
+
+    Args:
+        pdf_path (str): Ruta al PDF original.
+        work_dir (str): Directorio de trabajo del documento.
+        options (dict): Etapas activas (remove_first_page, remove_blanks, check_size, apply_ocr).
+
+    Returns:
+        dict: Ruta del PDF final ("output"), estadísticas de páginas del PDF
+        original ("stats", a cero si no se pudieron calcular), si vino de la
+        caché ("cached"), segundos empleados en cada etapa ("timings") y
+        páginas procesadas por las etapas de DocumentPipeline ("stage_pages").
+    """
+    timings = {}
+    stage_pages = {}
+    output_path = os.path.join(work_dir, "documento.pdf")
+
+    cache = _converter.document_cache
+    if cache is not None:
+        start = time.perf_counter()
+        # La clave incluye las opciones del config.ini que cambian el resultado
+        key = document.DocumentCache.make_key(pdf_path, dict(options, settings=_converter.output_settings()))
+        stats = cache.get(key, output_path)
+        timings["cache_lookup"] = time.perf_counter() - start
+        if stats is not None:
+            return {"output": output_path, "stats": stats, "cached": True, "timings": timings,
+                    "stage_pages": stage_pages}
+
+    pipeline = document.DocumentPipeline(_converter)
+    if options["remove_first_page"]:
+        pipeline.remove_first_page()
+    if options["check_size"] and _converter.size_optimization == "off":
+        pipeline.check_size()
+    if options["remove_blanks"]:
+        pipeline.remove_blanks()
+    pipeline.optimize_size()
+    if options["check_size"]:
+        pipeline.check_size()
+    if options["apply_ocr"]:
+        pipeline.ocr()
+
+    with pipeline.run(pdf_path) as result:
+        timings.update(result.timings)
+        stage_pages.update(result.stage_pages)
+        start = time.perf_counter()
+        result.save(output_path)
+        timings["save"] = time.perf_counter() - start
+        blank_flags = result.source_blank_flags
+
+    # Con remove_blanks se reutilizan las páginas en blanco ya calculadas; sin
+    # esa etapa se usa el detector rápido. Un fallo aquí no invalida el documento.
+    start = time.perf_counter()
+    try:
+        stats = _converter.document_statistics(pdf_path, blank_flags)
+    except Exception as e:
+        logging.warning(f"No se pudieron calcular las estadísticas de {pdf_path}: {e}")
+        stats = None
+    timings["statistics"] = time.perf_counter() - start
+
+    if stats is None:
+        # Sin estadísticas el resultado no se guarda en la caché
+        stats = {"pdf_path": pdf_path, "pdf_name": os.path.basename(pdf_path), "total_pages": 0,
+                 "blank_pages": 0, "remaining_pages": 0, "blank_percentage": 0}
+    elif cache is not None:
+        start = time.perf_counter()
+        cache.put(key, output_path, stats)
+        timings["cache_store"] = time.perf_counter() - start
+
+    return {"output": output_path, "stats": stats, "cached": False, "timings": timings,
+            "stage_pages": stage_pages}
+
+
+class Checkpoint:
+    """
+    Registro en formato JSON Lines de los documentos ya subidos a Odoo.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self.done = set()
+        self._lock = threading.Lock()
+        complete = True
+        if os.path.exists(path):
+            with open(path, encoding="utf-8") as file:
+                for line in file:
+                    complete = line.endswith("\n")
+                    try:
+                        entry = json.loads(line)
+                    except ValueError:
+                        # Última línea incompleta de una ejecución interrumpida
+                        continue
+                    if entry.get("status") == "done":
+                        self.done.add(entry["path"])
+        self._file = open(path, "a", encoding="utf-8")
+        if not complete:
+            # Se cierra la línea incompleta para no pegarle el siguiente registro
+            self._file.write("\n")
+
+    def record(self, path: str, status: str, **extra):
+        with self._lock:
+            if status == "done":
+                self.done.add(path)
+            self._file.write(json.dumps(dict(extra, path=path, status=status), ensure_ascii=False) + "\n")
+            self._file.flush()
+
+    def close(self):
+        self._file.close()
+
+
+class BatchIngestor:
+    """
+    Motor de carga masiva de PDFs a adjuntos de Odoo.
+
+    Lee la sección [ingest] del config.ini:
+        cpu_workers: procesos para las etapas de documento (0 = uno por CPU).
+        upload_workers: hilos de subida a Odoo.
+        queue_size: documentos como máximo en cada etapa a la vez.
+        checkpoint_file: archivo de checkpoint.
+        work_dir: directorio para los archivos intermedios.
+        res_model / res_id: registro al que se adjuntan los documentos si el
+            manifiesto no lo indica.
+        remove_first_page, remove_blanks, check_size, apply_ocr: etapas activas.
+        skip_duplicates: no subir un documento si el registro ya tiene un
+            adjunto con el mismo checksum.
+
+    Con `enabled = true` en la sección [metrics], al terminar se exportan las
+    métricas de Odoo y de las etapas a `export_file` (.prom o .json).
+
+    La caché de documentos procesados se configura en la sección [document]
+    (cache_dir, cache_max_mb).
+    """
+
+    def __init__(self, config_path=None):
+        config = configparser.ConfigParser()
+
+        if config_path:
+            config.read(config_path)
+        else:
+            config.read("config.ini")
+
+        self.config_path = config_path
+        self.cpu_workers = config.getint("ingest", "cpu_workers", fallback=0) or os.cpu_count()
+        self.upload_workers = config.getint("ingest", "upload_workers", fallback=4)
+        self.queue_size = config.getint("ingest", "queue_size", fallback=16)
+        self.checkpoint_file = config.get("ingest", "checkpoint_file", fallback="ingest_checkpoint.jsonl")
+        self.work_dir = config.get("ingest", "work_dir", fallback="") or tempfile.gettempdir()
+        self.res_model = config.get("ingest", "res_model", fallback="") or False
+        self.res_id = config.getint("ingest", "res_id", fallback=0) or False
+        self.options = {
+            "remove_first_page": config.getboolean("ingest", "remove_first_page", fallback=False),
+            "remove_blanks": config.getboolean("ingest", "remove_blanks", fallback=True),
+            "check_size": config.getboolean("ingest", "check_size", fallback=True),
+            "apply_ocr": config.getboolean("ingest", "apply_ocr", fallback=False),
+        }
+        self.skip_duplicates = config.getboolean("ingest", "skip_duplicates", fallback=True)
+        self.metrics_file = config.get("metrics", "export_file", fallback="")
+        self.odoo = connection.OdooXMLRPC(config_path)
+
+    def iter_sources(self, directory: str = None, manifest: str = None):
+        """
+        Genera las entradas a cargar: dict con path, name, res_model y res_id.
+
+        El manifiesto es un CSV con columna `path` y, opcionalmente, `name`,
+        `res_model` y `res_id`. Sin manifiesto se recorren los PDF de `directory`.
+        """
+        if manifest:
+            with open(manifest, newline="", encoding="utf-8") as file:
+                for row in csv.DictReader(file):
+                    yield {
+                        "path": row["path"],
+                        "name": row.get("name") or os.path.basename(row["path"]),
+                        "res_model": row.get("res_model") or self.res_model,
+                        "res_id": int(row["res_id"]) if row.get("res_id") else self.res_id,
+                    }
+            return
+
+        for root, dirs, files in os.walk(directory):
+            dirs.sort()
+            for name in sorted(files):
+                if name.lower().endswith(".pdf"):
+                    yield {"path": os.path.join(root, name), "name": name,
+                           "res_model": self.res_model, "res_id": self.res_id}
+
+    def run(self, directory: str = None, manifest: str = None) -> dict:
+        """
+        Ejecuta la carga completa y devuelve un reporte con el rendimiento.
+
+        Returns:
+            dict: Documentos subidos, omitidos y fallidos, documentos por minuto,
+            segundos totales por etapa y profundidad máxima y media de las colas.
+        """
+        checkpoint = Checkpoint(self.checkpoint_file)
+        upload_queue = queue.Queue(maxsize=self.queue_size)
+        stats = {"uploaded": 0, "skipped": 0, "duplicates": 0, "cached": 0, "failed": 0,
+                 "stage_seconds": {}, "queue_samples": []}
+        stats_lock = threading.Lock()
+
+        def add_timing(stage, seconds):
+            with stats_lock:
+                stats["stage_seconds"][stage] = stats["stage_seconds"].get(stage, 0.0) + seconds
+
+        def upload_worker():
+            while True:
+                item = upload_queue.get()
+                if item is None:
+                    return
+                entry, result, work_dir = item
+                try:
+                    if self.skip_duplicates:
+                        start = time.perf_counter()
+                        existing_id = self.odoo.find_attachment(document.file_checksum(result["output"], "sha1"),
+                                                                entry["res_model"], entry["res_id"])
+                        add_timing("duplicate_check", time.perf_counter() - start)
+                        if existing_id:
+                            logging.info(f"{entry['path']} ya está adjunto como {existing_id}, no se sube")
+                            checkpoint.record(entry["path"], "done", attachment_id=existing_id, duplicate=True)
+                            with stats_lock:
+                                stats["duplicates"] += 1
+                            continue
+
+                    start = time.perf_counter()
+                    attachment_id = self.odoo.create_from_file(
+                        "ir.attachment",
+                        {"name": entry["name"], "res_model": entry["res_model"], "res_id": entry["res_id"],
+                         "mimetype": "application/pdf"},
+                        "datas", result["output"])
+                    add_timing("upload", time.perf_counter() - start)
+                    checkpoint.record(entry["path"], "done", attachment_id=attachment_id)
+                    with stats_lock:
+                        stats["uploaded"] += 1
+                except Exception as e:
+                    logging.error(f"Error subiendo {entry['path']}: {e}")
+                    checkpoint.record(entry["path"], "error", error=str(e))
+                    with stats_lock:
+                        stats["failed"] += 1
+                finally:
+                    shutil.rmtree(work_dir, ignore_errors=True)
+
+        uploaders = [threading.Thread(target=upload_worker, daemon=True) for _ in range(self.upload_workers)]
+        for thread in uploaders:
+            thread.start()
+
+        logging.info(f"Iniciando carga masiva con {self.cpu_workers} procesos y {self.upload_workers} hilos de subida")
+        start_time = time.perf_counter()
+        pending = {}
+
+        def collect(futures):
+            for future in futures:
+                entry, work_dir = pending.pop(future)
+                try:
+                    result = future.result()
+                except Exception as e:
+                    logging.error(f"Error procesando {entry['path']}: {e}")
+                    checkpoint.record(entry["path"], "error", error=str(e))
+                    shutil.rmtree(work_dir, ignore_errors=True)
+                    with stats_lock:
+                        stats["failed"] += 1
+                    continue
+                for stage, seconds in result["timings"].items():
+                    add_timing(stage, seconds)
+                    # Los procesos del pool tienen su propio registro de métricas:
+                    # las etapas se registran aquí con los tiempos que devuelven.
+                    # Solo las etapas de DocumentPipeline suman páginas (no la
+                    # caché, el guardado ni las estadísticas)
+                    pages = result["stage_pages"].get(stage)
+                    metrics.registry.record("document_stage", {"stage": stage}, seconds,
+                                            **({"pages": pages} if pages is not None else {}))
+                if result["cached"]:
+                    stats["cached"] += 1
+                # Bloquea si la cola de subida está llena
+                upload_queue.put((entry, result, work_dir))
+            stats["queue_samples"].append((len(pending), upload_queue.qsize()))
+
+        try:
+            with ProcessPoolExecutor(max_workers=self.cpu_workers, initializer=_init_worker,
+                                     initargs=(self.config_path,)) as executor:
+                for entry in self.iter_sources(directory, manifest):
+                    if entry["path"] in checkpoint.done:
+                        stats["skipped"] += 1
+                        continue
+                    if len(pending) >= self.queue_size:
+                        done, _ = wait(pending, return_when=FIRST_COMPLETED)
+                        collect(done)
+                    work_dir = tempfile.mkdtemp(prefix="ingest_", dir=self.work_dir)
+                    future = executor.submit(process_document, entry["path"], work_dir, self.options)
+                    pending[future] = (entry, work_dir)
+                while pending:
+                    done, _ = wait(pending, return_when=FIRST_COMPLETED)
+                    collect(done)
+        finally:
+            for _ in uploaders:
+                upload_queue.put(None)
+            for thread in uploaders:
+                thread.join()
+            checkpoint.close()
+
+        elapsed = time.perf_counter() - start_time
+        samples = stats.pop("queue_samples") or [(0, 0)]
+        report = dict(stats,
+                      elapsed_seconds=round(elapsed, 2),
+                      docs_per_minute=round(stats["uploaded"] / elapsed * 60, 1) if elapsed else 0.0,
+                      stage_seconds={stage: round(seconds, 2) for stage, seconds in stats["stage_seconds"].items()},
+                      queue_depth={
+                          "processing_max": max(sample[0] for sample in samples),
+                          "processing_mean": round(sum(sample[0] for sample in samples) / len(samples), 1),
+                          "upload_max": max(sample[1] for sample in samples),
+                          "upload_mean": round(sum(sample[1] for sample in samples) / len(samples), 1),
+                      })
+        logging.info(f"Carga masiva terminada: {json.dumps(report)}")
+        if self.metrics_file and metrics.registry.enabled:
+            metrics.registry.export(self.metrics_file)
+            logging.info(f"Métricas exportadas a {self.metrics_file}")
+        return report
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Carga masiva de PDFs como adjuntos de Odoo")
+    parser.add_argument("directory", nargs="?", help="Directorio con los PDF a cargar")
+    parser.add_argument("--manifest", help="CSV con columnas path, name, res_model, res_id")
+    parser.add_argument("--config", help="Ruta del config.ini")
+    args = parser.parse_args()
+    if not args.directory and not args.manifest:
+        parser.error("Indique un directorio o un manifiesto")
+
+    print(json.dumps(BatchIngestor(args.config).run(args.directory, args.manifest), indent=2))
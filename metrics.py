@@ -0,0 +1,297 @@
+# -*- coding: utf-8
+"""
+Métricas de rendimiento de las llamadas a Odoo y de las etapas de documento.
+
+Los puntos instrumentados usan `registry.track(evento, **etiquetas)`. Si el
+registro está desactivado y no hay hooks, track() devuelve un objeto vacío
+compartido y el coste es una comprobación y una llamada.
+
+Por cada evento se registran:
+    <evento>_duration_seconds: histograma de duración por etiquetas.
+    <evento>_errors_total: contador de errores por etiquetas y tipo de error.
+    <evento>_<valor>_total: contador de cada valor añadido con tracker.set(),
+        p. ej. odoo_rpc_request_bytes_total o document_stage_pages_total.
+
+Ejemplo:
+    import metrics
+    metrics.registry.enable()
+    ...
+    print(metrics.registry.to_prometheus())
+
+Los hooks reciben cada evento antes y después de ejecutarse:
+    metrics.registry.add_hook(pre=lambda evento, etiquetas: ...,
+                              post=lambda evento, etiquetas, segundos, error, valores: ...)
+"""
+import bisect
+import json
+import threading
+import time
+
+# Límites superiores (segundos) de los buckets de los histogramas de duración
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+
+class Histogram:
+    """
+    Histograma acumulado al estilo de Prometheus.
+    """
+
+    def __init__(self, buckets=DEFAULT_BUCKETS):
+        self.buckets = tuple(buckets)
+        self.counts = [0] * (len(self.buckets) + 1)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value: float):
+        self.counts[bisect.bisect_left(self.buckets, value)] += 1
+        self.sum += value
+        self.count += 1
+
+    def cumulative(self) -> list:
+        """
+        Pares (límite, observaciones <= límite), terminando en "+Inf".
+        """
+        total = 0
+        result = []
+        for bound, count in zip(self.buckets + ("+Inf",), self.counts):
+            total += count
+            result.append((bound, total))
+        return result
+
+    def quantile(self, q: float) -> float:
+        """
+        Estimación de un cuantil (0-1): el límite del primer bucket que lo alcanza.
+        """
+        if not self.count:
+            return 0.0
+        target = q * self.count
+        for bound, total in self.cumulative():
+            if total >= target:
+                return bound if bound != "+Inf" else self.buckets[-1]
+        return self.buckets[-1]
+
+
+class _Tracker:
+    """
+    Mide un evento como context manager y lo registra al salir.
+    """
+
+    __slots__ = ("registry", "event", "labels", "values", "start")
+
+    def __init__(self, registry, event: str, labels: dict):
+        self.registry = registry
+        self.event = event
+        self.labels = labels
+        self.values = {}
+        self.start = None
+
+    def set(self, **values):
+        """
+        Añade valores al evento (bytes, páginas...), que se suman a sus contadores.
+        """
+        self.values.update(values)
+
+    def __enter__(self):
+        for hook in self.registry.pre_hooks:
+            hook(self.event, self.labels)
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.registry.record(self.event, self.labels, time.perf_counter() - self.start, exc_value, **self.values)
+        return False
+
+
+class _NullTracker:
+    """
+    Tracker sin efecto para cuando las métricas están desactivadas.
+    """
+
+    __slots__ = ()
+
+    def set(self, **values):
+        pass
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        return False
+
+
+_NULL_TRACKER = _NullTracker()
+
+
+class MetricsRegistry:
+    """
+    Registro de histogramas y contadores por evento y etiquetas, seguro entre hilos.
+
+    Args:
+        enabled (bool): Si se registran métricas. Los hooks se llaman aunque
+            esté desactivado.
+        buckets (tuple): Límites de los histogramas de duración en segundos.
+    """
+
+    def __init__(self, enabled: bool = False, buckets=DEFAULT_BUCKETS):
+        self.enabled = enabled
+        self.buckets = tuple(buckets)
+        self.pre_hooks = []
+        self.post_hooks = []
+        self._histograms = {}
+        self._counters = {}
+        self._lock = threading.Lock()
+
+    def enable(self):
+        self.enabled = True
+
+    def disable(self):
+        self.enabled = False
+
+    def add_hook(self, pre=None, post=None):
+        """
+        Añade callbacks de trazado: `pre(evento, etiquetas)` antes de cada
+        evento y `post(evento, etiquetas, segundos, error, valores)` después.
+        """
+        if pre is not None:
+            self.pre_hooks.append(pre)
+        if post is not None:
+            self.post_hooks.append(post)
+
+    def remove_hook(self, pre=None, post=None):
+        if pre is not None and pre in self.pre_hooks:
+            self.pre_hooks.remove(pre)
+        if post is not None and post in self.post_hooks:
+            self.post_hooks.remove(post)
+
+    def track(self, event: str, **labels):
+        """
+        Context manager que mide un evento con las etiquetas indicadas.
+        """
+        if not self.enabled and not self.pre_hooks and not self.post_hooks:
+            return _NULL_TRACKER
+        return _Tracker(self, event, labels)
+
+    def record(self, event: str, labels: dict, seconds: float, error: BaseException = None, **values):
+        """
+        Registra un evento ya medido (p. ej. tiempos devueltos por otro proceso).
+        """
+        if self.enabled:
+            label_key = tuple(sorted(labels.items()))
+            with self._lock:
+                histogram = self._histograms.get((event, label_key))
+                if histogram is None:
+                    histogram = self._histograms[(event, label_key)] = Histogram(self.buckets)
+                histogram.observe(seconds)
+                if error is not None:
+                    error_key = (f"{event}_errors", label_key + (("error", type(error).__name__),))
+                    self._counters[error_key] = self._counters.get(error_key, 0) + 1
+                for name, value in values.items():
+                    counter_key = (f"{event}_{name}", label_key)
+                    self._counters[counter_key] = self._counters.get(counter_key, 0) + value
+        for hook in self.post_hooks:
+            hook(event, labels, seconds, error, values)
+
+    def reset(self):
+        with self._lock:
+            self._histograms.clear()
+            self._counters.clear()
+
+    def snapshot(self) -> dict:
+        """
+        Métricas actuales como dict serializable en JSON, con percentiles
+        estimados y, si hay páginas, páginas por segundo.
+
+        Returns:
+            dict: {"events": {evento: [series]}, "counters": {contador: [series]}}
+        """
+        with self._lock:
+            histograms = {key: (histogram.count, histogram.sum, histogram.quantile(0.5), histogram.quantile(0.95),
+                                histogram.quantile(0.99))
+                          for key, histogram in self._histograms.items()}
+            counters = dict(self._counters)
+
+        events = {}
+        for (event, label_key), (count, total, p50, p95, p99) in sorted(histograms.items()):
+            series = {"labels": dict(label_key), "count": count, "seconds_total": round(total, 6),
+                      "seconds_mean": round(total / count, 6) if count else 0.0,
+                      "p50": p50, "p95": p95, "p99": p99}
+            for (counter, counter_labels), value in counters.items():
+                if counter_labels == label_key and counter.startswith(f"{event}_"):
+                    name = counter[len(event) + 1:]
+                    if name != "errors":
+                        series[name] = value
+            errors = sum(value for (counter, counter_labels), value in counters.items()
+                         if counter == f"{event}_errors" and counter_labels[:-1] == label_key)
+            series["errors"] = errors
+            if series.get("pages") and total:
+                series["pages_per_second"] = round(series["pages"] / total, 2)
+            events.setdefault(event, []).append(series)
+
+        counter_series = {}
+        for (counter, label_key), value in sorted(counters.items()):
+            counter_series.setdefault(f"{counter}_total", []).append({"labels": dict(label_key), "value": value})
+        return {"events": events, "counters": counter_series}
+
+    def to_json(self, indent: int = 2) -> str:
+        return json.dumps(self.snapshot(), indent=indent, ensure_ascii=False)
+
+    def to_prometheus(self) -> str:
+        """
+        Métricas en el formato de texto de Prometheus.
+        """
+        with self._lock:
+            histograms = {key: (histogram.cumulative(), histogram.sum, histogram.count)
+                          for key, histogram in self._histograms.items()}
+            counters = dict(self._counters)
+
+        lines = []
+        last_name = None
+        for (event, label_key), (cumulative, total, count) in sorted(histograms.items(), key=lambda item: item[0]):
+            name = f"{event}_duration_seconds"
+            if name != last_name:
+                lines.append(f"# TYPE {name} histogram")
+                last_name = name
+            for bound, bucket_count in cumulative:
+                lines.append(f"{name}_bucket{_format_labels(label_key + (('le', str(bound)),))} {bucket_count}")
+            lines.append(f"{name}_sum{_format_labels(label_key)} {total}")
+            lines.append(f"{name}_count{_format_labels(label_key)} {count}")
+
+        for (counter, label_key), value in sorted(counters.items()):
+            name = f"{counter}_total"
+            if name != last_name:
+                lines.append(f"# TYPE {name} counter")
+                last_name = name
+            lines.append(f"{name}{_format_labels(label_key)} {value}")
+        return "\n".join(lines) + "\n"
+
+    def export(self, path: str):
+        """
+        Escribe las métricas en `path`: formato Prometheus si termina en .prom
+        o .txt, JSON en otro caso.
+        """
+        content = self.to_prometheus() if path.endswith((".prom", ".txt")) else self.to_json()
+        with open(path, "w", encoding="utf-8") as file:
+            file.write(content)
+
+
+def _escape_label(value) -> str:
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _format_labels(label_key: tuple) -> str:
+    if not label_key:
+        return ""
+    return "{" + ",".join(f'{key}="{_escape_label(value)}"' for key, value in label_key) + "}"
+
+
+# Registro compartido por connection.py y document.py
+registry = MetricsRegistry()
+
+
+def configure(config):
+    """
+    Activa el registro compartido si la sección [metrics] del config.ini
+    tiene `enabled = true`.
+    """
+    if config.getboolean("metrics", "enabled", fallback=False):
+        registry.enable()
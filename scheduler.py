@@ -0,0 +1,338 @@
+# -*- coding: utf-8
+"""
+Planificador de llamadas a Odoo: reintentos con espera exponencial y jitter,
+límite de ritmo (token bucket) y circuit breaker.
+
+Solo se reintentan los errores transitorios (HTTP 429/502/503/504, conexiones
+cortadas o rechazadas, timeouts y conflictos de concurrencia de PostgreSQL), y
+solo cuando repetir la llamada es seguro:
+    - lecturas, y las llamadas que quien las hace marca como seguras
+      (p. ej. OdooXMLRPC.write(..., retry_safe=True)): cualquier error transitorio;
+    - el resto (create, write, unlink, acciones...): solo si el servidor no
+      llegó a procesar la petición (conexión rechazada, HTTP 429 o 503,
+      conflicto de concurrencia que deshizo la transacción). Un timeout o una
+      conexión cortada después de enviar un create no se reintenta, porque el
+      registro puede haberse creado; tampoco un write, que con comandos x2many
+      (0, 0, valores) duplicaría líneas, ni un unlink, que al repetirse
+      fallaría con MissingError.
+
+Se configura en la sección [scheduler] del config.ini:
+    enabled: activa el planificador en OdooXMLRPC.
+    max_retries: reintentos por llamada.
+    backoff_base / backoff_max: segundos de la espera exponencial.
+    rate_limit / burst: peticiones por segundo y ráfaga máxima (0 = sin límite).
+    breaker_failures: errores transitorios seguidos que abren el circuito (0 = sin circuit breaker).
+    breaker_reset_seconds: segundos que el circuito permanece abierto.
+    idempotent_methods: métodos adicionales que se pueden repetir sin riesgo.
+"""
+import errno
+import http.client
+import logging
+import random
+import socket
+import threading
+import time
+import xmlrpc.client
+
+import metrics
+
+# Métodos de lectura, que se pueden repetir sin efectos duplicados
+IDEMPOTENT_METHODS = {"authenticate", "version", "search", "search_read", "search_count", "read", "read_group",
+                      "name_search", "name_get", "fields_get", "default_get", "check_access_rights"}
+
+# Códigos HTTP transitorios y, de ellos, los que indican que la petición no se procesó
+TRANSIENT_HTTP_CODES = {429, 502, 503, 504}
+NOT_PROCESSED_HTTP_CODES = {429, 503}
+
+# Textos de los Fault de Odoo por conflictos de concurrencia: la transacción se
+# deshizo completa, así que repetirla es seguro para cualquier método
+TRANSIENT_FAULT_MARKERS = ("could not serialize access", "concurrent update", "deadlock detected",
+                           "lock not available")
+
+
+class CircuitOpenError(Exception):
+    """
+    El circuit breaker está abierto: no se envían llamadas a Odoo hasta que
+    pase `retry_after` segundos.
+    """
+
+    def __init__(self, retry_after: float):
+        self.retry_after = retry_after
+        super().__init__(f"Odoo no responde: circuito abierto durante {retry_after:.1f}s más")
+
+
+def classify_error(error: BaseException) -> tuple:
+    """
+    Clasifica un error de una llamada a Odoo.
+
+    Returns:
+        tuple: (transitorio, no_procesado). `no_procesado` indica que Odoo no
+        llegó a ejecutar la llamada, así que se puede repetir cualquier método.
+    """
+    if isinstance(error, xmlrpc.client.ProtocolError):
+        return error.errcode in TRANSIENT_HTTP_CODES, error.errcode in NOT_PROCESSED_HTTP_CODES
+    if isinstance(error, xmlrpc.client.Fault):
+        message = str(error.faultString).lower()
+        transient = any(marker in message for marker in TRANSIENT_FAULT_MARKERS)
+        return transient, transient
+    if isinstance(error, ConnectionRefusedError):
+        return True, True
+    if isinstance(error, (ConnectionError, http.client.RemoteDisconnected, http.client.IncompleteRead,
+                          socket.timeout, TimeoutError)):
+        return True, False
+    if isinstance(error, OSError) and error.errno in (errno.ECONNRESET, errno.EPIPE, errno.ETIMEDOUT,
+                                                      errno.EHOSTUNREACH, errno.ENETUNREACH):
+        return True, False
+    return False, False
+
+
+def retry_after_seconds(error: BaseException) -> float:
+    """
+    Segundos indicados en la cabecera Retry-After de un error HTTP, o None.
+    """
+    headers = getattr(error, "headers", None) or {}
+    for key, value in dict(headers).items():
+        if key.lower() == "retry-after":
+            try:
+                return max(0.0, float(value))
+            except ValueError:
+                return None
+    return None
+
+
+class TokenBucket:
+    """
+    Limita el ritmo de peticiones: se acumulan `rate` fichas por segundo hasta
+    un máximo de `burst`, y cada petición consume una. Seguro entre hilos.
+
+    Args:
+        rate (float): Peticiones por segundo.
+        burst (int): Peticiones que se pueden enviar seguidas tras un periodo sin uso.
+    """
+
+    def __init__(self, rate: float, burst: int = None):
+        self.rate = rate
+        self.burst = max(1, burst or int(rate) or 1)
+        self.tokens = float(self.burst)
+        self.updated = time.monotonic()
+        self.waited = 0.0
+        self._lock = threading.Lock()
+
+    def acquire(self):
+        """
+        Toma una ficha, esperando lo necesario. Devuelve los segundos esperados.
+        """
+        with self._lock:
+            now = time.monotonic()
+            self.tokens = min(self.burst, self.tokens + (now - self.updated) * self.rate)
+            self.updated = now
+            self.tokens -= 1
+            # Con fichas negativas la petición queda reservada y espera su turno
+            wait = -self.tokens / self.rate if self.tokens < 0 else 0.0
+            self.waited += wait
+        if wait:
+            time.sleep(wait)
+        return wait
+
+
+class CircuitBreaker:
+    """
+    Deja de enviar llamadas tras `failures` errores transitorios seguidos.
+
+    Con el circuito abierto las llamadas fallan al momento con
+    CircuitOpenError; pasados `reset_seconds` se deja pasar una llamada de
+    prueba (semiabierto) y, si funciona, se cierra de nuevo.
+    """
+
+    CLOSED, OPEN, HALF_OPEN = "closed", "open", "half_open"
+
+    def __init__(self, failures: int = 5, reset_seconds: float = 30.0):
+        self.failures = failures
+        self.reset_seconds = reset_seconds
+        self.state = self.CLOSED
+        self.consecutive_failures = 0
+        self.opened_at = 0.0
+        self.rejected = 0
+        self._trial_running = False
+        self._lock = threading.Lock()
+
+    def before_call(self):
+        """
+        Raises:
+            CircuitOpenError: Si el circuito está abierto.
+        """
+        with self._lock:
+            if self.state == self.CLOSED:
+                return
+            remaining = self.opened_at + self.reset_seconds - time.monotonic()
+            if remaining <= 0 and not self._trial_running:
+                self.state = self.HALF_OPEN
+                self._trial_running = True
+                logging.info("Circuito semiabierto: se envía una llamada de prueba a Odoo")
+                return
+            self.rejected += 1
+            raise CircuitOpenError(max(remaining, 0.0))
+
+    def record_success(self):
+        with self._lock:
+            if self.state != self.CLOSED:
+                logging.info("Odoo responde de nuevo: circuito cerrado")
+            self.state = self.CLOSED
+            self.consecutive_failures = 0
+            self._trial_running = False
+
+    def release_trial(self):
+        """
+        Libera la llamada de prueba si terminó sin registrar su resultado (p. ej.
+        por un KeyboardInterrupt), para que la siguiente llamada pueda hacerla.
+        Tras record_success o record_failure el circuito ya no está
+        semiabierto y no hace nada.
+        """
+        with self._lock:
+            if self.state == self.HALF_OPEN:
+                self._trial_running = False
+
+    def record_failure(self):
+        with self._lock:
+            self.consecutive_failures += 1
+            if self.state == self.HALF_OPEN or self.consecutive_failures >= self.failures:
+                if self.state != self.OPEN:
+                    logging.warning(f"Circuito abierto tras {self.consecutive_failures} errores seguidos de Odoo")
+                self.state = self.OPEN
+                self.opened_at = time.monotonic()
+                self._trial_running = False
+
+
+class RequestScheduler:
+    """
+    Ejecuta llamadas a Odoo con límite de ritmo, circuit breaker y reintentos.
+
+    Args:
+        max_retries (int): Reintentos por llamada.
+        backoff_base (float): Espera máxima del primer reintento; se duplica
+            en cada uno ("full jitter": se espera un tiempo aleatorio hasta ese máximo).
+        backoff_max (float): Tope de la espera entre reintentos.
+        rate_limit (float): Peticiones por segundo (0 = sin límite).
+        burst (int): Ráfaga máxima del límite de ritmo.
+        breaker_failures (int): Errores transitorios seguidos que abren el circuito (0 = sin circuit breaker).
+        breaker_reset_seconds (float): Segundos que el circuito permanece abierto.
+        idempotent_methods (set, optional): Métodos que se pueden repetir ante
+            cualquier error transitorio. Por defecto IDEMPOTENT_METHODS.
+    """
+
+    def __init__(self, max_retries: int = 3, backoff_base: float = 0.5, backoff_max: float = 30.0,
+                 rate_limit: float = 0.0, burst: int = None, breaker_failures: int = 0,
+                 breaker_reset_seconds: float = 30.0, idempotent_methods: set = None):
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self.bucket = TokenBucket(rate_limit, burst) if rate_limit > 0 else None
+        self.breaker = CircuitBreaker(breaker_failures, breaker_reset_seconds) if breaker_failures > 0 else None
+        self.idempotent_methods = set(IDEMPOTENT_METHODS if idempotent_methods is None else idempotent_methods)
+        self.retries = 0
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_config(cls, config):
+        """
+        Crea el planificador a partir de la sección [scheduler], o devuelve
+        None si no está activado.
+        """
+        if not config.getboolean("scheduler", "enabled", fallback=False):
+            return None
+        extra = config.get("scheduler", "idempotent_methods", fallback="")
+        return cls(max_retries=config.getint("scheduler", "max_retries", fallback=3),
+                   backoff_base=config.getfloat("scheduler", "backoff_base", fallback=0.5),
+                   backoff_max=config.getfloat("scheduler", "backoff_max", fallback=30.0),
+                   rate_limit=config.getfloat("scheduler", "rate_limit", fallback=0.0),
+                   burst=config.getint("scheduler", "burst", fallback=0) or None,
+                   breaker_failures=config.getint("scheduler", "breaker_failures", fallback=0),
+                   breaker_reset_seconds=config.getfloat("scheduler", "breaker_reset_seconds", fallback=30.0),
+                   idempotent_methods=IDEMPOTENT_METHODS | {method.strip() for method in extra.split(",")
+                                                            if method.strip()})
+
+    def is_idempotent(self, methods) -> bool:
+        """
+        Si se pueden repetir sin riesgo todas las llamadas de `methods`
+        (un método o varios, p. ej. los de un lote multicall).
+        """
+        methods = (methods,) if isinstance(methods, str) else methods
+        return all(method in self.idempotent_methods for method in methods)
+
+    def backoff(self, attempt: int, error: BaseException = None) -> float:
+        """
+        Segundos de espera antes del reintento número `attempt` (desde 0): el
+        Retry-After del servidor si lo indica o, si no, un valor aleatorio
+        entre 0 y backoff_base * 2^attempt, con tope backoff_max.
+        """
+        retry_after = retry_after_seconds(error) if error is not None else None
+        if retry_after is not None:
+            return min(retry_after, self.backoff_max)
+        return random.uniform(0, min(self.backoff_max, self.backoff_base * 2 ** attempt))
+
+    def call(self, methods, func, *args, idempotent: bool = False):
+        """
+        Ejecuta `func(*args)` aplicando el límite de ritmo, el circuit breaker
+        y los reintentos.
+
+        Args:
+            methods: Método de Odoo que ejecuta la llamada, o lista de métodos
+                si es un lote; decide si es seguro reintentar.
+            func: Función que envía la petición.
+            idempotent (bool): Si quien llama garantiza que repetir la llamada
+                es seguro aunque sus métodos no sean de lectura.
+
+        Raises:
+            CircuitOpenError: Si el circuito está abierto.
+            Exception: El error de la llamada si no es transitorio, no es seguro
+                repetirla o se agotaron los reintentos.
+        """
+        attempt = 0
+        while True:
+            if self.breaker is not None:
+                self.breaker.before_call()
+            if self.bucket is not None:
+                self.bucket.acquire()
+            try:
+                result = func(*args)
+            except Exception as e:
+                transient, not_processed = classify_error(e)
+                if self.breaker is not None:
+                    # Un error de negocio (Fault) indica que Odoo sí responde
+                    if transient:
+                        self.breaker.record_failure()
+                    else:
+                        self.breaker.record_success()
+                if (not transient or attempt >= self.max_retries
+                        or not (not_processed or idempotent or self.is_idempotent(methods))):
+                    raise
+                delay = self.backoff(attempt, e)
+                attempt += 1
+                with self._lock:
+                    self.retries += 1
+                method_label = methods if isinstance(methods, str) else "batch"
+                metrics.registry.record("odoo_retry", {"method": method_label, "error": type(e).__name__}, delay)
+                logging.warning(f"Error transitorio en {method_label} ({e}), reintento {attempt} de "
+                                f"{self.max_retries} en {delay:.2f}s")
+                time.sleep(delay)
+            else:
+                if self.breaker is not None:
+                    self.breaker.record_success()
+                return result
+            finally:
+                # Si escapa un KeyboardInterrupt o SystemExit durante la llamada
+                # de prueba, el circuito seguiría semiabierto sin prueba en curso
+                if self.breaker is not None:
+                    self.breaker.release_trial()
+
+    def stats(self) -> dict:
+        """
+        Reintentos hechos, segundos esperados por el límite de ritmo, llamadas
+        rechazadas con el circuito abierto y estado del circuito.
+        """
+        return {
+            "retries": self.retries,
+            "throttled_seconds": round(self.bucket.waited, 3) if self.bucket else 0.0,
+            "rejected": self.breaker.rejected if self.breaker else 0,
+            "circuit": self.breaker.state if self.breaker else None,
+        }
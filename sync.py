@@ -0,0 +1,412 @@
+# -*- coding: utf-8
+"""
+Sincronización incremental de modelos de Odoo con una réplica local en SQLite.
+
+Cada modelo se replica en una tabla con los campos pedidos. Por modelo se
+guarda una marca de agua (write_date, id) del último registro recibido, de
+modo que cada ejecución solo pide a Odoo los registros creados o modificados
+desde la anterior, recorriendo cada segundo de write_date por IDs. Los
+borrados se detectan periódicamente comparando el número de IDs por rangos con
+Odoo y bajando solo a los rangos que difieren, así que su coste depende del
+número de registros borrados y no del tamaño del modelo.
+
+Uso:
+    python sync.py res.partner sale.order:name,state,amount_total [--config config.ini]
+        [--check-deletions] [--parquet-dir directorio]
+"""
+import argparse
+import configparser
+import json
+import logging
+import os
+import sqlite3
+import time
+from datetime import datetime, timedelta
+
+import connection
+
+# Formato de fecha y hora de Odoo en XML-RPC
+ODOO_DATETIME_FORMAT = "%Y-%m-%d %H:%M:%S"
+
+# Tipos de campo que no se replican al no indicar los campos
+SKIPPED_FIELD_TYPES = {"binary", "one2many"}
+
+# Contexto de las lecturas: los registros archivados también se replican. Las
+# lecturas se hacen con use_cache=False, sin pasar por la caché del cliente
+SYNC_CONTEXT = {"active_test": False}
+
+
+class SQLiteMirror:
+    """
+    Réplica local de modelos de Odoo en una base de datos SQLite: una tabla por
+    modelo (con los puntos del nombre cambiados por "_") y la tabla
+    `_sync_state` con la marca de agua de cada modelo.
+
+    Los valores many2one, many2many y demás listas o diccionarios se guardan
+    como JSON.
+
+    Args:
+        path (str): Ruta del archivo SQLite.
+    """
+
+    def __init__(self, path: str):
+        directory = os.path.dirname(path)
+        if directory and not os.path.exists(directory):
+            os.makedirs(directory)
+        self.path = path
+        self.db = sqlite3.connect(path)
+        self.db.execute("PRAGMA journal_mode=WAL")
+        self.db.execute("CREATE TABLE IF NOT EXISTS _sync_state ("
+                        "model TEXT PRIMARY KEY, write_date TEXT, last_id INTEGER, initial_write_date TEXT, "
+                        "last_deletion_check REAL, fields TEXT)")
+        self.db.commit()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+        return False
+
+    @staticmethod
+    def table_name(model: str) -> str:
+        return '"' + model.replace(".", "_").replace('"', "") + '"'
+
+    def ensure_table(self, model: str, fields: list):
+        """
+        Crea la tabla del modelo, o le añade las columnas que falten.
+        """
+        table = self.table_name(model)
+        self.db.execute(f"CREATE TABLE IF NOT EXISTS {table} (id INTEGER PRIMARY KEY, write_date TEXT)")
+        existing = {row[1] for row in self.db.execute(f"PRAGMA table_info({table})")}
+        for field in fields:
+            if field not in existing:
+                self.db.execute(f'ALTER TABLE {table} ADD COLUMN "{field}"')
+        self.db.commit()
+
+    @staticmethod
+    def _value(value):
+        return json.dumps(value, ensure_ascii=False) if isinstance(value, (list, tuple, dict)) else value
+
+    def upsert(self, model: str, fields: list, records: list, state: dict = None):
+        """
+        Inserta o actualiza registros y, en la misma transacción, guarda la
+        marca de agua del modelo.
+
+        Args:
+            model (str): El nombre del modelo.
+            fields (list): Campos a guardar (además de id y write_date).
+            records (list): Registros devueltos por search_read.
+            state (dict, optional): Valores de `_sync_state` a guardar con los registros.
+        """
+        columns = ["id", "write_date"] + [field for field in fields if field not in ("id", "write_date")]
+        names = ", ".join(f'"{column}"' for column in columns)
+        updates = ", ".join(f'"{column}" = excluded."{column}"' for column in columns[1:])
+        sql = (f"INSERT INTO {self.table_name(model)} ({names}) VALUES ({', '.join('?' * len(columns))}) "
+               f"ON CONFLICT(id) DO UPDATE SET {updates}")
+        with self.db:
+            self.db.executemany(sql, ([self._value(record.get(column)) for column in columns] for record in records))
+            if state:
+                self._set_state(model, state)
+
+    def delete(self, model: str, ids: list):
+        with self.db:
+            self.db.executemany(f"DELETE FROM {self.table_name(model)} WHERE id = ?", ((record_id,) for record_id in ids))
+
+    def count(self, model: str, low: int = None, high: int = None) -> int:
+        """
+        Número de registros del modelo, opcionalmente con low <= id < high.
+        """
+        sql = f"SELECT COUNT(*) FROM {self.table_name(model)}"
+        if low is None:
+            return self.db.execute(sql).fetchone()[0]
+        return self.db.execute(sql + " WHERE id >= ? AND id < ?", (low, high)).fetchone()[0]
+
+    def ids(self, model: str, low: int, high: int) -> list:
+        return [row[0] for row in self.db.execute(
+            f"SELECT id FROM {self.table_name(model)} WHERE id >= ? AND id < ? ORDER BY id", (low, high))]
+
+    def max_id(self, model: str) -> int:
+        return self.db.execute(f"SELECT COALESCE(MAX(id), 0) FROM {self.table_name(model)}").fetchone()[0]
+
+    def get_state(self, model: str) -> dict:
+        """
+        Estado de sincronización del modelo:
+            write_date, last_id: marca de agua; sin write_date la carga inicial
+                está en curso y last_id es el último ID cargado.
+            initial_write_date: write_date más reciente de Odoo al empezar la
+                carga inicial, que pasa a ser la marca de agua al terminarla.
+            last_deletion_check: momento (time.time()) de la última búsqueda de borrados.
+            fields: campos replicados.
+        """
+        row = self.db.execute("SELECT write_date, last_id, initial_write_date, last_deletion_check, fields "
+                              "FROM _sync_state WHERE model = ?", (model,)).fetchone()
+        if row is None:
+            return {"write_date": None, "last_id": 0, "initial_write_date": None, "last_deletion_check": 0.0,
+                    "fields": None}
+        return {"write_date": row[0], "last_id": row[1] or 0, "initial_write_date": row[2],
+                "last_deletion_check": row[3] or 0.0, "fields": json.loads(row[4]) if row[4] else None}
+
+    def set_state(self, model: str, **values):
+        with self.db:
+            self._set_state(model, values)
+
+    def _set_state(self, model: str, values: dict):
+        state = dict(self.get_state(model), **values)
+        self.db.execute("INSERT OR REPLACE INTO _sync_state "
+                        "(model, write_date, last_id, initial_write_date, last_deletion_check, fields) "
+                        "VALUES (?, ?, ?, ?, ?, ?)",
+                        (model, state["write_date"], state["last_id"], state["initial_write_date"],
+                         state["last_deletion_check"], json.dumps(state["fields"]) if state["fields"] is not None else None))
+
+    def to_frame(self, model: str):
+        """
+        Devuelve la tabla de un modelo como DataFrame de pandas.
+        """
+        import pandas as pd
+        return pd.read_sql_query(f"SELECT * FROM {self.table_name(model)} ORDER BY id", self.db)
+
+    def export_parquet(self, model: str, path: str) -> str:
+        """
+        Escribe la réplica de un modelo en un archivo Parquet.
+        """
+        self.to_frame(model).to_parquet(path, index=False)
+        return path
+
+    def close(self):
+        self.db.close()
+
+
+class IncrementalSync:
+    """
+    Sincroniza modelos de Odoo con una réplica local pidiendo solo los cambios.
+
+    Lee la sección [sync] del config.ini:
+        database: archivo SQLite de la réplica.
+        page_size: registros por llamada (por defecto `page_size` de [odoo]).
+        overlap_seconds: segundos que se retrocede la marca de agua al empezar
+            cada ejecución, para recoger registros guardados en transacciones
+            que terminaron después de la ejecución anterior.
+        deletion_check_hours: cada cuántas horas se buscan registros borrados
+            (0 = en cada ejecución).
+
+    Args:
+        odoo (connection.OdooXMLRPC): Cliente de Odoo.
+        mirror (SQLiteMirror): Réplica local.
+        config (configparser.ConfigParser, optional): Configuración; por
+            defecto la del cliente.
+    """
+
+    def __init__(self, odoo: connection.OdooXMLRPC, mirror: SQLiteMirror, config: configparser.ConfigParser = None):
+        config = config or odoo.config
+        self.odoo = odoo
+        self.mirror = mirror
+        self.page_size = config.getint("sync", "page_size", fallback=0) or odoo.page_size
+        self.overlap_seconds = config.getfloat("sync", "overlap_seconds", fallback=5.0)
+        self.deletion_check_hours = config.getfloat("sync", "deletion_check_hours", fallback=24.0)
+
+    def default_fields(self, model: str) -> list:
+        """
+        Campos almacenados del modelo, sin binarios ni one2many.
+        """
+        definitions = self.odoo.fields_get(model, ["type", "store"])
+        return sorted(name for name, definition in definitions.items()
+                      if definition.get("store", True) and definition.get("type") not in SKIPPED_FIELD_TYPES)
+
+    def sync(self, model: str, fields: list = None, check_deletions: bool = None) -> dict:
+        """
+        Trae a la réplica los registros creados o modificados desde la última
+        ejecución y, si toca, elimina los borrados en Odoo.
+
+        Args:
+            model (str): El nombre del modelo.
+            fields (list, optional): Campos a replicar. Por defecto los de la
+                ejecución anterior o, la primera vez, todos los almacenados.
+            check_deletions (bool, optional): Forzar (True) u omitir (False) la
+                búsqueda de borrados. Por defecto según `deletion_check_hours`.
+
+        Returns:
+            dict: Registros recibidos ("fetched"), páginas pedidas ("pages"),
+            registros eliminados ("deleted") y segundos empleados ("seconds").
+        """
+        start = time.perf_counter()
+        state = self.mirror.get_state(model)
+        fields = list(fields or state["fields"] or self.default_fields(model))
+        if state["fields"] is not None and set(fields) - set(state["fields"]):
+            # Con campos nuevos hay que volver a leer todos los registros
+            logging.info(f"Campos nuevos en la réplica de {model}, se sincroniza desde el principio")
+            state.update(write_date=None, last_id=0, initial_write_date=None)
+        self.mirror.ensure_table(model, fields)
+        self.mirror.set_state(model, fields=fields, write_date=state["write_date"], last_id=state["last_id"],
+                              initial_write_date=state["initial_write_date"])
+
+        fetched, pages = self._pull_changes(model, fields, state)
+
+        deleted = 0
+        if check_deletions is None:
+            check_deletions = time.time() - state["last_deletion_check"] >= self.deletion_check_hours * 3600
+        if check_deletions:
+            deleted = self.check_deletions(model)
+
+        result = {"model": model, "fetched": fetched, "pages": pages, "deleted": deleted,
+                  "seconds": round(time.perf_counter() - start, 3)}
+        logging.info(f"Sincronización de {model}: {json.dumps(result)}")
+        return result
+
+    def _pull_changes(self, model: str, fields: list, state: dict) -> tuple:
+        read_fields = sorted(set(fields) | {"write_date"})
+        if state["write_date"] is None:
+            return self._initial_load(model, read_fields, state)
+
+        # Se retrocede la marca de agua para recoger los registros guardados en
+        # transacciones que empezaron antes de la ejecución anterior y terminaron
+        # después; los que se reciban dos veces solo se vuelven a escribir. El
+        # segundo de la marca de agua se recorre siempre entero, porque otra
+        # transacción del mismo segundo puede haber modificado IDs menores.
+        write_date, last_id = state["write_date"], 0
+        if self.overlap_seconds:
+            write_date = shift_datetime(write_date, -self.overlap_seconds)
+
+        # Odoo guarda write_date con microsegundos pero XML-RPC lo devuelve en
+        # segundos, así que no se puede paginar por (write_date, id): se recorre
+        # cada segundo completo por ID y luego se salta al siguiente segundo con
+        # cambios. Así se avanza aunque una sola importación haya modificado
+        # más de page_size registros con el mismo write_date.
+        fetched = pages = 0
+        while True:
+            next_second = shift_datetime(write_date, 1)
+            while True:
+                domain = [("write_date", ">=", write_date), ("write_date", "<", next_second), ("id", ">", last_id)]
+                records = self.odoo.search_read(model, domain, read_fields, limit=self.page_size, order="id asc",
+                                                context=SYNC_CONTEXT, use_cache=False)
+                pages += 1
+                if records:
+                    last_id = records[-1]["id"]
+                    self.mirror.upsert(model, fields, records, {"write_date": write_date, "last_id": last_id})
+                    fetched += len(records)
+                if len(records) < self.page_size:
+                    break
+
+            records = self.odoo.search_read(model, [("write_date", ">=", next_second)], read_fields,
+                                            limit=self.page_size, order="write_date asc, id asc",
+                                            context=SYNC_CONTEXT, use_cache=False)
+            pages += 1
+            if not records:
+                return fetched, pages
+            # Los segundos anteriores al del último registro están completos; el
+            # del último puede estar cortado por el límite y se recorre por ID
+            write_date = records[-1]["write_date"]
+            complete = len(records) < self.page_size
+            last_id = max(record["id"] for record in records if record["write_date"] == write_date) if complete else 0
+            self.mirror.upsert(model, fields, records, {"write_date": write_date, "last_id": last_id})
+            fetched += len(records)
+            if complete:
+                return fetched, pages
+
+    def _initial_load(self, model: str, read_fields: list, state: dict) -> tuple:
+        """
+        Primera carga de un modelo, por páginas de IDs. Si se interrumpe, la
+        siguiente ejecución continúa desde el último ID cargado.
+        """
+        initial_write_date = state["initial_write_date"]
+        if initial_write_date is None:
+            # Los registros modificados durante la carga tendrán un write_date
+            # posterior y se recogerán en la primera sincronización incremental
+            latest = self.odoo.search_read(model, [], ["write_date"], limit=1, order="write_date desc",
+                                           context=SYNC_CONTEXT, use_cache=False)
+            initial_write_date = latest[0]["write_date"] if latest else None
+        logging.info(f"Carga inicial de {model} desde el ID {state['last_id']}")
+
+        last_id = state["last_id"]
+        # Último ID cargado con write_date igual a la marca de agua final
+        edge_id = 0
+        fetched = pages = 0
+        while True:
+            records = self.odoo.search_read(model, [("id", ">", last_id)], read_fields, limit=self.page_size,
+                                            order="id asc", context=SYNC_CONTEXT, use_cache=False)
+            pages += 1
+            if records:
+                last_id = records[-1]["id"]
+                edge_id = max([edge_id] + [record["id"] for record in records
+                                           if record["write_date"] == initial_write_date])
+                self.mirror.upsert(model, read_fields, records,
+                                   {"last_id": last_id, "initial_write_date": initial_write_date})
+                fetched += len(records)
+            if len(records) < self.page_size:
+                break
+
+        if initial_write_date is not None:
+            self.mirror.set_state(model, write_date=initial_write_date, last_id=edge_id, initial_write_date=None)
+        return fetched, pages
+
+    def check_deletions(self, model: str) -> int:
+        """
+        Elimina de la réplica los registros que ya no existen en Odoo.
+
+        Se compara el número de registros por rangos de IDs con search_count y
+        solo se bajan a la lista de IDs los rangos que no coinciden.
+
+        Returns:
+            int: Número de registros eliminados de la réplica.
+        """
+        high = self.mirror.max_id(model) + 1
+        deleted = self._find_deleted(model, 1, high, self.mirror.count(model))
+        if deleted:
+            self.mirror.delete(model, deleted)
+            logging.info(f"Eliminados {len(deleted)} registros de la réplica de {model}")
+        self.mirror.set_state(model, last_deletion_check=time.time())
+        return len(deleted)
+
+    def _find_deleted(self, model: str, low: int, high: int, local_count: int) -> list:
+        if not local_count:
+            return []
+        if local_count <= self.page_size:
+            remote_ids = set(self.odoo.search(model, [("id", ">=", low), ("id", "<", high)], limit=None,
+                                              context=SYNC_CONTEXT, use_cache=False))
+            return [record_id for record_id in self.mirror.ids(model, low, high) if record_id not in remote_ids]
+
+        remote_count = self.odoo.search_count(model, [("id", ">=", low), ("id", "<", high)], context=SYNC_CONTEXT,
+                                              use_cache=False)
+        if remote_count == local_count:
+            return []
+        middle = (low + high) // 2
+        return (self._find_deleted(model, low, middle, self.mirror.count(model, low, middle))
+                + self._find_deleted(model, middle, high, self.mirror.count(model, middle, high)))
+
+
+def shift_datetime(value: str, seconds: float) -> str:
+    """
+    Suma `seconds` a una fecha y hora de Odoo y la devuelve en segundos enteros.
+    """
+    return (datetime.strptime(value[:19], ODOO_DATETIME_FORMAT) + timedelta(seconds=seconds)).strftime(
+        ODOO_DATETIME_FORMAT)
+
+
+def parse_model_spec(spec: str) -> tuple:
+    """
+    Separa "modelo:campo1,campo2" en (modelo, [campos]); sin campos devuelve None.
+    """
+    model, _, fields = spec.partition(":")
+    return model, [field.strip() for field in fields.split(",") if field.strip()] or None
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Sincronización incremental de modelos de Odoo con SQLite")
+    parser.add_argument("models", nargs="+", help="Modelos a sincronizar, como modelo o modelo:campo1,campo2")
+    parser.add_argument("--config", help="Ruta del config.ini")
+    parser.add_argument("--check-deletions", action="store_true", help="Buscar registros borrados en esta ejecución")
+    parser.add_argument("--parquet-dir", help="Exportar además cada modelo a <directorio>/<modelo>.parquet")
+    args = parser.parse_args()
+
+    odoo = connection.OdooXMLRPC(args.config)
+    database = odoo.config.get("sync", "database", fallback="odoo_mirror.sqlite")
+    results = []
+    with SQLiteMirror(database) as mirror:
+        engine = IncrementalSync(odoo, mirror)
+        for spec in args.models:
+            model, fields = parse_model_spec(spec)
+            results.append(engine.sync(model, fields, check_deletions=True if args.check_deletions else None))
+            if args.parquet_dir:
+                os.makedirs(args.parquet_dir, exist_ok=True)
+                mirror.export_parquet(model, os.path.join(args.parquet_dir, f"{model}.parquet"))
+    print(json.dumps(results, indent=2))
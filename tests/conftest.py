@@ -0,0 +1,19 @@
+import os
+import sys
+
+import pytest
+
+# Los módulos del proyecto están en la raíz del repositorio
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+@pytest.fixture
+def odoo_server(tmp_path):
+    """
+    Servidor FakeOdooServer de benchmark.py en un hilo, con un config.ini que
+    apunta a él: devuelve (servidor, ruta del config.ini).
+    """
+    from benchmark import FakeOdooServer
+
+    with FakeOdooServer() as server:
+        yield server, server.config_file(str(tmp_path))
@@ -0,0 +1,51 @@
+import pytest
+
+import connection
+from benchmark import FakeOdooServer
+
+
+def test_fault_in_a_batched_call_keeps_multicall(odoo_server):
+    server, config_path = odoo_server
+    odoo = connection.OdooXMLRPC(config_path)
+    with odoo.batch() as batch:
+        created = batch.create("res.partner", {"name": "A"})
+        failed = batch.execute("res.partner", "no_existe", [])
+    assert isinstance(created.result, int)
+    assert failed.error is not None
+    assert odoo.use_multicall
+
+
+def test_multicall_reauthenticates_with_stale_uid(odoo_server):
+    server, config_path = odoo_server
+    odoo = connection.OdooXMLRPC(config_path)
+    odoo.create("res.partner", {"name": "A"})
+    server.odoo.uid += 1
+    with odoo.batch() as batch:
+        calls = [batch.search_count("res.partner", []) for _ in range(3)]
+    assert [call.result for call in calls] == [1, 1, 1]
+    assert odoo.use_multicall
+    assert server.odoo.authentications == 2
+
+
+def test_missing_multicall_falls_back_to_single_calls(tmp_path):
+    with FakeOdooServer(multicall=False) as server:
+        odoo = connection.OdooXMLRPC(server.config_file(str(tmp_path)))
+        with odoo.batch() as batch:
+            calls = [batch.create("res.partner", {"name": str(i)}) for i in range(3)]
+        assert len({call.result for call in calls}) == 3
+        assert not odoo.use_multicall
+
+
+def test_sequential_error_fails_the_remaining_calls(tmp_path):
+    with FakeOdooServer(multicall=False) as server:
+        odoo = connection.OdooXMLRPC(server.config_file(str(tmp_path)))
+        odoo.use_multicall = False
+        odoo.authenticate()
+        # Todas las peticiones siguientes se cortan antes de responder
+        server.faults = {"reset": 1.0}
+        batch = odoo.batch()
+        calls = [batch.create("res.partner", {"name": str(i)}) for i in range(3)]
+        with pytest.raises(ConnectionError):
+            batch.flush()
+        server.faults = {}
+        assert all(call.done and isinstance(call.error, ConnectionError) for call in calls)
@@ -0,0 +1,65 @@
+import base64
+import hashlib
+
+import connection
+
+
+def test_find_attachment_is_scoped_to_the_record(odoo_server):
+    server, config_path = odoo_server
+    odoo = connection.OdooXMLRPC(config_path)
+    content = b"%PDF contenido"
+    checksum = hashlib.sha1(content).hexdigest()
+    datas = base64.b64encode(content).decode()
+    on_partner = odoo.create("ir.attachment", {"name": "a.pdf", "datas": datas,
+                                               "res_model": "res.partner", "res_id": 7})
+
+    # Un adjunto igual en otro registro no es un duplicado de uno sin registro
+    assert odoo.find_attachment(checksum) is False
+    assert odoo.find_attachment(checksum, "res.partner") is False
+    assert odoo.find_attachment(checksum, "res.partner", 8) is False
+    assert odoo.find_attachment(checksum, "res.partner", 7) == on_partner
+
+    unbound = odoo.create("ir.attachment", {"name": "a.pdf", "datas": datas, "res_model": False, "res_id": False})
+    assert odoo.find_attachment(checksum) == unbound
+
+
+def _sale_orders(odoo):
+    states = ["draft", "sent", "sale"]
+    odoo.create_many("sale.order", [{"team_id": i % 4 + 1, "state": states[i % 3], "amount_total": float(i)}
+                                    for i in range(60)])
+
+
+def test_count_many_ignores_duplicate_values(odoo_server):
+    server, config_path = odoo_server
+    odoo = connection.OdooXMLRPC(config_path)
+    _sale_orders(odoo)
+    domains = {"repetido": [("state", "in", ["draft", "draft"])],
+               "equipos": [("state", "in", ["sent", "sale", "sent"])]}
+    expected = {label: odoo.search_count("sale.order", domain) for label, domain in domains.items()}
+    server.odoo.calls.clear()
+    assert odoo.count_many("sale.order", domains) == expected == {"repetido": 20, "equipos": 40}
+    assert server.odoo.calls["sale.order", "read_group"] == 1
+
+
+def test_count_many_string_on_many2one_uses_search_count(odoo_server):
+    server, config_path = odoo_server
+    odoo = connection.OdooXMLRPC(config_path)
+    _sale_orders(odoo)
+    server.odoo.calls.clear()
+    # Odoo resuelve un nombre en un many2one con name_search, no con el id del grupo
+    odoo.count_many("sale.order", {"acme": [("team_id", "=", "Acme")], "uno": [("team_id", "=", 1)]})
+    assert server.odoo.calls["sale.order", "read_group"] == 0
+    assert server.odoo.calls["sale.order", "search_count"] == 2
+
+
+def test_bucket_field_types_fetched_once(odoo_server):
+    server, config_path = odoo_server
+    odoo = connection.OdooXMLRPC(config_path)
+    _sale_orders(odoo)
+    server.odoo.calls.clear()
+    domains = {team: [("team_id", "=", team)] for team in range(1, 5)}
+    assert odoo.count_many("sale.order", domains) == {team: 15 for team in range(1, 5)}
+    odoo.count_many("sale.order", domains)
+    odoo.aggregate_many("sale.order", domains, ["amount_total:sum"])
+    assert server.odoo.calls["sale.order", "fields_get"] == 1
+    assert server.odoo.calls["sale.order", "read_group"] == 3
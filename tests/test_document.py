@@ -0,0 +1,73 @@
+import json
+import os
+
+import pytest
+
+fitz = pytest.importorskip("fitz")
+
+import document
+from benchmark import make_sample_pdf
+
+FIXTURES = os.path.join(os.path.dirname(os.path.abspath(__file__)), "fixtures")
+# Corpus etiquetado de benchmark.make_labeled_corpus: páginas vacías, con
+# texto, con manchas cerca del 2.7% y con fondos y recuadros de color claro
+BLANK_CORPUS = os.path.join(FIXTURES, "blank_corpus.pdf")
+
+
+def _blank_labels():
+    with open(os.path.join(FIXTURES, "blank_corpus_labels.json"), encoding="utf-8") as file:
+        return json.load(file)["blank"]
+
+
+def _agreement(flags, expected) -> float:
+    assert len(flags) == len(expected)
+    return sum(flag == label for flag, label in zip(flags, expected)) / len(expected)
+
+
+def test_pipeline_output_is_deterministic(tmp_path):
+    source = str(tmp_path / "entrada.pdf")
+    make_sample_pdf(source, pages=6, blank_every=3)
+    converter = document.DocumentConverter(_config(tmp_path))
+    outputs = []
+    for _ in range(2):
+        with document.DocumentPipeline(converter).remove_first_page().remove_blanks().run(source) as result:
+            outputs.append(result.to_bytes())
+    # El mismo PDF procesado dos veces tiene el mismo checksum (detección de duplicados)
+    assert outputs[0] == outputs[1]
+    assert document.rewrite_pdf(source, dpi=72) == document.rewrite_pdf(source, dpi=72)
+    assert document.linearize_pdf(outputs[0]) == document.linearize_pdf(outputs[0])
+
+
+def _config(tmp_path) -> str:
+    path = tmp_path / "config.ini"
+    path.write_text(f"[document]\nlog_file = {tmp_path / 'document_converter.log'}\n"
+                    f"[paths]\nreports_dir = {tmp_path / 'reports'}\n", encoding="utf-8")
+    return str(path)
+
+
+def test_full_classifier_matches_corpus_labels():
+    labels = _blank_labels()
+    with fitz.open(BLANK_CORPUS) as doc:
+        flags = [document.is_blank_stats(document.compute_page_stats(page, precision=None)) for page in doc]
+    assert _agreement(flags, labels) == 1.0
+
+
+def test_fast_detection_matches_corpus_labels():
+    labels = _blank_labels()
+    # Valores por defecto: RGB a 72 dpi
+    flags = document.page_range_blank_flags(BLANK_CORPUS, 0, len(labels))
+    assert _agreement(flags, labels) == 1.0
+
+
+def test_grayscale_fast_detection_agreement():
+    labels = _blank_labels()
+    flags = document.page_range_blank_flags(BLANK_CORPUS, 0, len(labels), grayscale=True)
+    # En grises los fondos de color claro pueden pasar por blancos: más rápido pero
+    # menos preciso, por eso no es el valor por defecto (96.1% en este corpus)
+    assert _agreement(flags, labels) >= 0.95
+    assert all(flag or not label for flag, label in zip(flags, labels)), "una página en blanco pasó a tener contenido"
+
+
+def test_converter_blank_detection_defaults_to_rgb(tmp_path):
+    converter = document.DocumentConverter(_config(tmp_path))
+    assert converter.blank_grayscale is False
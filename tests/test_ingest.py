@@ -0,0 +1,153 @@
+import json
+import os
+import signal
+import subprocess
+import sys
+import threading
+import time
+
+import pytest
+
+pytest.importorskip("fitz")
+
+import ingest
+import metrics
+from benchmark import FakeOdooServer, make_sample_pdf
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def _setup(server, tmp_path, documents: int, queue_size: int = 2, **ingest_options):
+    source_dir = tmp_path / "entrada"
+    source_dir.mkdir()
+    for i in range(documents):
+        make_sample_pdf(str(source_dir / f"doc_{i:03d}.pdf"), pages=3, blank_every=2)
+    work_dir = tmp_path / "trabajo"
+    work_dir.mkdir()
+    options = dict({"cpu_workers": 2, "upload_workers": 2, "queue_size": queue_size,
+                    "checkpoint_file": tmp_path / "checkpoint.jsonl", "work_dir": work_dir,
+                    "res_model": "res.partner", "res_id": 1}, **ingest_options)
+    config_path = server.config_file(str(tmp_path))
+    with open(config_path, "a", encoding="utf-8") as file:
+        file.write("\n".join(["[document]", f"log_file = {tmp_path / 'document_converter.log'}",
+                              "[paths]", f"reports_dir = {tmp_path / 'reports'}", "[ingest]"]
+                             + [f"{key} = {value}" for key, value in options.items()]) + "\n")
+    return config_path, str(source_dir), str(work_dir)
+
+
+def _attachment_names(server):
+    return sorted(record["name"] for record in server.odoo.records.get("ir.attachment", {}).values())
+
+
+def _checkpoint(path):
+    entries = []
+    with open(path, encoding="utf-8") as file:
+        for line in file:
+            try:
+                entries.append(json.loads(line))
+            except ValueError:
+                continue
+    return entries
+
+
+def test_upload_queue_stays_bounded(tmp_path):
+    documents, queue_size, upload_workers = 16, 2, 2
+    # Subidas lentas: los documentos procesados se acumulan delante de Odoo
+    with FakeOdooServer(latency=0.1) as server:
+        config_path, source_dir, work_dir = _setup(server, tmp_path, documents, queue_size,
+                                                   upload_workers=upload_workers)
+        # Cada documento en curso tiene su directorio de trabajo hasta que se sube
+        in_flight, running = [0], True
+
+        def watch():
+            while running:
+                in_flight[0] = max(in_flight[0], len(os.listdir(work_dir)))
+                time.sleep(0.005)
+
+        watcher = threading.Thread(target=watch)
+        watcher.start()
+        try:
+            report = ingest.BatchIngestor(config_path).run(source_dir)
+        finally:
+            running = False
+            watcher.join()
+
+        assert report["uploaded"] == documents
+        assert report["queue_depth"]["processing_max"] <= queue_size
+        assert report["queue_depth"]["upload_max"] <= queue_size
+        # En proceso, en la cola de subida, subiéndose y el que espera sitio en la cola
+        assert in_flight[0] <= 2 * queue_size + upload_workers + 1
+        assert os.listdir(work_dir) == []
+
+
+def test_resume_from_checkpoint_after_a_crash(tmp_path):
+    documents = 12
+    with FakeOdooServer(latency=0.05) as server:
+        config_path, source_dir, work_dir = _setup(server, tmp_path, documents)
+        checkpoint_path = str(tmp_path / "checkpoint.jsonl")
+
+        process = subprocess.Popen([sys.executable, os.path.join(ROOT, "ingest.py"), source_dir,
+                                    "--config", config_path], cwd=ROOT, start_new_session=True,
+                                   stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+        try:
+            deadline = time.monotonic() + 60
+            while time.monotonic() < deadline:
+                if os.path.exists(checkpoint_path) and len(_checkpoint(checkpoint_path)) >= 3:
+                    break
+                time.sleep(0.01)
+        finally:
+            # Caída brusca del proceso y de su pool, sin cerrar nada
+            os.killpg(process.pid, signal.SIGKILL)
+            process.wait()
+
+        done_before = {entry["path"] for entry in _checkpoint(checkpoint_path) if entry["status"] == "done"}
+        assert 3 <= len(done_before) < documents
+        # Una línea a medio escribir en el momento de la caída
+        with open(checkpoint_path, "a", encoding="utf-8") as file:
+            file.write('{"path": "')
+
+        report = ingest.BatchIngestor(config_path).run(source_dir)
+        assert report["skipped"] == len(done_before)
+        assert report["failed"] == 0
+        # Lo subido antes de la caída no se vuelve a subir
+        assert _attachment_names(server) == [f"doc_{i:03d}.pdf" for i in range(documents)]
+        done_after = {entry["path"] for entry in _checkpoint(checkpoint_path) if entry["status"] == "done"}
+        assert len(done_after) == documents
+
+
+def test_worker_exception_fails_only_its_document(tmp_path):
+    documents = 6
+    with FakeOdooServer() as server:
+        config_path, source_dir, work_dir = _setup(server, tmp_path, documents)
+        broken = os.path.join(source_dir, "doc_002.pdf")
+        with open(broken, "wb") as file:
+            file.write(b"no es un PDF")
+
+        report = ingest.BatchIngestor(config_path).run(source_dir)
+        assert report["failed"] == 1
+        assert report["uploaded"] == documents - 1
+        assert _attachment_names(server) == [f"doc_{i:03d}.pdf" for i in range(documents) if i != 2]
+        errors = [entry for entry in _checkpoint(str(tmp_path / "checkpoint.jsonl")) if entry["status"] == "error"]
+        assert [entry["path"] for entry in errors] == [broken]
+        assert os.listdir(work_dir) == []
+
+
+def test_stage_pages_only_for_page_stages(tmp_path):
+    documents = 2
+    with FakeOdooServer() as server:
+        config_path, source_dir, work_dir = _setup(server, tmp_path, documents, remove_first_page="true")
+        metrics.registry.reset()
+        metrics.registry.enable()
+        try:
+            ingest.BatchIngestor(config_path).run(source_dir)
+            events = {series["labels"]["stage"]: series
+                      for series in metrics.registry.snapshot()["events"]["document_stage"]}
+        finally:
+            metrics.registry.disable()
+            metrics.registry.reset()
+
+    # 3 páginas por documento: remove_first_page recibe 3 y remove_blanks las 2 restantes
+    assert events["remove_first_page"]["pages"] == 3 * documents
+    assert events["remove_blanks"]["pages"] == 2 * documents
+    for stage in ("save", "statistics"):
+        assert "pages" not in events[stage]
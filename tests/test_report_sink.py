@@ -0,0 +1,85 @@
+import csv
+import multiprocessing
+import os
+import time
+
+import pytest
+
+import document
+
+COLUMNS = ["a", "b"]
+
+
+class _SlowLock:
+    """
+    fcntl con una espera antes de tomar el bloqueo, para que todos los
+    procesos abran el archivo mientras aún está vacío.
+    """
+
+    def __init__(self, fcntl):
+        self._fcntl = fcntl
+
+    def __getattr__(self, name):
+        return getattr(self._fcntl, name)
+
+    def flock(self, file, operation):
+        if operation == self._fcntl.LOCK_EX:
+            time.sleep(0.05)
+        return self._fcntl.flock(file, operation)
+
+
+def _write_rows(path, barrier, worker, rows):
+    document.fcntl = _SlowLock(document.fcntl)
+    barrier.wait()
+    with document.ReportSink(path, COLUMNS, "csv", batch_size=5) as sink:
+        for index in range(rows):
+            sink.add((worker, index))
+
+
+@pytest.mark.skipif(document.fcntl is None, reason="sin bloqueo entre procesos en esta plataforma")
+def test_csv_header_written_once_across_processes(tmp_path):
+    path = str(tmp_path / "report.csv")
+    processes, rows = 8, 50
+    context = multiprocessing.get_context("fork")
+    barrier = context.Barrier(processes)
+    workers = [context.Process(target=_write_rows, args=(path, barrier, worker, rows))
+               for worker in range(processes)]
+    for worker in workers:
+        worker.start()
+    for worker in workers:
+        worker.join(30)
+        assert worker.exitcode == 0
+
+    with open(path, newline="", encoding="utf-8") as file:
+        lines = list(csv.reader(file))
+    assert lines[0] == COLUMNS
+    assert lines.count(COLUMNS) == 1
+    assert sorted(lines[1:]) == sorted([str(worker), str(index)]
+                                       for worker in range(processes) for index in range(rows))
+
+
+def test_rows_flushed_after_flush_seconds(tmp_path):
+    path = str(tmp_path / "report.csv")
+    sink = document.ReportSink(path, COLUMNS, "csv", batch_size=1000, flush_seconds=0.05)
+    sink.add((1, 1))
+    assert sink.rows_written == 0
+    time.sleep(0.1)
+    sink.add((2, 2))
+    # Sin cerrar el sink, las dos filas ya están en disco
+    assert sink.rows_written == 2
+    with open(path, newline="", encoding="utf-8") as file:
+        assert list(csv.reader(file)) == [COLUMNS, ["1", "1"], ["2", "2"]]
+    sink.close()
+
+
+def test_parquet_parts_are_unique_per_sink(tmp_path):
+    pd = pytest.importorskip("pandas")
+    pytest.importorskip("pyarrow")
+    path = str(tmp_path / "report")
+    with document.ReportSink(path, COLUMNS, "parquet", batch_size=2) as first, \
+            document.ReportSink(path, COLUMNS, "parquet", batch_size=2) as second:
+        for index in range(4):
+            first.add((1, index))
+            second.add((2, index))
+    assert len(os.listdir(path)) == 4
+    assert len(pd.read_parquet(path)) == 8
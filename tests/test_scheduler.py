@@ -0,0 +1,108 @@
+import time
+import xmlrpc.client
+
+import pytest
+
+import connection
+from benchmark import FakeOdooServer
+from scheduler import CircuitBreaker, CircuitOpenError
+
+
+def _client(server, tmp_path, read_timeout: float = 120.0, **options):
+    config_path = server.config_file(str(tmp_path), read_timeout=read_timeout)
+    with open(config_path, "a", encoding="utf-8") as file:
+        file.write("[scheduler]\nenabled = true\nbackoff_base = 0.001\n")
+        file.write("".join(f"{key} = {value}\n" for key, value in options.items()))
+    odoo = connection.OdooXMLRPC(config_path)
+    odoo.authenticate()
+    return odoo
+
+
+def test_write_not_retried_after_the_request_was_sent(tmp_path):
+    with FakeOdooServer(fault_delay=0.3) as server:
+        odoo = _client(server, tmp_path, read_timeout=0.1, max_retries=3)
+        partner_id = odoo.create("res.partner", {"name": "A"})
+
+        # Odoo procesa la petición pero la respuesta llega tras el timeout
+        server.faults = {"timeout": 1.0}
+        server.reset_counters()
+        with pytest.raises(TimeoutError):
+            odoo.create("res.partner", {"name": "B"})
+        with pytest.raises(TimeoutError):
+            odoo.write("res.partner", [partner_id], {"name": "C"})
+        assert server.requests == 2
+        assert odoo.scheduler.retries == 0
+
+        # Las lecturas y las escrituras marcadas como seguras sí se reintentan
+        server.reset_counters()
+        with pytest.raises(TimeoutError):
+            odoo.search_count("res.partner", [])
+        with pytest.raises(TimeoutError):
+            odoo.write("res.partner", [partner_id], {"name": "C"}, retry_safe=True)
+        assert server.requests == 8
+        server.faults = {}
+        time.sleep(0.3)
+        assert sorted(record["name"] for record in server.odoo.records["res.partner"].values()) == ["B", "C"]
+
+
+def test_create_retried_when_not_processed(tmp_path):
+    with FakeOdooServer() as server:
+        odoo = _client(server, tmp_path, max_retries=3)
+        # HTTP 503 antes de procesar la petición: repetir el create es seguro
+        server.faults = {"unavailable": 1.0}
+        with pytest.raises(xmlrpc.client.ProtocolError):
+            odoo.create("res.partner", {"name": "A"})
+        assert odoo.scheduler.retries == 3
+        assert not server.odoo.records.get("res.partner")
+
+
+def test_breaker_opens_and_closes_again(tmp_path):
+    with FakeOdooServer() as server:
+        odoo = _client(server, tmp_path, max_retries=0, breaker_failures=3, breaker_reset_seconds=0.2)
+        breaker = odoo.scheduler.breaker
+        server.faults = {"unavailable": 1.0}
+        for _ in range(3):
+            with pytest.raises(xmlrpc.client.ProtocolError):
+                odoo.search_count("res.partner", [])
+        assert breaker.state == CircuitBreaker.OPEN
+
+        # Con el circuito abierto no se envía nada a Odoo
+        server.reset_counters()
+        with pytest.raises(CircuitOpenError):
+            odoo.search_count("res.partner", [])
+        assert server.requests == 0
+
+        # Una prueba fallida lo vuelve a abrir; una correcta lo cierra
+        time.sleep(0.25)
+        with pytest.raises(xmlrpc.client.ProtocolError):
+            odoo.search_count("res.partner", [])
+        assert breaker.state == CircuitBreaker.OPEN
+        server.faults = {}
+        time.sleep(0.25)
+        assert odoo.search_count("res.partner", []) == 0
+        assert breaker.state == CircuitBreaker.CLOSED
+
+
+def test_half_open_trial_released_when_the_call_raises(tmp_path, monkeypatch):
+    with FakeOdooServer() as server:
+        odoo = _client(server, tmp_path, max_retries=0, breaker_failures=1, breaker_reset_seconds=0.1)
+        breaker = odoo.scheduler.breaker
+        server.faults = {"unavailable": 1.0}
+        with pytest.raises(xmlrpc.client.ProtocolError):
+            odoo.search_count("res.partner", [])
+        server.faults = {}
+        time.sleep(0.15)
+
+        # La llamada de prueba termina con una excepción que no es un error de Odoo
+        def interrupted(*args, **kwargs):
+            raise KeyboardInterrupt
+
+        with monkeypatch.context() as patch:
+            patch.setattr(odoo.transport, "single_request", interrupted)
+            with pytest.raises(KeyboardInterrupt):
+                odoo.search_count("res.partner", [])
+        assert breaker.state == CircuitBreaker.HALF_OPEN
+
+        # La siguiente llamada puede hacer la prueba y cierra el circuito
+        assert odoo.search_count("res.partner", []) == 0
+        assert breaker.state == CircuitBreaker.CLOSED